@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+# Pragmas für Lese-Verbindungen: nur lesen, großer Page-Cache (64 MiB) und Memory-Mapping (256 MiB)
+READ_PRAGMAS = {
+    "query_only": "ON",
+    "cache_size": -64 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# Pragmas für die Schreib-Verbindung: WAL erlaubt parallele Leser während geschrieben wird
+WRITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16 * 1024,
+}
+
+# Sekunden, die ein Schreiber auf die Datenbanksperre eines anderen Prozesses wartet
+WRITE_TIMEOUT = 60
+
+_state_lock = threading.Lock()
+# Lese-Verbindungen aller Threads: Pfad → {Thread: (Verbindung, Generation)}, geschützt durch _state_lock
+_readers = {}
+_writers = {}
+_writer_locks = {}
+_generations = Counter()
+_stats = Counter()
+_pid = os.getpid()
+
+
+def _key(db_path):
+    return str(Path(db_path).resolve())
+
+
+def _apply_pragmas(conn, pragmas):
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def _check_fork():
+    """Nach einem Fork (multiprocessing) dürfen geerbte Verbindungen nicht weiterverwendet werden."""
+    global _pid
+    if os.getpid() != _pid:
+        with _state_lock:
+            _pid = os.getpid()
+            _readers.clear()
+            _writers.clear()
+            _writer_locks.clear()
+            _stats.clear()
+
+
+def _close_dead_readers():
+    """Schließt Lese-Verbindungen beendeter Threads (Streamlit nutzt je Rerun einen neuen Thread)."""
+    for readers in _readers.values():
+        for thread in [thread for thread in readers if not thread.is_alive()]:
+            readers.pop(thread)[0].close()
+
+
+def get_read_connection(db_path):
+    """
+    Liefert die Lese-Verbindung des aktuellen Threads für `db_path` (mode=ro, query_only).
+    Die Verbindung wird wiederverwendet und darf vom Aufrufer nicht geschlossen werden.
+    """
+    _check_fork()
+    key = _key(db_path)
+    thread = threading.current_thread()
+
+    with _state_lock:
+        readers = _readers.setdefault(key, {})
+        entry = readers.get(thread)
+        if entry is not None and entry[1] == _generations[key]:
+            _stats["read_reused"] += 1
+            return entry[0]
+
+        if entry is not None:
+            # Datenbank wurde zwischenzeitlich ersetzt (z.B. Re-Import) → neu öffnen
+            readers.pop(thread)[0].close()
+        _close_dead_readers()
+
+        # check_same_thread=False, damit close_connections die Verbindung aus jedem Thread schließen kann
+        conn = sqlite3.connect(f"{Path(key).as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        _apply_pragmas(conn, READ_PRAGMAS)
+        readers[thread] = (conn, _generations[key])
+        _stats["read_opened"] += 1
+        return conn
+
+
+@contextmanager
+def write_connection(db_path):
+    """
+    Einzige Schreib-Verbindung je Datenbank im Prozess. Schreibvorgänge werden über einen Lock serialisiert
+    und als Transaktion ausgeführt (Commit bei Erfolg, Rollback bei Fehler).
+    """
+    _check_fork()
+    key = _key(db_path)
+
+    with _state_lock:
+        lock = _writer_locks.setdefault(key, threading.RLock())
+
+    with lock:
+        conn = _writers.get(key)
+        if conn is None:
+            # Mehrere Prozesse (z.B. Batch-Pool) schreiben nacheinander → großzügig auf die Sperre warten
+            conn = sqlite3.connect(key, timeout=WRITE_TIMEOUT, check_same_thread=False)
+            _apply_pragmas(conn, WRITE_PRAGMAS)
+            _writers[key] = conn
+            _stats["write_opened"] += 1
+        else:
+            _stats["write_reused"] += 1
+
+        with conn:
+            yield conn
+
+
+def close_connections(db_path):
+    """
+    Schließt die Schreib-Verbindung und die Lese-Verbindungen aller Threads zu `db_path`, z.B. bevor die Datei
+    gelöscht und neu importiert wird (unter Windows nur ohne offene Handles möglich).
+    """
+    key = _key(db_path)
+    with _state_lock:
+        _generations[key] += 1
+        lock = _writer_locks.setdefault(key, threading.RLock())
+        readers = _readers.pop(key, {})
+
+    for conn, _ in readers.values():
+        conn.close()
+
+    with lock:
+        conn = _writers.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+
+def connection_stats():
+    """Zähler für geöffnete und wiederverwendete Verbindungen im aktuellen Prozess."""
+    stats = {name: _stats[name] for name in ["read_opened", "read_reused", "write_opened", "write_reused"]}
+    opened = stats["read_opened"] + stats["write_opened"]
+    reused = stats["read_reused"] + stats["write_reused"]
+    stats["reuse_ratio"] = reused / (opened + reused) if opened + reused else 0.0
+    return stats
@@ -1,72 +1,56 @@
-import sqlite3
-
 import pandas as pd
 import streamlit as st
 
-from database.data_utils import create_table_map, encode_identifiers, decode_placeholders, trim_forecast_df
+from database.data_profile import db_fingerprint, ensure_data_profile
+from database.data_reader import FORECAST_VALUE_COLUMNS, read_data, read_forecast_query, read_product_data, \
+    read_full_forecast_data, read_optimization_capacity, read_optimization_run_info, read_optimization_store, \
+    read_sales_enriched
+from database.forecast_schema import build_forecast_query, make_series_key, normalize_identifiers
+from logic.analysis.timing import timed
+from logic.analysis.weekly_sales import compute_weekly_sales_aggregates
 
 
+# Gemessen wird innerhalb des Caches: Spans entstehen nur, wenn tatsächlich geladen wird
 @st.cache_data
+@timed()
 def load_data(db_path="database/walmart.db"):
-    conn = sqlite3.connect(db_path)
-
-    query_sales = "SELECT * FROM WeeklySales"
-    query_features = "SELECT * FROM StoreFeature"
-    query_stores = "SELECT * FROM Store"
-
-    df_sales = pd.read_sql(query_sales, conn)
-    df_features = pd.read_sql(query_features, conn)
-    df_stores = pd.read_sql(query_stores, conn)
-    conn.close()
+    return read_data(db_path)
 
-    df_sales["Date"] = pd.to_datetime(df_sales["Date"])
-    df_features["Date"] = pd.to_datetime(df_features["Date"])
 
-    return df_sales, df_features, df_stores
+@st.cache_data
+@timed()
+def load_sales_enriched(db_path="database/walmart.db"):
+    return read_sales_enriched(db_path)
 
 
 @st.cache_data
+@timed()
 def load_product_data(db_path="database/walmart.db"):
-    conn = sqlite3.connect(db_path)
-
-    query_hist = "SELECT * FROM HistoricalDemand"
-    query_prod = "SELECT * FROM Product"
-    query_cat = "SELECT * FROM ProductCategory"
+    return read_product_data(db_path)
 
-    df_hist = pd.read_sql(query_hist, conn)
-    df_prod = pd.read_sql(query_prod, conn)
-    df_cat = pd.read_sql(query_cat, conn)
-    conn.close()
 
-    df_hist["Date"] = pd.to_datetime(df_hist["Date"])
+def query_forecasts(models, identifiers, table_suffix, last_date=None, periods=None,
+                    db_path="database/predictions.db"):
+    """
+    Lädt die Prognosen mehrerer Modelle für eine Zeitreihe mit einer einzigen Abfrage (Spalte 'Model'). Ohne
+    Forecast-Schema (siehe read_forecast_query) ist das Ergebnis leer.
+    """
+    query, params = build_forecast_query(models, make_series_key(table_suffix, identifiers), last_date, periods)
+    df_forecast = read_forecast_query(query, params, ["Model"] + FORECAST_VALUE_COLUMNS, db_path)
 
-    return df_hist, df_prod, df_cat
+    # Identifier-Spalten wie in den Rohdaten voranstellen (fehlende Identifier → None)
+    for i, (key, value) in enumerate(normalize_identifiers(identifiers).items()):
+        df_forecast.insert(i, key, value)
+    return df_forecast
 
 
 @st.cache_data
+@timed()
 def load_forecast_data(model, identifiers, table_suffix, last_date=None, periods=None,
                        db_path="database/predictions.db"):
-    table_map = create_table_map(table_suffix)
-
-    table = table_map.get(model)
-    if not table:
-        return pd.DataFrame()
-
-    where_clause = " AND ".join([f"{key} = :{key}" for key in identifiers.keys()])
-    query = f"SELECT * FROM {table} WHERE {where_clause}"
-
-    # encode identifiers for query (None→placeholder)
-    safe_ids = {k: v for k, (_, v) in encode_identifiers(identifiers).items()}
-
-    conn = sqlite3.connect(db_path)
-    df_forecast = pd.read_sql(query, conn, params=safe_ids)
-    conn.close()
+    df_forecast = query_forecasts([model], identifiers, table_suffix, last_date, periods, db_path)
 
-    if "ds" in df_forecast.columns:
-        df_forecast["ds"] = pd.to_datetime(df_forecast["ds"])
-
-    # placeholder → None
-    return trim_forecast_df(decode_placeholders(df_forecast, identifiers), last_date, periods)
+    return df_forecast.drop(columns="Model")
 
 
 def load_sales_forecast_data(model, store_id, dept_id, last_date=None, periods=None, db_path="database/predictions.db"):
@@ -82,23 +66,9 @@ def load_products_forecast_data(model, wh_code="__NONE__", prod_code="__NONE__",
 
 
 @st.cache_data
+@timed()
 def load_full_forecast_data(model, table_suffix, db_path="database/predictions.db"):
-    table_map = create_table_map(table_suffix)
-
-    table = table_map.get(model)
-    if not table:
-        return pd.DataFrame()
-
-    query = f"SELECT * FROM {table}"
-
-    conn = sqlite3.connect(db_path)
-    df_forecast = pd.read_sql(query, conn)
-    conn.close()
-
-    if "ds" in df_forecast.columns:
-        df_forecast["ds"] = pd.to_datetime(df_forecast["ds"])
-
-    return df_forecast
+    return read_full_forecast_data(model, table_suffix, db_path)
 
 
 def load_full_sales_forecast_data(model, db_path="database/predictions.db"):
@@ -110,28 +80,17 @@ def load_full_products_forecast_data(model, db_path="database/predictions.db"):
 
 
 @st.cache_data
+@timed()
 def load_multi_forecast_data(models, identifiers, table_suffix, last_date=None, periods=None,
                              db_path="database/predictions.db"):
-    table_map = create_table_map(table_suffix)
-
-    where_clause = " AND ".join([f"{key} = :{key}" for key in identifiers.keys()])
-    forecasts = {}
-
-    # encode identifiers for query (None→placeholder)
-    safe_ids = {k: v for k, (_, v) in encode_identifiers(identifiers).items()}
+    if not models:
+        return {}
 
-    conn = sqlite3.connect(db_path)
-    for model in models:
-        table = table_map.get(model)
-        if table:
-            query = f"SELECT * FROM {table} WHERE {where_clause}"
-            df = pd.read_sql(query, conn, params=safe_ids)
-            if "ds" in df.columns:
-                df["ds"] = pd.to_datetime(df["ds"])
-            forecasts[model] = trim_forecast_df(decode_placeholders(df, identifiers), last_date, periods)
-    conn.close()
+    df_all = query_forecasts(models, identifiers, table_suffix, last_date, periods, db_path)
 
-    return forecasts
+    # Aufteilen nach Modell in der angefragten Reihenfolge (nur Modelle mit gespeicherter Prognose)
+    grouped = {model: df.drop(columns="Model").reset_index(drop=True) for model, df in df_all.groupby("Model")}
+    return {model: grouped[model] for model in models if model in grouped}
 
 
 def load_multi_sales_forecast_data(models, store_id, last_date=None, periods=None, db_path="database/predictions.db"):
@@ -145,3 +104,50 @@ def load_multi_products_forecast_data(models, wh_code="__NONE__", prod_code="__N
     return load_multi_forecast_data(models,
                                     {"ProductCategory": cat_code, "ProductCode": prod_code, "WarehouseCode": wh_code},
                                     "_Products", last_date, periods, db_path)
+
+
+# Gespeicherte Läufe ändern sich nicht mehr; der Cache ist prozessweit (für alle Sitzungen) und begrenzt, damit
+# viele gleichzeitig betrachtete Läufe den Speicher nicht füllen
+MAX_CACHED_RUNS = 16
+MAX_CACHED_RUN_STORES = 64
+
+
+@st.cache_data(max_entries=MAX_CACHED_RUNS)
+@timed()
+def load_optimization_run_info(run_id, db_path="database/predictions.db"):
+    return read_optimization_run_info(run_id, db_path)
+
+
+@st.cache_data(max_entries=MAX_CACHED_RUN_STORES)
+@timed()
+def load_optimization_store(run_id, store_id, db_path="database/predictions.db"):
+    return read_optimization_store(run_id, store_id, db_path)
+
+
+@st.cache_data(max_entries=MAX_CACHED_RUNS)
+@timed()
+def load_optimization_capacity(run_id, db_path="database/predictions.db"):
+    return read_optimization_capacity(run_id, db_path)
+
+
+def load_data_profile(db_path="database/walmart.db", stats_db_path="database/predictions.db"):
+    # Der Fingerabdruck (Änderungszeit, Größe) ist Teil des Cache-Schlüssels → neue Daten, neue Übersicht
+    return load_data_profile_version(db_fingerprint(db_path), db_path, stats_db_path)
+
+
+@st.cache_data
+@timed()
+def load_data_profile_version(fingerprint, db_path="database/walmart.db", stats_db_path="database/predictions.db"):
+    return ensure_data_profile(db_path, stats_db_path, fingerprint)
+
+
+def load_weekly_sales_aggregates(stores, depts, start, end, db_path="database/walmart.db"):
+    # Schlüssel: Auswahl (als Tupel), Zeitraum und Datenstand → Rerun ohne neue Auswahl rechnet nichts neu
+    return load_weekly_sales_aggregates_version(tuple(stores), tuple(depts), pd.Timestamp(start), pd.Timestamp(end),
+                                                db_fingerprint(db_path), db_path)
+
+
+@st.cache_data
+@timed()
+def load_weekly_sales_aggregates_version(stores, depts, start, end, fingerprint, db_path="database/walmart.db"):
+    return compute_weekly_sales_aggregates(load_sales_enriched(db_path), list(stores), list(depts), start, end)
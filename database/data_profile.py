@@ -0,0 +1,107 @@
+# Vorberechnete Übersichtsstatistiken (Zeilen, Zeitraum, fehlende Werte, Datentypen, describe, Kopf) je Tabelle
+# der walmart.db. Gespeichert in predictions.db unter einem Fingerabdruck der Datenbankdatei, damit die
+# Datenübersicht nicht bei jedem Rerun neu rechnet und ein Re-Import automatisch neue Statistiken erzeugt.
+import json
+import os
+import sqlite3
+from datetime import datetime
+from io import StringIO
+
+import pandas as pd
+
+from database.connection import get_read_connection, write_connection
+from database.data_reader import read_data, read_product_data
+
+PROFILE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS DataProfile (
+    Fingerprint TEXT NOT NULL,
+    TableName   TEXT NOT NULL,
+    Position    INTEGER NOT NULL,
+    Profile     TEXT NOT NULL,
+    CreatedAt   TEXT NOT NULL,
+    PRIMARY KEY (Fingerprint, TableName)
+);
+"""
+
+
+def db_fingerprint(db_path="database/walmart.db"):
+    """Datenstand der Datei aus Änderungszeit und Größe (ändert sich bei jedem Re-Import)."""
+    stat = os.stat(db_path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def profile_frame(df, date_col=None, describe_columns=None, head_rows=5):
+    """Übersicht eines DataFrames; Tabellen (Datentypen, describe, Kopf) als JSON im 'split'-Format."""
+    rows, cols = df.shape
+    missing = int(df.isna().sum().sum())
+    describe = df[describe_columns] if describe_columns else df.select_dtypes("number")
+
+    profile = {
+        "rows": rows,
+        "columns": cols,
+        "missing": missing,
+        "missing_pct": missing / (rows * cols) * 100 if rows * cols else 0.0,
+        "date_min": None,
+        "date_max": None,
+        "dtypes": df.dtypes.astype(str).to_frame("Typ").to_json(orient="split"),
+        "describe": describe.describe().T.to_json(orient="split") if not describe.empty else None,
+        "head": df.head(head_rows).to_json(orient="split", date_format="iso"),
+    }
+    if date_col and date_col in df.columns and not df[date_col].dropna().empty:
+        profile["date_min"] = str(df[date_col].min().date())
+        profile["date_max"] = str(df[date_col].max().date())
+    return profile
+
+
+def build_data_profile(db_path="database/walmart.db"):
+    """Berechnet die Übersicht aller Tabellen der Datenübersicht (in Anzeigereihenfolge)."""
+    df_sales, df_features, df_stores = read_data(db_path)
+    df_demand, _, _ = read_product_data(db_path)
+    # Wie auf der Seite: OrderDemand numerisch, nicht lesbare Werte als 0
+    df_demand["OrderDemand"] = pd.to_numeric(df_demand["OrderDemand"], errors="coerce").fillna(0)
+
+    return {
+        "Store": profile_frame(df_stores),
+        "StoreFeature": profile_frame(df_features, "Date"),
+        "WeeklySales": profile_frame(df_sales, "Date", ["WeeklySales"]),
+        "HistoricalDemand": profile_frame(df_demand, "Date", ["OrderDemand"]),
+    }
+
+
+def save_data_profile(fingerprint, profiles, stats_db_path="database/predictions.db"):
+    """Speichert die Übersicht unter `fingerprint` und entfernt Übersichten älterer Datenstände."""
+    created_at = datetime.now().isoformat(timespec="seconds")
+    with write_connection(stats_db_path) as conn:
+        conn.executescript(PROFILE_SCHEMA)
+        conn.execute("DELETE FROM DataProfile WHERE Fingerprint != ?", (fingerprint,))
+        conn.executemany("INSERT OR REPLACE INTO DataProfile VALUES (?, ?, ?, ?, ?)",
+                         [(fingerprint, name, position, json.dumps(profile), created_at)
+                          for position, (name, profile) in enumerate(profiles.items())])
+
+
+def read_data_profile(fingerprint, stats_db_path="database/predictions.db"):
+    """Gespeicherte Übersicht zu `fingerprint` als {Tabelle: Profil} oder None."""
+    try:
+        conn = get_read_connection(stats_db_path)
+        rows = conn.execute("SELECT TableName, Profile FROM DataProfile WHERE Fingerprint = ? ORDER BY Position",
+                            (fingerprint,)).fetchall()
+    except sqlite3.Error:
+        return None
+    return {name: json.loads(profile) for name, profile in rows} or None
+
+
+def ensure_data_profile(db_path="database/walmart.db", stats_db_path="database/predictions.db", fingerprint=None):
+    """Liefert die Übersicht zum aktuellen Datenstand und berechnet sie nur, wenn sie noch nicht gespeichert ist."""
+    fingerprint = fingerprint or db_fingerprint(db_path)
+    profiles = read_data_profile(fingerprint, stats_db_path)
+    if profiles is None:
+        profiles = build_data_profile(db_path)
+        save_data_profile(fingerprint, profiles, stats_db_path)
+    return profiles
+
+
+def profile_table(profile, name):
+    """Eine der als JSON gespeicherten Tabellen ('dtypes', 'describe', 'head') als DataFrame."""
+    if profile.get(name) is None:
+        return pd.DataFrame()
+    return pd.read_json(StringIO(profile[name]), orient="split")
@@ -0,0 +1,153 @@
+# Ungecachte Lese-Funktionen ohne Streamlit-Abhängigkeit (z.B. für Batch-Läufe); data_loader cached diese
+import json
+import sqlite3
+
+import pandas as pd
+
+from database.connection import get_read_connection
+from database.forecast_schema import SERIES_KEYS, build_full_forecast_query
+from database.migrate_forecasts import ensure_forecast_database
+from database.sales_enriched import SALES_ENRICHED_SELECT, has_sales_enriched
+
+
+def read_data(db_path="database/walmart.db"):
+    conn = get_read_connection(db_path)
+
+    query_sales = "SELECT * FROM WeeklySales"
+    query_features = "SELECT * FROM StoreFeature"
+    query_stores = "SELECT * FROM Store"
+
+    df_sales = pd.read_sql(query_sales, conn)
+    df_features = pd.read_sql(query_features, conn)
+    df_stores = pd.read_sql(query_stores, conn)
+
+    df_sales["Date"] = pd.to_datetime(df_sales["Date"])
+    df_features["Date"] = pd.to_datetime(df_features["Date"])
+
+    return df_sales, df_features, df_stores
+
+
+def read_sales_enriched(db_path="database/walmart.db"):
+    """
+    WeeklySales mit Features, StoreType und StoreSize (Tabelle SalesEnriched). Datenbanken, die vor Einführung der
+    Tabelle importiert wurden, werden mit derselben Abfrage direkt in SQLite verknüpft.
+    """
+    conn = get_read_connection(db_path)
+    query = "SELECT * FROM SalesEnriched" if has_sales_enriched(conn) else SALES_ENRICHED_SELECT
+    return pd.read_sql(query, conn, parse_dates=["Date"])
+
+
+def read_product_data(db_path="database/walmart.db"):
+    conn = get_read_connection(db_path)
+
+    query_hist = "SELECT * FROM HistoricalDemand"
+    query_prod = "SELECT * FROM Product"
+    query_cat = "SELECT * FROM ProductCategory"
+
+    df_hist = pd.read_sql(query_hist, conn)
+    df_prod = pd.read_sql(query_prod, conn)
+    df_cat = pd.read_sql(query_cat, conn)
+
+    df_hist["Date"] = pd.to_datetime(df_hist["Date"])
+
+    return df_hist, df_prod, df_cat
+
+
+# Wertespalten einer gespeicherten Prognose (ohne Identifier und Modell)
+FORECAST_VALUE_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper", "is_future"]
+
+
+def read_forecast_query(query, params, columns, db_path="database/predictions.db"):
+    """
+    Führt eine Abfrage auf das Forecast-Schema aus. Beim ersten Zugriff des Prozesses wird das Schema angelegt und
+    alte Einzeltabellen werden übernommen (ensure_forecast_database). Fehlen Datei oder Tabellen trotzdem (z.B. bei
+    schreibgeschütztem Verzeichnis), gilt das als "keine Prognose": leerer DataFrame mit den Spalten `columns`.
+    """
+    try:
+        ensure_forecast_database(db_path)
+        conn = get_read_connection(db_path)
+        return pd.read_sql(query, conn, params=params, parse_dates=["ds"])
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        df_empty = pd.DataFrame(columns=columns)
+        df_empty["ds"] = pd.to_datetime(df_empty["ds"])
+        return df_empty
+
+
+def read_full_forecast_data(model, table_suffix, db_path="database/predictions.db"):
+    query, params = build_full_forecast_query(model, table_suffix)
+    return read_forecast_query(query, params, SERIES_KEYS[table_suffix] + FORECAST_VALUE_COLUMNS, db_path)
+
+
+def read_optimization_run(run_id, db_path="database/predictions.db"):
+    """
+    Lädt einen gespeicherten Optimierungslauf.
+
+    Returns
+    -------
+    (pd.DataFrame, list, dict)
+        Lösung, Status je Store/Dept als Liste von (Lösung des Paares, Status) wie bei der Optimierung selbst
+        und die Parameter des Laufs.
+    """
+    conn = get_read_connection(db_path)
+    params = json.loads(conn.execute("SELECT Params FROM OptimizationRun WHERE RunID = ?", (run_id,)).fetchone()[0])
+    df_solution = pd.read_sql("SELECT * FROM OptimizationResult WHERE RunID = ?", conn, params=(run_id,))
+    df_status = pd.read_sql("SELECT StoreID, DeptID, Status FROM OptimizationStatus WHERE RunID = ?", conn,
+                            params=(run_id,))
+
+    df_solution = df_solution.drop(columns="RunID")
+    pairs = dict(iter(df_solution.groupby(["StoreID", "DeptID"])))
+    status = [(pairs[(row.StoreID, row.DeptID)], row.Status) for row in df_status.itertuples(index=False)
+              if (row.StoreID, row.DeptID) in pairs]
+    return df_solution, status, params
+
+
+def read_optimization_run_info(run_id, db_path="database/predictions.db"):
+    """
+    Parameter und Solver-Status je Store/Dept eines gespeicherten Laufs, ohne die (große) Lösung selbst.
+
+    Returns
+    -------
+    (dict, pd.DataFrame) oder None
+        Parameter und Status (StoreID, DeptID, Status); None, wenn der Lauf nicht (mehr) existiert.
+    """
+    conn = get_read_connection(db_path)
+    row = conn.execute("SELECT Params FROM OptimizationRun WHERE RunID = ?", (run_id,)).fetchone()
+    if row is None:
+        return None
+    df_status = pd.read_sql("SELECT StoreID, DeptID, Status FROM OptimizationStatus WHERE RunID = ? "
+                            "ORDER BY StoreID, DeptID", conn, params=(run_id,))
+    return json.loads(row[0]), df_status
+
+
+def read_optimization_store(run_id, store_id, db_path="database/predictions.db"):
+    """Lösung eines gespeicherten Laufs für einen Store."""
+    conn = get_read_connection(db_path)
+    df_solution = pd.read_sql("SELECT * FROM OptimizationResult WHERE RunID = ? AND StoreID = ?", conn,
+                              params=(run_id, int(store_id)))
+    return df_solution.drop(columns="RunID")
+
+
+def read_optimization_capacity(run_id, db_path="database/predictions.db"):
+    """Promo-Kosten gesamt und höchste Anzahl Promotionen in einer Woche über alle Stores eines Laufs."""
+    conn = get_read_connection(db_path)
+    promoted = "RunID = ? AND ROUND(COALESCE(Promotion, 0)) = 1"
+    spend = conn.execute(f"SELECT COALESCE(SUM(PromoCost), 0) FROM OptimizationResult WHERE {promoted}",
+                         (run_id,)).fetchone()[0]
+    max_per_week = conn.execute(f"""
+        SELECT COALESCE(MAX(n), 0)
+        FROM (SELECT COUNT(*) AS n FROM OptimizationResult WHERE {promoted} GROUP BY Year, Week)
+    """, (run_id,)).fetchone()[0]
+    return spend, max_per_week
+
+
+def read_solve_times(db_path="database/predictions.db"):
+    """
+    Zuletzt gemessene Solver-Laufzeiten je Store/Dept als {(StoreID, DeptID): (Wochen, Sekunden)}.
+    Ohne bisherige Messungen (Tabelle fehlt) wird ein leeres dict zurückgegeben.
+    """
+    try:
+        conn = get_read_connection(db_path)
+        rows = conn.execute("SELECT StoreID, DeptID, Weeks, Seconds FROM OptimizationSolveTime").fetchall()
+    except sqlite3.Error:
+        return {}
+    return {(store_id, dept_id): (weeks, seconds) for store_id, dept_id, weeks, seconds in rows}
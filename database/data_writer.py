@@ -1,11 +1,27 @@
-import sqlite3
+import json
+import uuid
+from datetime import datetime, timedelta
 
 import pandas as pd
 
-from database.data_utils import encode_identifiers
+from database.connection import write_connection
+from database.forecast_schema import ensure_forecast_schema, get_model_id, get_series_id
+from database.migrate_forecasts import ensure_forecast_database
+from logic.analysis.timing import series_label, span
 
+# Aufbewahrung gespeicherter Optimierungsläufe: höchstens so viele Läufe und nicht älter als angegeben (None = ohne
+# Grenze). Ältere Läufe werden beim Speichern eines neuen Laufs gelöscht.
+MAX_OPTIMIZATION_RUNS = 50
+OPTIMIZATION_RUN_MAX_AGE = timedelta(days=30)
 
-def save_prophet_forecast(forecast, identifiers, table_suffix, db_path="database/predictions.db"):
+
+def save_forecast(forecast, identifiers, model, table_suffix, db_path="database/predictions.db", history_end=None,
+                  future_only=False):
+    """
+    Speichert eine Prognose (ds, yhat, yhat_lower, yhat_upper) eines beliebigen Modells für eine Zeitreihe.
+    Modelle wie Prophet liefern auch die In-Sample-Werte der Historie; mit `future_only` werden nur Werte nach
+    `history_end` gespeichert.
+    """
     # Nur relevante Spalten extrahieren
     columns_to_save = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
     if not all(col in forecast.columns for col in columns_to_save):
@@ -14,138 +30,126 @@ def save_prophet_forecast(forecast, identifiers, table_suffix, db_path="database
     # Prognose vorbereiten
     df = forecast[columns_to_save].copy()
 
-    # Identifier-Spalten hinzufügen
-    for key, value in identifiers.items():
-        df[key] = value
-
-    # Schreiben
-    write_forecast(df, identifiers, f"ProphetForecast{table_suffix}", db_path)
-    return df
-
-
-def save_sales_prophet_forecast(forecast, store_id, dept_id, db_path="database/predictions.db"):
-    return save_prophet_forecast(forecast, {"StoreID": store_id, "DeptID": dept_id},
-                                 "_Sales", db_path)
-
-
-def save_products_prophet_forecast(forecast, wh_code="__NONE__", prod_code="__NONE__", cat_code="__NONE__",
-                                   db_path="database/predictions.db"):
-    return save_prophet_forecast(forecast,
-                                 {"ProductCategory": cat_code, "ProductCode": prod_code, "WarehouseCode": wh_code},
-                                 "_Products", db_path)
-
-
-def save_arima_forecast(predictions, dates, identifiers, table_suffix, db_path="database/predictions.db",
-                        conf_int=None):
-    if len(predictions) != len(dates):
-        raise ValueError("Länge von predictions und dates muss übereinstimmen.")
-
-    # Basis-Vorhersagedaten
-    df = pd.DataFrame({
-        "ds": pd.to_datetime(dates),
-        "yhat": predictions
-    })
-
-    if conf_int is not None:
-        df["yhat_lower"] = conf_int[:, 0]
-        df["yhat_upper"] = conf_int[:, 1]
-    else:
-        df["yhat_lower"] = None
-        df["yhat_upper"] = None
-
-    # Identifier-Spalten hinzufügen
-    for key, value in identifiers.items():
-        df[key] = value
-
-    # An zentrale Schreibfunktion übergeben
-    write_forecast(df, identifiers, f"ArimaForecast{table_suffix}", db_path)
-    return df
-
-
-def save_sales_arima_forecast(predictions, dates, store_id, dept_id, db_path="database/predictions.db", conf_int=None):
-    return save_arima_forecast(predictions, dates, {"StoreID": store_id, "DeptID": dept_id},
-                               "_Sales", db_path, conf_int)
-
-
-def save_products_arima_forecast(predictions, dates, wh_code="__NONE__", prod_code="__NONE__", cat_code="__NONE__",
-                                 db_path="database/predictions.db", conf_int=None):
-    return save_arima_forecast(predictions, dates,
-                               {"ProductCategory": cat_code, "ProductCode": prod_code, "WarehouseCode": wh_code},
-                               "_Products", db_path, conf_int)
-
-
-def save_hw_forecast(predictions, dates, identifiers, table_suffix, db_path="database/predictions.db"):
-    if len(predictions) != len(dates):
-        raise ValueError("Anzahl der Vorhersagen und Zeitstempel muss übereinstimmen.")
-
-    # Basis-Vorhersagedaten
-    df = pd.DataFrame({
-        "ds": pd.to_datetime(dates),
-        "yhat": predictions,
-        "yhat_lower": None,
-        "yhat_upper": None
-    })
+    if future_only and history_end is not None:
+        df = df[pd.to_datetime(df["ds"]) > pd.to_datetime(history_end)].copy()
 
     # Identifier-Spalten hinzufügen (z.B. StoreID, DeptID, ProductCode etc.)
     for key, value in identifiers.items():
         df[key] = value
 
-    # An zentrale Schreibfunktion übergeben
-    write_forecast(df, identifiers, f"HoltWintersForecast{table_suffix}", db_path)
+    # Schreiben
+    write_forecast(df, identifiers, model, table_suffix, db_path, history_end)
     return df
 
 
-def save_sales_hw_forecast(predictions, dates, store_id, dept_id, db_path="database/predictions.db"):
-    return save_hw_forecast(predictions, dates, {"StoreID": store_id, "DeptID": dept_id},
-                            "_Sales", db_path)
-
-
-def save_products_hw_forecast(predictions, dates, wh_code="__NONE__", prod_code="__NONE__", cat_code="__NONE__",
-                              db_path="database/predictions.db"):
-    return save_hw_forecast(predictions, dates,
-                            {"ProductCategory": cat_code, "ProductCode": prod_code, "WarehouseCode": wh_code},
-                            "_Products", db_path)
-
-
-def write_forecast(df, identifiers, table_name, db_path="database/predictions.db"):
-    df['ds'] = df['ds'].dt.strftime('%Y-%m-%d')
-
-    # Schritt 1: Typen ableiten und Platzhalter einsetzen
-    safe_identifiers = encode_identifiers(identifiers)
-
-    # Schritt 2: Tabellenschema definieren
-    col_defs = [f"{key} {dtype}" for key, (dtype, _) in safe_identifiers.items()]
-    col_defs += [
-        "ds TEXT",
-        "yhat REAL",
-        "yhat_lower REAL",
-        "yhat_upper REAL"
-    ]
-
-    # Schritt 3: Primärschlüssel definieren
-    pk_string = ", ".join(list(safe_identifiers.keys()) + ["ds"])
-
-    # Schritt 4: Schreibparameter vorbereiten
-    columns = list(safe_identifiers.keys()) + ["ds", "yhat", "yhat_lower", "yhat_upper"]
-    col_string = ", ".join(columns)
-    placeholders = ", ".join("?" for _ in columns)
-    update_string = ", ".join(f"{col} = excluded.{col}" for col in ["yhat", "yhat_lower", "yhat_upper"])
-
-    # Schritt 5: Identifier-Spalten zum DataFrame hinzufügen
-    for key, (_, value) in safe_identifiers.items():
-        df[key] = value
-
-    # Schritt 6: In die Datenbank schreiben
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                {', '.join(col_defs)},
-                PRIMARY KEY ({pk_string})
+def write_forecast(df, identifiers, model, table_suffix, db_path="database/predictions.db", history_end=None):
+    """
+    Schreibt eine Prognose per Upsert in die gemeinsame Forecast-Tabelle.
+
+    Modell und Zeitreihe werden über die Dimensionstabellen ForecastModel und Series auf Integer-Schlüssel
+    abgebildet. Jede Zeile wird mit `is_future` markiert (ds > history_end). Ohne `history_end` gelten alle
+    Zeilen als Zukunftswerte.
+    """
+    with span("write_forecast", f"{model}: {series_label(identifiers)}"):
+        df['ds'] = pd.to_datetime(df['ds'])
+        if history_end is None:
+            df['is_future'] = 1
+        else:
+            df['is_future'] = (df['ds'] > pd.to_datetime(history_end)).astype(int)
+        df['ds'] = df['ds'].dt.strftime('%Y-%m-%d')
+
+        value_columns = ["ds", "yhat", "yhat_lower", "yhat_upper", "is_future"]
+        update_string = ", ".join(f"{col} = excluded.{col}" for col in value_columns[1:])
+
+        # Alte Einzeltabellen vor dem ersten Schreiben übernehmen, sonst legt ensure_forecast_schema das Schema
+        # an und sie würden nicht mehr migriert
+        ensure_forecast_database(db_path)
+        with write_connection(db_path) as conn:
+            ensure_forecast_schema(conn)
+            model_id = get_model_id(conn, model)
+            series_id = get_series_id(conn, table_suffix, identifiers)
+
+            rows = ((model_id, series_id, *values) for values in df[value_columns].itertuples(index=False, name=None))
+            conn.executemany(f"""
+                INSERT INTO Forecast (ModelID, SeriesID, {", ".join(value_columns)})
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(ModelID, SeriesID, ds) DO UPDATE SET {update_string}
+            """, rows)
+
+
+def save_optimization_run(df_solution, results, params, source="batch", db_path="database/predictions.db",
+                          max_runs=MAX_OPTIMIZATION_RUNS, max_age=OPTIMIZATION_RUN_MAX_AGE):
+    """
+    Speichert eine Optimierung unter einer neuen RunID: Parameter (OptimizationRun), Lösung je Woche
+    (OptimizationResult) und Solver-Status je Store/Dept (OptimizationStatus). Anschließend werden Läufe außerhalb
+    der Aufbewahrung (`max_runs`, `max_age`) gelöscht.
+
+    Returns
+    -------
+    str
+        Die vergebene RunID.
+    """
+    created_at = datetime.now()
+    run_id = f"{created_at:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+    df_status = pd.DataFrame([
+        {"StoreID": df["StoreID"].iloc[0], "DeptID": df["DeptID"].iloc[0], "Status": str(status)}
+        for df, status in results if not df.empty
+    ])
+
+    with write_connection(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS OptimizationRun (
+                RunID     TEXT PRIMARY KEY,
+                CreatedAt TEXT NOT NULL,
+                Source    TEXT NOT NULL,
+                Params    TEXT
+            )
+        """)
+        conn.execute("INSERT INTO OptimizationRun (RunID, CreatedAt, Source, Params) VALUES (?, ?, ?, ?)",
+                     (run_id, created_at.isoformat(timespec="seconds"), source, json.dumps(params, default=str)))
+        df_solution.assign(RunID=run_id).to_sql("OptimizationResult", conn, if_exists="append", index=False)
+        df_status.assign(RunID=run_id).to_sql("OptimizationStatus", conn, if_exists="append", index=False)
+        # Ergebnisse werden je Lauf und Store nachgeladen
+        if "StoreID" in df_solution.columns:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_optresult_run_store ON OptimizationResult(RunID, StoreID)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_optstatus_run ON OptimizationStatus(RunID)")
+        prune_optimization_runs(conn, max_runs, max_age, now=created_at)
+
+    return run_id
+
+
+def prune_optimization_runs(conn, max_runs=MAX_OPTIMIZATION_RUNS, max_age=OPTIMIZATION_RUN_MAX_AGE, now=None):
+    """Löscht Läufe jenseits der `max_runs` neuesten bzw. älter als `max_age` samt Lösung und Status."""
+    expired = set()
+    if max_runs is not None:
+        expired.update(row[0] for row in conn.execute(
+            "SELECT RunID FROM OptimizationRun ORDER BY CreatedAt DESC, rowid DESC LIMIT -1 OFFSET ?", (max_runs,)))
+    if max_age is not None:
+        cutoff = ((now or datetime.now()) - max_age).isoformat(timespec="seconds")
+        expired.update(row[0] for row in conn.execute("SELECT RunID FROM OptimizationRun WHERE CreatedAt < ?",
+                                                      (cutoff,)))
+    for table in ("OptimizationResult", "OptimizationStatus", "OptimizationRun"):
+        conn.executemany(f"DELETE FROM {table} WHERE RunID = ?", [(run_id,) for run_id in expired])
+    return len(expired)
+
+
+def save_solve_times(solve_times, db_path="database/predictions.db"):
+    """
+    Speichert die gemessenen Solver-Laufzeiten einer Optimierung als Schätzgrundlage für den nächsten Lauf.
+    `solve_times` ist eine Liste von (StoreID, DeptID, Wochen, Sekunden); pro Paar bleibt nur die letzte Messung.
+    """
+    recorded_at = datetime.now().isoformat(timespec="seconds")
+    with write_connection(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS OptimizationSolveTime (
+                StoreID    INTEGER NOT NULL,
+                DeptID     INTEGER NOT NULL,
+                Weeks      INTEGER NOT NULL,
+                Seconds    REAL NOT NULL,
+                RecordedAt TEXT NOT NULL,
+                PRIMARY KEY (StoreID, DeptID)
             )
         """)
-        insert_sql = f"""
-            INSERT INTO {table_name} ({col_string})
-            VALUES ({placeholders})
-            ON CONFLICT({pk_string}) DO UPDATE SET {update_string}
-        """
-        conn.executemany(insert_sql, df[columns].itertuples(index=False, name=None))
+        conn.executemany("INSERT OR REPLACE INTO OptimizationSolveTime VALUES (?, ?, ?, ?, ?)",
+                         [(int(s), int(d), int(w), float(sec), recorded_at) for s, d, w, sec in solve_times])
@@ -0,0 +1,160 @@
+import pandas as pd
+
+# Platzhalter der alten Einzeltabellen für fehlende TEXT-Identifier
+NONE_PLACEHOLDER = "__NONE__"
+
+# Identifier-Spalten je Zeitreihenart (Tabellensuffix → Spalten)
+SERIES_KEYS = {
+    "_Sales": ["StoreID", "DeptID"],
+    "_Products": ["ProductCategory", "ProductCode", "WarehouseCode"],
+}
+
+# Alle Identifier-Spalten der Series-Dimension mit ihrem SQLite-Typ
+SERIES_COLUMNS = {
+    "StoreID": "INTEGER",
+    "DeptID": "INTEGER",
+    "ProductCategory": "TEXT",
+    "ProductCode": "TEXT",
+    "WarehouseCode": "TEXT",
+}
+
+FORECAST_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS ForecastModel (
+    ModelID   INTEGER PRIMARY KEY,
+    Name      TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS Series (
+    SeriesID  INTEGER PRIMARY KEY,
+    Kind      TEXT NOT NULL,
+    SeriesKey TEXT NOT NULL UNIQUE,
+    {", ".join(f"{col} {dtype}" for col, dtype in SERIES_COLUMNS.items())}
+);
+
+CREATE TABLE IF NOT EXISTS Forecast (
+    ModelID    INTEGER NOT NULL REFERENCES ForecastModel(ModelID),
+    SeriesID   INTEGER NOT NULL REFERENCES Series(SeriesID),
+    ds         TEXT    NOT NULL,
+    yhat       REAL,
+    yhat_lower REAL,
+    yhat_upper REAL,
+    is_future  INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (ModelID, SeriesID, ds)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_series_kind_store ON Series(Kind, StoreID, DeptID);
+CREATE INDEX IF NOT EXISTS idx_forecast_series   ON Forecast(SeriesID, ModelID, is_future, ds);
+"""
+
+
+def series_kind(table_suffix):
+    """'_Sales' → 'Sales', '_Products' → 'Products'."""
+    return table_suffix.lstrip("_")
+
+
+def normalize_identifiers(identifiers):
+    """
+    Bringt Identifier in eine kanonische Form:
+    - Platzhalter '__NONE__' → None,
+    - INTEGER-Spalten (z.B. numpy.int64) → int.
+    """
+    normalized = {}
+    for key, value in identifiers.items():
+        if value is None or value == NONE_PLACEHOLDER or (not isinstance(value, str) and pd.isna(value)):
+            normalized[key] = None
+        elif SERIES_COLUMNS.get(key) == "INTEGER":
+            normalized[key] = int(value)
+        else:
+            normalized[key] = str(value)
+    return normalized
+
+
+def make_series_key(table_suffix, identifiers):
+    """Eindeutiger Schlüssel einer Zeitreihe, z.B. 'Sales|DeptID=-1|StoreID=1'."""
+    normalized = normalize_identifiers(identifiers)
+    parts = [f"{key}={'' if normalized[key] is None else normalized[key]}" for key in sorted(normalized)]
+    return "|".join([series_kind(table_suffix)] + parts)
+
+
+def ensure_forecast_schema(conn):
+    conn.executescript(FORECAST_SCHEMA)
+
+
+def get_model_id(conn, model):
+    conn.execute("INSERT OR IGNORE INTO ForecastModel (Name) VALUES (?)", (model,))
+    return conn.execute("SELECT ModelID FROM ForecastModel WHERE Name = ?", (model,)).fetchone()[0]
+
+
+def get_series_id(conn, table_suffix, identifiers):
+    normalized = normalize_identifiers(identifiers)
+    series_key = make_series_key(table_suffix, normalized)
+
+    columns = ["Kind", "SeriesKey"] + list(normalized.keys())
+    conn.execute(
+        f"INSERT OR IGNORE INTO Series ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [series_kind(table_suffix), series_key] + list(normalized.values())
+    )
+    return conn.execute("SELECT SeriesID FROM Series WHERE SeriesKey = ?", (series_key,)).fetchone()[0]
+
+
+def build_forecast_query(models, series_key, last_date=None, periods=None):
+    """
+    Erzeugt eine einzige Abfrage über alle `models` für eine Zeitreihe.
+
+    Ohne `periods` werden alle Zeilen geladen. Andernfalls werden je Modell
+    - alle Zeilen mit ds <= last_date (bzw. is_future = 0, falls last_date fehlt) UND
+    - von den übrigen Zeilen nur die ersten `periods`
+    zurückgegeben, sortiert nach Modell und 'ds'.
+
+    Returns
+    -------
+    (str, dict)
+        Query-String und benannte Parameter.
+    """
+    params = {"series_key": series_key}
+    model_params = []
+    for i, model in enumerate(models):
+        params[f"model_{i}"] = model
+        model_params.append(f":model_{i}")
+
+    if last_date is None:
+        future_cond = "f.is_future = 1"
+    else:
+        future_cond = "f.ds > :last_date"
+        params["last_date"] = pd.to_datetime(last_date).strftime("%Y-%m-%d")
+
+    period_cond = ""
+    if periods is not None:
+        period_cond = "WHERE NOT sel.in_future OR sel.rn <= :periods"
+        params["periods"] = int(periods)
+
+    query = f"""
+        WITH sel AS (
+            SELECT f.ModelID, f.ds, f.yhat, f.yhat_lower, f.yhat_upper, f.is_future,
+                   ({future_cond}) AS in_future,
+                   ROW_NUMBER() OVER (PARTITION BY f.ModelID, ({future_cond}) ORDER BY f.ds) AS rn
+            FROM Forecast f
+            WHERE f.SeriesID = (SELECT SeriesID FROM Series WHERE SeriesKey = :series_key)
+              AND f.ModelID IN (SELECT ModelID FROM ForecastModel WHERE Name IN ({", ".join(model_params)}))
+        )
+        SELECT m.Name AS Model, sel.ds, sel.yhat, sel.yhat_lower, sel.yhat_upper, sel.is_future
+        FROM sel
+        JOIN ForecastModel m ON m.ModelID = sel.ModelID
+        {period_cond}
+        ORDER BY m.Name, sel.ds
+    """
+    return query, params
+
+
+def build_full_forecast_query(model, table_suffix):
+    """Abfrage aller Zeitreihen einer Art für ein Modell (Bereichsscan über den Primärschlüssel)."""
+    id_cols = ", ".join(f"s.{col}" for col in SERIES_KEYS[table_suffix])
+    query = f"""
+        SELECT {id_cols}, f.ds, f.yhat, f.yhat_lower, f.yhat_upper, f.is_future
+        FROM Forecast f
+        JOIN Series s ON s.SeriesID = f.SeriesID
+        WHERE f.ModelID = (SELECT ModelID FROM ForecastModel WHERE Name = :model)
+          AND s.Kind = :kind
+        ORDER BY f.SeriesID, f.ds
+    """
+    return query, {"model": model, "kind": series_kind(table_suffix)}
@@ -3,6 +3,8 @@ from pathlib import Path
 
 import pandas as pd
 
+from database.sales_enriched import create_sales_enriched
+
 
 def drop():
     Path("database/walmart.db").unlink(missing_ok=True)
@@ -188,6 +190,9 @@ def do_import():
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_cat     ON Product(CategoryID);")
     conn.commit()
 
+    # 6.1) Vorab verknüpfte Sicht WeeklySales + StoreFeature + Store (nutzt die Indexe oben)
+    create_sales_enriched(conn)
+
     # ----------------------------------------
     # 7) Verbindung schließen
     # ----------------------------------------
@@ -197,6 +202,7 @@ def do_import():
     print("  • Store (mit optionaler Spalte WarehouseCode)")
     print("  • StoreFeature")
     print("  • WeeklySales")
+    print("  • SalesEnriched (WeeklySales mit Features und Store-Daten)")
     print("  • HistoricalDemand")
     print("  • ProductCategory")
     print("  • Product")
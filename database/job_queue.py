@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from database.connection import get_read_connection, write_connection
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Job (
+    JobID      TEXT PRIMARY KEY,
+    Kind       TEXT NOT NULL,
+    ParamsHash TEXT NOT NULL,
+    Params     TEXT NOT NULL,
+    Status     TEXT NOT NULL DEFAULT 'queued',
+    Progress   REAL NOT NULL DEFAULT 0,
+    Message    TEXT,
+    Result     TEXT,
+    Error      TEXT,
+    WorkerPID  INTEGER,
+    Attempts   INTEGER NOT NULL DEFAULT 0,
+    CreatedAt  TEXT NOT NULL,
+    StartedAt  TEXT,
+    FinishedAt TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_status ON Job(Status, CreatedAt);
+CREATE INDEX IF NOT EXISTS idx_job_hash   ON Job(ParamsHash, Status);
+
+CREATE TABLE IF NOT EXISTS JobWorker (
+    PID       INTEGER PRIMARY KEY,
+    Heartbeat TEXT NOT NULL
+);
+"""
+
+# Aktive Zustände: ein weiterer Auftrag mit denselben Parametern wird nicht erneut eingereiht
+ACTIVE_STATES = ("queued", "running")
+
+# Ohne Heartbeat innerhalb dieser Zeit gilt ein Worker als beendet
+WORKER_TIMEOUT = timedelta(seconds=60)
+
+# Ein Auftrag, dessen Worker so oft abgestürzt ist, wird nicht erneut eingereiht, sondern als fehlgeschlagen markiert
+MAX_JOB_ATTEMPTS = 3
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def params_hash(kind, params):
+    """Stabiler Hash über Art und Parameter eines Auftrags (Schlüsselreihenfolge egal)."""
+    canonical = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _create_job_schema(conn):
+    conn.executescript(JOB_SCHEMA)
+    # Ältere Job-Tabellen ohne Versuchszähler ergänzen
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(Job)")}
+    if "Attempts" not in columns:
+        conn.execute("ALTER TABLE Job ADD COLUMN Attempts INTEGER NOT NULL DEFAULT 0")
+
+
+def ensure_job_schema(db_path="database/predictions.db"):
+    with write_connection(db_path) as conn:
+        _create_job_schema(conn)
+
+
+def enqueue_job(kind, params, db_path="database/predictions.db"):
+    """
+    Reiht einen Auftrag ein und gibt seine JobID zurück. Läuft bereits ein Auftrag mit denselben Parametern
+    oder wartet noch, wird dessen JobID zurückgegeben.
+    """
+    digest = params_hash(kind, params)
+    with write_connection(db_path) as conn:
+        _create_job_schema(conn)
+        row = conn.execute(f"""
+            SELECT JobID FROM Job
+            WHERE ParamsHash = ? AND Status IN ({", ".join("?" for _ in ACTIVE_STATES)})
+            ORDER BY CreatedAt LIMIT 1
+        """, (digest, *ACTIVE_STATES)).fetchone()
+        if row is not None:
+            return row[0]
+
+        job_id = uuid.uuid4().hex[:12]
+        conn.execute("INSERT INTO Job (JobID, Kind, ParamsHash, Params, CreatedAt) VALUES (?, ?, ?, ?, ?)",
+                     (job_id, kind, digest, json.dumps(params, default=str), _now()))
+    return job_id
+
+
+def claim_job(db_path="database/predictions.db"):
+    """Übernimmt den ältesten wartenden Auftrag atomar für diesen Prozess (oder None) und zählt den Versuch."""
+    with write_connection(db_path) as conn:
+        row = conn.execute("""
+            UPDATE Job SET Status = 'running', StartedAt = ?, WorkerPID = ?, Message = 'Gestartet',
+                           Attempts = Attempts + 1
+            WHERE JobID = (SELECT JobID FROM Job WHERE Status = 'queued' ORDER BY CreatedAt LIMIT 1)
+            RETURNING JobID, Kind, Params
+        """, (_now(), os.getpid())).fetchone()
+
+    if row is None:
+        return None
+    return {"JobID": row[0], "Kind": row[1], "Params": json.loads(row[2])}
+
+
+def update_job_progress(job_id, progress, message=None, db_path="database/predictions.db"):
+    with write_connection(db_path) as conn:
+        conn.execute("UPDATE Job SET Progress = ?, Message = ? WHERE JobID = ?", (float(progress), message, job_id))
+
+
+def finish_job(job_id, result=None, error=None, db_path="database/predictions.db"):
+    status = "error" if error else "done"
+    with write_connection(db_path) as conn:
+        conn.execute("""
+            UPDATE Job SET Status = ?, Progress = CASE WHEN ? = 'done' THEN 1 ELSE Progress END,
+                           Result = ?, Error = ?, FinishedAt = ?
+            WHERE JobID = ?
+        """, (status, status, json.dumps(result, default=str) if result is not None else None, error, _now(),
+              job_id))
+
+
+def heartbeat(db_path="database/predictions.db"):
+    """Meldet den aktuellen Worker-Prozess als lebendig."""
+    with write_connection(db_path) as conn:
+        conn.execute("INSERT INTO JobWorker (PID, Heartbeat) VALUES (?, ?) "
+                     "ON CONFLICT(PID) DO UPDATE SET Heartbeat = excluded.Heartbeat", (os.getpid(), _now()))
+
+
+def unregister_worker(db_path="database/predictions.db"):
+    with write_connection(db_path) as conn:
+        conn.execute("DELETE FROM JobWorker WHERE PID = ?", (os.getpid(),))
+
+
+def requeue_stale_jobs(db_path="database/predictions.db", max_attempts=MAX_JOB_ATTEMPTS):
+    """
+    Setzt laufende Aufträge von Workern ohne aktuellen Heartbeat (z.B. abgestürzt) wieder auf 'queued'
+    und entfernt deren Einträge. Aufträge, die bereits `max_attempts`-mal gestartet wurden, werden stattdessen als
+    fehlgeschlagen ('error') beendet, damit ein Auftrag, der seinen Worker zum Absturz bringt, nicht endlos neu
+    gestartet wird. Gibt die Anzahl der neu eingereihten Aufträge zurück.
+    """
+    cutoff = (datetime.now() - WORKER_TIMEOUT).isoformat(timespec="seconds")
+    with write_connection(db_path) as conn:
+        conn.execute("DELETE FROM JobWorker WHERE Heartbeat < ?", (cutoff,))
+        conn.execute("""
+            UPDATE Job SET Status = 'error', WorkerPID = NULL, Message = 'Abgebrochen',
+                           Error = 'Worker nach ' || Attempts || ' Versuchen ohne Rückmeldung beendet', FinishedAt = ?
+            WHERE Status = 'running' AND WorkerPID NOT IN (SELECT PID FROM JobWorker) AND Attempts >= ?
+        """, (_now(), max_attempts))
+        cursor = conn.execute("""
+            UPDATE Job SET Status = 'queued', WorkerPID = NULL, Message = 'Erneut eingereiht'
+            WHERE Status = 'running' AND WorkerPID NOT IN (SELECT PID FROM JobWorker)
+        """)
+        return cursor.rowcount
+
+
+def count_live_workers(db_path="database/predictions.db"):
+    cutoff = (datetime.now() - WORKER_TIMEOUT).isoformat(timespec="seconds")
+    try:
+        conn = get_read_connection(db_path)
+        return conn.execute("SELECT COUNT(*) FROM JobWorker WHERE Heartbeat >= ?", (cutoff,)).fetchone()[0]
+    except sqlite3.Error:
+        # Datenbank oder Tabelle existiert noch nicht → keine Worker
+        return 0
+
+
+def get_job(job_id, db_path="database/predictions.db"):
+    """Aktueller Stand eines Auftrags als dict (Params und Result bereits dekodiert) oder None."""
+    try:
+        conn = get_read_connection(db_path)
+        df = pd.read_sql("SELECT * FROM Job WHERE JobID = ?", conn, params=(job_id,))
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return None
+    if df.empty:
+        return None
+
+    job = df.iloc[0].to_dict()
+    job["Params"] = json.loads(job["Params"])
+    job["Result"] = json.loads(job["Result"]) if job["Result"] else None
+    return job
+
+
+def load_jobs(limit=20, db_path="database/predictions.db"):
+    """Die letzten `limit` Aufträge für eine Übersicht."""
+    try:
+        conn = get_read_connection(db_path)
+        return pd.read_sql("""
+            SELECT JobID, Kind, Status, Progress, Message, CreatedAt, StartedAt, FinishedAt, Error
+            FROM Job ORDER BY CreatedAt DESC LIMIT ?
+        """, conn, params=(limit,))
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return pd.DataFrame()
@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from database.connection import get_read_connection, write_connection
+
+SPAN_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Span (
+    SpanID     TEXT PRIMARY KEY,
+    ParentID   TEXT,
+    RootID     TEXT NOT NULL,
+    Name       TEXT NOT NULL,
+    Detail     TEXT,
+    StartedAt  TEXT NOT NULL,
+    DurationMs REAL NOT NULL,
+    PID        INTEGER NOT NULL,
+    Status     TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_span_started ON Span(StartedAt);
+CREATE INDEX IF NOT EXISTS idx_span_root    ON Span(RootID);
+"""
+
+SPAN_COLUMNS = ["SpanID", "ParentID", "RootID", "Name", "Detail", "StartedAt", "DurationMs", "PID", "Status"]
+
+# Messungen älter als diese Zeitspanne werden von prune_spans gelöscht
+SPAN_MAX_AGE = timedelta(days=14)
+
+
+def write_spans(spans, db_path="database/metrics.db"):
+    """Speichert abgeschlossene Spans (Tupel in der Reihenfolge von SPAN_COLUMNS) in einem Schreibvorgang."""
+    with write_connection(db_path) as conn:
+        conn.executescript(SPAN_SCHEMA)
+        conn.executemany(f"INSERT OR REPLACE INTO Span ({', '.join(SPAN_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' for _ in SPAN_COLUMNS)})", spans)
+
+
+def prune_spans(db_path="database/metrics.db", max_age=SPAN_MAX_AGE):
+    """Löscht Messungen, die älter als `max_age` sind."""
+    cutoff = (datetime.now() - max_age).isoformat(timespec="milliseconds")
+    with write_connection(db_path) as conn:
+        conn.executescript(SPAN_SCHEMA)
+        conn.execute("DELETE FROM Span WHERE StartedAt < ?", (cutoff,))
+
+
+def read_spans(since=None, db_path="database/metrics.db"):
+    """
+    Alle Spans (optional nur ab `since`) als DataFrame. Ohne bisherige Messungen (Datenbank oder Tabelle fehlt)
+    wird ein leerer DataFrame zurückgegeben.
+    """
+    query = f"SELECT {', '.join(SPAN_COLUMNS)} FROM Span"
+    params = ()
+    if since is not None:
+        query += " WHERE StartedAt >= ?"
+        params = (pd.Timestamp(since).isoformat(timespec="milliseconds"),)
+
+    try:
+        conn = get_read_connection(db_path)
+        return pd.read_sql(query, conn, params=params, parse_dates=["StartedAt"])
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return pd.DataFrame(columns=SPAN_COLUMNS)
+
+
+def clear_spans(db_path="database/metrics.db"):
+    with write_connection(db_path) as conn:
+        conn.executescript(SPAN_SCHEMA)
+        conn.execute("DELETE FROM Span")
@@ -0,0 +1,140 @@
+import argparse
+import logging
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from database.connection import write_connection
+from database.data_utils import create_table_map
+from database.forecast_schema import SERIES_KEYS, ensure_forecast_schema, get_model_id, get_series_id
+
+# Quelle der Historie je Zeitreihenart, um fehlende is_future-Flags alter Prophet-Tabellen abzuleiten
+HISTORY_SOURCES = {
+    "_Sales": "SELECT MAX(substr(Date, 1, 10)) FROM WeeklySales",
+    "_Products": "SELECT MAX(substr(Date, 1, 10)) FROM HistoricalDemand",
+}
+
+
+def get_history_end(table_suffix, source_db_path):
+    """Letztes historisches Datum einer Zeitreihenart (oder None, falls die Quelle fehlt)."""
+    try:
+        with sqlite3.connect(source_db_path) as conn:
+            return conn.execute(HISTORY_SOURCES[table_suffix]).fetchone()[0]
+    except sqlite3.Error:
+        return None
+
+
+def migrate_legacy_tables(conn, source_db_path="database/walmart.db", drop_legacy=False):
+    """
+    Überführt die alten Einzeltabellen (ProphetForecast_Sales, ArimaForecast_Sales, …) in das gemeinsame
+    Schema aus ForecastModel, Series und Forecast (das Schema muss bereits angelegt sein).
+
+    Zeilen ohne is_future-Flag werden über das letzte Datum der Historie in `source_db_path` eingeordnet.
+    Gibt eine Liste von (Tabelle, Zeilen, Zeitreihen) der übernommenen Tabellen zurück.
+    """
+    existing_tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    migrated = []
+
+    for table_suffix, id_cols in SERIES_KEYS.items():
+        history_end = get_history_end(table_suffix, source_db_path)
+
+        for model, table in create_table_map(table_suffix).items():
+            if table not in existing_tables:
+                continue
+
+            df = pd.read_sql(f"SELECT * FROM {table}", conn)
+            if "is_future" not in df.columns:
+                df["is_future"] = None
+
+            # Fehlende Flags ergänzen: ARIMA/Holt-Winters speichern nur Zukunftswerte
+            missing = df["is_future"].isna()
+            if history_end is not None:
+                df.loc[missing, "is_future"] = (df.loc[missing, "ds"].str[:10] > history_end).astype(int)
+            else:
+                df.loc[missing, "is_future"] = 1
+
+            model_id = get_model_id(conn, model)
+
+            # Jede Identifier-Kombination einmal auf eine SeriesID abbilden
+            combos = df[id_cols].drop_duplicates()
+            series_ids = {
+                tuple(combo): get_series_id(conn, table_suffix, dict(zip(id_cols, combo)))
+                for combo in combos.itertuples(index=False, name=None)
+            }
+            df["SeriesID"] = [series_ids[combo] for combo in df[id_cols].itertuples(index=False, name=None)]
+
+            conn.executemany("""
+                INSERT INTO Forecast (ModelID, SeriesID, ds, yhat, yhat_lower, yhat_upper, is_future)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(ModelID, SeriesID, ds) DO UPDATE SET
+                    yhat = excluded.yhat,
+                    yhat_lower = excluded.yhat_lower,
+                    yhat_upper = excluded.yhat_upper,
+                    is_future = excluded.is_future
+            """, (
+                (model_id, series_id, ds, yhat, lower, upper, int(is_future))
+                for series_id, ds, yhat, lower, upper, is_future in
+                df[["SeriesID", "ds", "yhat", "yhat_lower", "yhat_upper", "is_future"]].itertuples(index=False,
+                                                                                                   name=None)
+            ))
+
+            if drop_legacy:
+                conn.execute(f"DROP TABLE {table}")
+
+            migrated.append((table, len(df), len(series_ids)))
+
+    return migrated
+
+
+def do_migration(db_path="database/predictions.db", source_db_path="database/walmart.db", drop_legacy=False):
+    """Migration von der Kommandozeile: übernimmt die alten Einzeltabellen und löscht sie optional."""
+    conn = sqlite3.connect(db_path)
+    ensure_forecast_schema(conn)
+    with conn:
+        migrated = migrate_legacy_tables(conn, source_db_path, drop_legacy)
+
+    if drop_legacy and migrated:
+        conn.execute("VACUUM")
+    conn.close()
+
+    for table, rows, series in migrated:
+        print(f"  • {table}: {rows} Zeilen, {series} Zeitreihen übernommen")
+    print(f"Fertig! {len(migrated)} Tabelle(n) in das Forecast-Schema von '{db_path}' migriert.")
+    return migrated
+
+
+# Datenbanken, deren Forecast-Schema in diesem Prozess bereits geprüft wurde
+_prepared = set()
+
+
+def ensure_forecast_database(db_path="database/predictions.db", source_db_path="database/walmart.db"):
+    """
+    Stellt beim ersten Zugriff des Prozesses sicher, dass `db_path` das Forecast-Schema enthält. Fehlt die Tabelle
+    Forecast noch (neue Datei oder Datenbank aus der Zeit vor dem gemeinsamen Schema), wird sie angelegt und die
+    alten Einzeltabellen werden automatisch übernommen (ohne sie zu löschen).
+    """
+    key = str(Path(db_path).resolve())
+    if key in _prepared:
+        return
+
+    with write_connection(db_path) as conn:
+        has_schema = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Forecast'").fetchone() is not None
+        if not has_schema:
+            ensure_forecast_schema(conn)
+            migrated = migrate_legacy_tables(conn, source_db_path)
+            if migrated:
+                logging.getLogger(__name__).info("%d alte Prognose-Tabelle(n) in das Forecast-Schema von '%s' "
+                                                 "übernommen.", len(migrated), db_path)
+    _prepared.add(key)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migriert alte Prognose-Tabellen in das gemeinsame Forecast-Schema.")
+    parser.add_argument("--db", default="database/predictions.db", help="Pfad zur predictions.db")
+    parser.add_argument("--source-db", default="database/walmart.db", help="Pfad zur walmart.db (Historie)")
+    parser.add_argument("--drop-legacy", action="store_true", help="Alte Tabellen nach der Migration löschen")
+    args = parser.parse_args()
+
+    do_migration(args.db, args.source_db, args.drop_legacy)
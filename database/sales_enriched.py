@@ -0,0 +1,42 @@
+# Analytische Sicht "SalesEnriched": WeeklySales mit den Features der StoreFeature-Tabelle und StoreType/StoreSize
+# aus Store, einmal beim Import als Tabelle materialisiert (Schlüssel StoreID, DeptID, Date). Auswertungen lesen
+# ihre Spalten daraus, statt WeeklySales bei jeder Darstellung erneut mit Features und Stores zu mergen.
+
+# IsHoliday: Feiertagswoche laut WeeklySales oder StoreFeature (wie die HolidayFlag der Analyse-Seite)
+SALES_ENRICHED_SELECT = """
+SELECT s.StoreID,
+       s.DeptID,
+       s.Date,
+       s.WeeklySales,
+       MAX(COALESCE(s.IsHoliday, 0), COALESCE(f.IsHoliday, 0)) AS IsHoliday,
+       f.Temperature,
+       f.FuelPrice,
+       f.MarkDown1,
+       f.MarkDown2,
+       f.MarkDown3,
+       f.MarkDown4,
+       f.MarkDown5,
+       f.CPI,
+       f.Unemployment,
+       st.StoreType,
+       st.StoreSize
+FROM WeeklySales s
+LEFT JOIN StoreFeature f ON f.StoreID = s.StoreID AND f.Date = s.Date
+LEFT JOIN Store st ON st.StoreID = s.StoreID
+"""
+
+
+def create_sales_enriched(conn):
+    """Baut die Tabelle SalesEnriched aus WeeklySales, StoreFeature und Store (neu) auf."""
+    conn.executescript(f"""
+    DROP TABLE IF EXISTS SalesEnriched;
+    CREATE TABLE SalesEnriched AS {SALES_ENRICHED_SELECT};
+    CREATE INDEX IF NOT EXISTS idx_enriched_store_date ON SalesEnriched(StoreID, Date);
+    CREATE INDEX IF NOT EXISTS idx_enriched_dept       ON SalesEnriched(DeptID);
+    """)
+    conn.commit()
+
+
+def has_sales_enriched(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'SalesEnriched'").fetchone() \
+        is not None
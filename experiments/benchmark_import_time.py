@@ -0,0 +1,83 @@
+# Import-Zeit je Seite beim Kaltstart: die Modul-Imports jeder in main.py registrierten Seite werden in einem
+# frischen Interpreter mit `python -X importtime` ausgeführt; ausgegeben werden die Gesamtzeit und die teuersten
+# direkt oder indirekt geladenen Pakete (schwere Modell-Backends wie prophet/pmdarima/statsmodels fallen sofort auf).
+# Aufruf aus dem Projektverzeichnis: python -m experiments.benchmark_import_time --repeat 3
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \| \s*(\S+)$")
+
+
+def registered_pages(main_file):
+    """Pfade aller per st.Page(...) registrierten Seiten in Reihenfolge von main.py."""
+    return re.findall(r"st\.Page\(\s*\"([^\"]+)\"", Path(main_file).read_text(encoding="utf-8"))
+
+
+def module_imports(page_file):
+    """
+    Quelltext der Imports auf Modulebene einer Seite (ohne den restlichen Seitencode auszuführen). Zeilenbasiert statt
+    per ast, damit auch Seiten mit Syntax neuerer Python-Versionen gemessen werden können.
+    """
+    statements, current = [], []
+    for line in Path(page_file).read_text(encoding="utf-8").splitlines():
+        if not current and not line.startswith(("import ", "from ")):
+            continue
+        current.append(line)
+        statement = "\n".join(current)
+        if not line.endswith("\\") and statement.count("(") == statement.count(")"):
+            statements.append(statement)
+            current = []
+    return "\n".join(statements)
+
+
+def measure(code):
+    """Führt `code` in einem frischen Interpreter aus; liefert {Top-Level-Paket: µs} und die Summe."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    packages = defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # Eigene Zeit (ohne Unter-Imports) je Modul, zusammengefasst nach Top-Level-Paket
+        if match:
+            packages[match.group(2).split(".")[0]] += int(match.group(1))
+    return packages, sum(packages.values())
+
+
+def main(args):
+    rows = []
+    for page in args.pages or registered_pages(PROJECT_ROOT / "main.py"):
+        code = module_imports(PROJECT_ROOT / page)
+        runs = [measure(code) for _ in range(args.repeat)]
+        packages, total = min(runs, key=lambda run: run[1])
+
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        rows.append({"Seite": page, "Import (ms)": total / 1000,
+                     "Teuerste Pakete": ", ".join(f"{name} {us / 1000:.0f}" for name, us in heaviest)})
+        print(f"{total / 1000:8.0f} ms  {page}", flush=True)
+
+    df_results = pd.DataFrame(rows)
+    print()
+    print(df_results.to_string(index=False))
+    if args.output:
+        df_results.to_csv(args.output, index=False)
+        print(f"Ergebnisse in '{args.output}' gespeichert.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-Zeit der Streamlit-Seiten beim Kaltstart (python -X importtime).")
+    parser.add_argument("--pages", nargs="*", default=None, help="Seiten (Standard: alle aus main.py)")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen je Seite (schnellster Lauf zählt)")
+    parser.add_argument("--top", type=int, default=4, help="Anzahl der teuersten Pakete je Seite")
+    parser.add_argument("--output", default=None, help="Optional: CSV-Datei für die Ergebnisse")
+
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+# Benchmark: globales Gradient-Boosting-Modell vs. Prophet (Laufzeit und Genauigkeit auf einem Holdout)
+# Aufruf aus dem Projektverzeichnis: python -m experiments.forecast.benchmark_global_model
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from logic.forcasting.forecaster import forecast_frame
+from logic.forcasting.global_model import fit_predict_global
+
+
+def load_tables(db_path):
+    with sqlite3.connect(db_path) as conn:
+        df_sales = pd.read_sql("SELECT StoreID, DeptID, Date, WeeklySales FROM WeeklySales", conn,
+                               parse_dates=["Date"])
+        df_features = pd.read_sql("SELECT * FROM StoreFeature", conn, parse_dates=["Date"])
+    return df_sales, df_features
+
+
+def mape(actual, forecast):
+    mask = actual != 0
+    return np.mean(np.abs((actual[mask] - forecast[mask]) / actual[mask])) * 100
+
+
+def smape(actual, forecast):
+    denominator = np.abs(actual) + np.abs(forecast)
+    mask = denominator != 0
+    return np.mean(2 * np.abs(actual[mask] - forecast[mask]) / denominator[mask]) * 100
+
+
+def evaluate(df_eval, name):
+    df_eval = df_eval.dropna(subset=["yhat"])
+    actual, forecast = df_eval["WeeklySales"].to_numpy(), df_eval["yhat"].to_numpy()
+    return {"MAPE": mape(actual, forecast), "sMAPE": smape(actual, forecast), "Modell": name}
+
+
+def main(db_path, holdout, n_series, seed):
+    df_sales, df_features = load_tables(db_path)
+
+    cutoff = df_sales["Date"].max() - pd.Timedelta(weeks=holdout)
+    df_train = df_sales[df_sales["Date"] <= cutoff]
+    df_test = df_sales[df_sales["Date"] > cutoff]
+
+    # Stichprobe von Zeitreihen, die im Training lang genug sind
+    counts = df_train.groupby(["StoreID", "DeptID"]).size()
+    candidates = counts[counts >= 52].index.to_frame(index=False)
+    sample = candidates.sample(n=min(n_series, len(candidates)), random_state=seed)
+    print(f"Holdout: {holdout} Wochen ab {cutoff.date()}, {len(sample)} von {len(candidates)} Zeitreihen")
+
+    results = []
+
+    # Globales Modell: ein Training über alle Zeitreihen, bewertet auf der Stichprobe
+    start = time.perf_counter()
+    df_global = fit_predict_global(df_train, df_features, holdout)
+    global_time = time.perf_counter() - start
+    df_global = df_global.merge(sample, on=["StoreID", "DeptID"])
+    df_eval = df_test.merge(df_global.rename(columns={"ds": "Date"}), on=["StoreID", "DeptID", "Date"])
+    results.append({**evaluate(df_eval, "Global-GBM (alle Reihen)"), "Fit-Zeit (s)": global_time,
+                    "Reihen": counts.size})
+
+    # Prophet: ein Modell je Zeitreihe der Stichprobe
+    frames = []
+    start = time.perf_counter()
+    for store_id, dept_id in sample.itertuples(index=False, name=None):
+        history = (df_train[(df_train["StoreID"] == store_id) & (df_train["DeptID"] == dept_id)]
+                   .sort_values("Date")
+                   .rename(columns={"Date": "ds", "WeeklySales": "y"}))
+        frame = forecast_frame(history[["ds", "y"]], "Prophet", holdout)
+        frames.append(frame.assign(StoreID=store_id, DeptID=dept_id))
+    prophet_time = time.perf_counter() - start
+    df_prophet = pd.concat(frames, ignore_index=True)
+    df_prophet["ds"] = pd.to_datetime(df_prophet["ds"])
+    df_eval = df_test.merge(df_prophet.rename(columns={"ds": "Date"}), on=["StoreID", "DeptID", "Date"])
+    results.append({**evaluate(df_eval, "Prophet (Stichprobe)"), "Fit-Zeit (s)": prophet_time,
+                    "Reihen": len(sample)})
+
+    df_results = pd.DataFrame(results).set_index("Modell")
+    df_results["Fit-Zeit je Reihe (ms)"] = df_results["Fit-Zeit (s)"] / df_results["Reihen"] * 1000
+    print(df_results.round(2).to_string())
+    return df_results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vergleicht das globale Modell mit Prophet.")
+    parser.add_argument("--db", default="database/walmart.db", help="Pfad zur walmart.db")
+    parser.add_argument("--holdout", type=int, default=26, help="Länge des Holdouts in Wochen")
+    parser.add_argument("--series", type=int, default=50, help="Anzahl Zeitreihen für Prophet")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    main(args.db, args.holdout, args.series, args.seed)
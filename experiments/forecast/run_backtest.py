@@ -0,0 +1,49 @@
+# Rolling-Origin-Backtesting der Prognosemodelle über eine Stichprobe von Sales- und Produkt-Zeitreihen
+# Aufruf aus dem Projektverzeichnis: python -m experiments.forecast.run_backtest --sales 20 --products 10
+import argparse
+import sqlite3
+
+import pandas as pd
+
+from logic.forcasting.backtesting import BACKTEST_MODELS, run_backtest, sample_product_series, \
+    sample_sales_series, save_backtest_results, summarize_backtest
+
+
+def main(args):
+    with sqlite3.connect(args.db) as conn:
+        df_sales = pd.read_sql("SELECT StoreID, DeptID, Date, WeeklySales FROM WeeklySales", conn,
+                               parse_dates=["Date"])
+        df_hist = pd.read_sql("SELECT * FROM HistoricalDemand", conn, parse_dates=["Date"])
+
+    series_by_kind = {
+        "Sales": sample_sales_series(df_sales, args.sales, args.seed),
+        "Products": sample_product_series(df_hist, args.products, args.seed),
+    }
+    print(f"{len(series_by_kind['Sales'])} Sales- und {len(series_by_kind['Products'])} Produkt-Zeitreihen, "
+          f"Modelle: {', '.join(args.models)}")
+
+    df_results = run_backtest(series_by_kind, args.models, args.horizon, args.origins, args.step,
+                              processes=args.processes,
+                              progress_callback=lambda done, total: print(f"  {done}/{total} Aufgaben erledigt"))
+
+    print(summarize_backtest(df_results).round(3).to_string(index=False))
+    if args.results_db:
+        run_id = save_backtest_results(df_results, args.results_db)
+        print(f"Ergebnisse unter RunID {run_id} in '{args.results_db}' gespeichert.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling-Origin-Backtesting der Prognosemodelle.")
+    parser.add_argument("--db", default="database/walmart.db", help="Pfad zur walmart.db")
+    parser.add_argument("--results-db", default="database/predictions.db",
+                        help="Zieldatenbank für die Tabelle BacktestResult (leer = nicht speichern)")
+    parser.add_argument("--models", nargs="+", default=BACKTEST_MODELS, choices=BACKTEST_MODELS)
+    parser.add_argument("--sales", type=int, default=20, help="Anzahl Store/Dept-Zeitreihen")
+    parser.add_argument("--products", type=int, default=10, help="Anzahl Produkt/Lager-Zeitreihen")
+    parser.add_argument("--horizon", type=int, default=12, help="Prognosehorizont in Wochen")
+    parser.add_argument("--origins", type=int, default=3, help="Anzahl Prognoseursprünge je Zeitreihe")
+    parser.add_argument("--step", type=int, default=13, help="Abstand der Ursprünge in Wochen")
+    parser.add_argument("--processes", type=int, default=None, help="Anzahl Worker-Prozesse")
+    parser.add_argument("--seed", type=int, default=42)
+
+    main(parser.parse_args())
@@ -0,0 +1,82 @@
+# Benchmark merge_forecast_with_sales: bisheriger Mengen-/Tupelvergleich gegen den vektorisierten Anti-Join
+# auf den Daten aller Stores. Die Prognose wird aus der Historie erzeugt (letzte `--overlap` Wochen überlappen die
+# Verkäufe, danach `--horizon` Zukunftswochen); mit `--scale` werden die Stores vervielfacht (mehr Zeilen).
+# Aufruf aus dem Projektverzeichnis: python -m experiments.optimization.benchmark_forecast_merge --scale 1 10
+import argparse
+import time
+
+import pandas as pd
+
+from database.data_reader import read_data
+from logic.optimization.preparation import merge_forecast_with_sales
+
+
+def merge_forecast_with_sales_tuples(df_sales, df_pred):
+    """Bisherige Implementierung als Referenz (Python-Set über alle (Date, StoreID, DeptID)-Tupel)."""
+    sales_keys = set(zip(df_sales["Date"], df_sales["StoreID"], df_sales["DeptID"]))
+    pred_keys = list(zip(df_pred["ds"], df_pred["StoreID"], df_pred["DeptID"]))
+
+    future_preds = df_pred.loc[[key not in sales_keys for key in pred_keys]].copy()
+    future_preds.rename(columns={"ds": "Date", "yhat": "WeeklySales"}, inplace=True)
+    future_preds["IsHoliday"] = False
+
+    df_combined = pd.concat([df_sales, future_preds[df_sales.columns]], ignore_index=True)
+    df_combined.sort_values(["StoreID", "DeptID", "Date"], inplace=True)
+    return df_combined
+
+
+def scale_stores(df, factor):
+    """Vervielfacht die Stores (neue StoreIDs mit Versatz), um größere Eingaben zu simulieren."""
+    if factor <= 1:
+        return df
+    offset = int(df["StoreID"].max())
+    copies = [df.assign(StoreID=df["StoreID"] + i * offset) for i in range(factor)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def synthetic_forecast(df_sales, overlap, horizon):
+    """Prognose je Store/Dept: die letzten `overlap` Wochen der Historie plus `horizon` Wochen in die Zukunft."""
+    last = df_sales.groupby(["StoreID", "DeptID"])["Date"].max().rename("Last").reset_index()
+    steps = pd.DataFrame({"Step": range(-overlap + 1, horizon + 1)})
+    df_pred = last.merge(steps, how="cross")
+    df_pred["ds"] = df_pred["Last"] + pd.to_timedelta(df_pred["Step"] * 7, unit="D")
+    df_pred["yhat"] = 1000.0 + df_pred["Step"]
+    return df_pred[["StoreID", "DeptID", "ds", "yhat"]]
+
+
+def best_of(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(args):
+    df_sales_base = read_data(args.db)[0]
+
+    print(f"{'Faktor':>6} | {'Verkäufe':>10} | {'Prognose':>9} | {'Tupel':>8} | {'Anti-Join':>9} | Speedup")
+    for factor in args.scale:
+        df_sales = scale_stores(df_sales_base, factor)
+        df_pred = synthetic_forecast(df_sales, args.overlap, args.horizon)
+
+        old_time, df_old = best_of(merge_forecast_with_sales_tuples, args.repeat, df_sales, df_pred)
+        new_time, df_new = best_of(merge_forecast_with_sales, args.repeat, df_sales, df_pred)
+
+        # Gleiche Zeilen, Werte, Reihenfolge und Index wie bisher
+        pd.testing.assert_frame_equal(df_old, df_new)
+
+        print(f"{factor:>6} | {len(df_sales):>10,} | {len(df_pred):>9,} | {old_time:7.2f}s | {new_time:8.2f}s | "
+              f"{old_time / new_time:6.1f}x", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des Anti-Joins von Prognose und Verkaufsdaten.")
+    parser.add_argument("--db", default="database/walmart.db", help="Pfad zur walmart.db")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1], help="Vervielfachung der Stores")
+    parser.add_argument("--overlap", type=int, default=26, help="Prognosewochen innerhalb der Historie")
+    parser.add_argument("--horizon", type=int, default=52, help="Prognosewochen nach der Historie")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen (bestes Ergebnis zählt)")
+
+    main(parser.parse_args())
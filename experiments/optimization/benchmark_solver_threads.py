@@ -0,0 +1,76 @@
+# Benchmark-Matrix: Pool-Worker × Solver-Threads für unterschiedlich viele Store/Dept-Paare,
+# verglichen mit der automatischen Aufteilung (plan_parallelism) inkl. Umverteilung beim Leerlaufen der Warteschlange.
+# Aufruf aus dem Projektverzeichnis: python -m experiments.optimization.benchmark_solver_threads --pairs 4 16 64
+import argparse
+import multiprocessing
+import time
+
+import pandas as pd
+
+from database.data_reader import read_data
+from logic.optimization.helper import plan_parallelism
+from logic.optimization.optimizations import run_promotion_sales_optimization_all
+
+
+def select_pairs(df_sales, n_pairs, seed):
+    pairs = df_sales[["StoreID", "DeptID"]].drop_duplicates().dropna()
+    pairs = pairs.sample(n=min(n_pairs, len(pairs)), random_state=seed)
+    return df_sales.merge(pairs, on=["StoreID", "DeptID"])
+
+
+def configurations(cores):
+    """Feste (Worker, Threads)-Kombinationen bis zur Kernzahl plus die automatische Aufteilung (None, None)."""
+    steps = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    configs = [(workers, threads) for workers in steps for threads in steps if workers * threads <= cores]
+    return configs + [(None, None)]
+
+
+def main(args):
+    df_sales, df_features, _ = read_data(args.db)
+    cores = multiprocessing.cpu_count()
+    rows = []
+
+    for n_pairs in args.pairs:
+        df_subset = select_pairs(df_sales, n_pairs, args.seed)
+        n_problems = len(df_subset[["StoreID", "DeptID"]].drop_duplicates())
+        problem_sizes = df_subset.groupby(["StoreID", "DeptID"]).size().tolist()
+
+        for workers, threads in configurations(cores):
+            start = time.perf_counter()
+            run_promotion_sales_optimization_all(df_subset.copy(), df_features, solver_timeout=args.timeout,
+                                                 processes=workers, threads=threads, solve_times_db=None)
+            elapsed = time.perf_counter() - start
+
+            if workers is None:
+                workers, threads = plan_parallelism(n_problems, problem_sizes, cores)
+                label = "automatisch"
+            else:
+                label = "fest"
+            rows.append({"Paare": n_problems, "Modus": label, "Worker": workers, "Threads": threads,
+                         "Sekunden": elapsed})
+            print(f"{n_problems:>4} Paare | {label:<11} | {workers:>2} Worker × {threads:>2} Threads | {elapsed:7.1f}s",
+                  flush=True)
+
+    df_results = pd.DataFrame(rows)
+    # Speedup gegenüber der seriellen Ausführung (1 Worker, 1 Thread) bei gleicher Paaranzahl
+    serial = df_results[(df_results["Modus"] == "fest") & (df_results["Worker"] == 1) & (df_results["Threads"] == 1)]
+    df_results = df_results.merge(serial[["Paare", "Sekunden"]].rename(columns={"Sekunden": "Seriell"}), on="Paare")
+    df_results["Speedup"] = df_results["Seriell"] / df_results["Sekunden"]
+
+    print()
+    print(df_results.pivot_table(index=["Worker", "Threads", "Modus"], columns="Paare", values="Speedup")
+          .round(2).to_string())
+    if args.output:
+        df_results.to_csv(args.output, index=False)
+        print(f"Ergebnisse in '{args.output}' gespeichert.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark der Aufteilung zwischen Pool-Workern und Solver-Threads.")
+    parser.add_argument("--db", default="database/walmart.db", help="Pfad zur walmart.db")
+    parser.add_argument("--pairs", type=int, nargs="+", default=[4, 16, 64], help="Anzahl Store/Dept-Paare")
+    parser.add_argument("--timeout", type=int, default=60, help="Solver-Timeout in Sekunden")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Optional: CSV-Datei für die Ergebnisse")
+
+    main(parser.parse_args())
@@ -0,0 +1,70 @@
+# Vergleich Rolling Horizon vs. Gesamtmodell: Zielfunktionswert (Netto-Gewinn), Lücke und Laufzeit
+# auf einer Stichprobe von Store/Dept-Paaren (optional inkl. gespeicherter Prognosen wie in der App).
+# Aufruf aus dem Projektverzeichnis: python -m experiments.optimization.rolling_horizon_gap --pairs 5 --windows 26 52
+import argparse
+import time
+
+import pandas as pd
+
+from database.data_reader import read_data, read_full_forecast_data
+from logic.optimization.optimizations import run_promotion_sales_optimization
+from logic.optimization.preparation import prepare_optimization_sales
+
+
+def solve(df_pair, df_features, args, window=None):
+    start = time.perf_counter()
+    df_solution, status = run_promotion_sales_optimization(
+        df_pair.copy(), df_features,
+        boost_max=args.boost * 0.01,
+        decay_factor=1 - args.decay * 0.01,
+        recovery_rate=args.recovery * 0.01,
+        cost_rate=args.cost * 0.01,
+        solver_timeout=args.timeout,
+        rolling_window=window,
+        rolling_step=args.step
+    )
+    return df_solution["NetGain"].fillna(0).sum(), status, time.perf_counter() - start
+
+
+def main(args):
+    df_sales, df_features, _ = read_data(args.db)
+    df_pred = read_full_forecast_data(args.model, "_Sales", args.predictions_db) if args.model else None
+    df_sales = prepare_optimization_sales(df_sales, df_pred if df_pred is not None and not df_pred.empty else None)
+
+    pairs = df_sales[["StoreID", "DeptID"]].drop_duplicates().dropna().sample(frac=1, random_state=args.seed)
+    rows = []
+    for store_id, dept_id in pairs.head(args.pairs).itertuples(index=False):
+        df_pair = df_sales[(df_sales["StoreID"] == store_id) & (df_sales["DeptID"] == dept_id)]
+        full_gain, full_status, full_seconds = solve(df_pair, df_features, args)
+        rows.append({"StoreID": store_id, "DeptID": dept_id, "Wochen": len(df_pair), "Fenster": "gesamt",
+                     "Gewinn": full_gain, "Status": full_status, "Sekunden": full_seconds, "Lücke %": 0.0})
+
+        for window in args.windows:
+            gain, status, seconds = solve(df_pair, df_features, args, window)
+            gap = (full_gain - gain) / abs(full_gain) * 100 if full_gain else 0.0
+            rows.append({"StoreID": store_id, "DeptID": dept_id, "Wochen": len(df_pair), "Fenster": str(window),
+                         "Gewinn": gain, "Status": status, "Sekunden": seconds, "Lücke %": gap})
+        print(pd.DataFrame(rows[-len(args.windows) - 1:]).round(2).to_string(index=False), flush=True)
+
+    df_results = pd.DataFrame(rows)
+    # Negative Lücke: das Gesamtmodell lief ins Timeout und lieferte eine schlechtere Lösung als die Fenster
+    print()
+    print(df_results.groupby("Fenster")[["Lücke %", "Sekunden"]].agg(["mean", "max"]).round(2).to_string())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimalitätslücke des Rolling Horizon gegenüber dem Gesamtmodell.")
+    parser.add_argument("--db", default="database/walmart.db", help="Pfad zur walmart.db")
+    parser.add_argument("--predictions-db", default="database/predictions.db", help="Pfad zur predictions.db")
+    parser.add_argument("--model", default=None, help="Prognosemodell für die Zukunftswochen (Standard: keine)")
+    parser.add_argument("--pairs", type=int, default=5, help="Anzahl Store/Dept-Paare")
+    parser.add_argument("--windows", type=int, nargs="+", default=[26, 52], help="Fensterlängen in Wochen")
+    parser.add_argument("--step", type=int, default=None, help="Festgeschriebene Wochen je Fenster (Standard: halb)")
+    parser.add_argument("--timeout", type=int, default=150, help="Solver-Timeout in Sekunden (je Modell bzw. Fenster)")
+    parser.add_argument("--cost", type=float, default=5.0)
+    parser.add_argument("--boost", type=float, default=15.0)
+    parser.add_argument("--recovery", type=float, default=25.0)
+    parser.add_argument("--decay", type=float, default=40.0)
+    parser.add_argument("--seed", type=int, default=42)
+
+    main(parser.parse_args())
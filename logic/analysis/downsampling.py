@@ -0,0 +1,84 @@
+# Reduktion langer Zeitreihen vor dem Zeichnen: Largest-Triangle-Three-Buckets (LTTB) erhält die Form der Kurve
+# (Spitzen, Einbrüche), Min/Max-Bucketing garantiert Extremwerte je Intervall. Reihen bis MAX_POINTS bleiben
+# unverändert, damit kurze Diagramme exakt wie bisher aussehen.
+import numpy as np
+import pandas as pd
+
+# Höchstanzahl Punkte je Reihe, ab der reduziert wird (ca. Pixelbreite eines Diagramms)
+MAX_POINTS = 1000
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+def _numeric(values):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype("int64").to_numpy(dtype=float)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+
+
+def lttb_indices(x, y, n_out):
+    """Positionen der von LTTB ausgewählten Punkte (erster und letzter Punkt bleiben immer erhalten)."""
+    x, y = _numeric(x), _numeric(y)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = min(int((i + 1) * every) + 1, n - 1)
+
+        # Mittelpunkt des nächsten Buckets (für den letzten Bucket: letzter Punkt)
+        next_end = min(int((i + 2) * every) + 1, n)
+        if i == n_out - 3 or end >= next_end:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        else:
+            avg_x, avg_y = np.nanmean(x[end:next_end]), np.nanmean(y[end:next_end])
+
+        # Punkt mit der größten Dreiecksfläche zum zuletzt gewählten Punkt und zum nächsten Mittelpunkt
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Positionen von Minimum und Maximum je Bucket plus Randpunkte (höchstens n_out), chronologisch sortiert."""
+    y = _numeric(y)
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    selected = [0, n - 1]
+    for bucket in np.array_split(np.arange(n), (n_out - 2) // 2):
+        values = y[bucket]
+        if np.isnan(values).all():
+            selected.append(bucket[0])
+            continue
+        selected.extend((bucket[np.nanargmin(values)], bucket[np.nanargmax(values)]))
+    return np.unique(selected)
+
+
+def downsample(df, x, y, max_points=MAX_POINTS, method="lttb"):
+    """
+    Reduziert `df` (sortiert nach `x`) auf höchstens `max_points` Zeilen, ausgewählt nach der Spalte `y`.
+    Alle Spalten der gewählten Zeilen bleiben erhalten (z.B. Konfidenzintervalle); kurze Reihen unverändert.
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Unbekannte Methode '{method}', erwartet: {', '.join(DOWNSAMPLING_METHODS)}")
+    if df is None or len(df) <= max_points:
+        return df
+
+    index = lttb_indices(df[x], df[y], max_points) if method == "lttb" else minmax_indices(df[y], max_points)
+    return df.iloc[index]
+
+
+def payload_bytes(df, columns):
+    """Größe der Punkte als JSON (so werden Diagrammdaten an den Browser übertragen) in Bytes."""
+    if df is None or df.empty:
+        return 0
+    return len(df[list(columns)].to_json(orient="values", date_format="iso").encode())
@@ -0,0 +1,166 @@
+import atexit
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from multiprocessing import util as mp_util
+
+from database.metrics import prune_spans, write_spans
+
+# Abgeschlossene Messungen landen in einer eigenen Datenbank, damit sie nicht mit Prognose-Schreibvorgängen um die
+# Schreibsperre konkurrieren. Mit PROFILING=0 wird weiter gemessen, aber nichts gespeichert.
+METRICS_DB_PATH = "database/metrics.db"
+PROFILING_ENABLED = os.environ.get("PROFILING", "1") != "0"
+
+# Abgeschlossene Span-Bäume werden im Prozess gesammelt und gebündelt geschrieben: sobald FLUSH_SIZE Spans
+# vorliegen oder seit dem letzten Schreiben FLUSH_INTERVAL Sekunden vergangen sind (geprüft am Ende eines
+# Wurzel-Spans) sowie beim Beenden des Prozesses
+FLUSH_SIZE = 500
+FLUSH_INTERVAL = 10
+
+# Offener Span des aktuellen Threads: (SpanID, RootID, Liste der abgeschlossenen Spans des Baums). Neue Threads und
+# Worker-Prozesse beginnen ohne offenen Span, ihre Messungen bilden eigene Bäume.
+_current_span = ContextVar("current_span", default=None)
+
+_buffer = []
+_buffer_lock = threading.Lock()
+_buffer_pid = None
+_last_flush = time.monotonic()
+_pruned = False
+
+
+def _register_process():
+    """
+    Beim ersten Span eines Prozesses: vom Elternprozess geerbte, ungeschriebene Spans verwerfen (die schreibt der
+    Elternprozess) und das Schreiben beim Beenden anmelden. Pool-Worker beenden sich ohne atexit, dort greift der
+    Finalizer von multiprocessing, sofern der Pool mit close()/join() statt terminate() beendet wird.
+    """
+    global _buffer, _buffer_lock, _buffer_pid, _last_flush
+    _buffer, _buffer_lock, _buffer_pid = [], threading.Lock(), os.getpid()
+    _last_flush = time.monotonic()
+    if multiprocessing.parent_process() is None:
+        atexit.register(flush_spans)
+    else:
+        mp_util.Finalize(None, flush_spans, exitpriority=10)
+
+
+def _collect(spans):
+    if _buffer_pid != os.getpid():
+        _register_process()
+    with _buffer_lock:
+        _buffer.extend(spans)
+        due = len(_buffer) >= FLUSH_SIZE or time.monotonic() - _last_flush >= FLUSH_INTERVAL
+    if due:
+        flush_spans()
+
+
+def flush_spans():
+    """
+    Schreibt alle gesammelten Spans des Prozesses in einem Schreibvorgang. Veraltete Messungen werden einmal je
+    Hauptprozess (App-Server, Batch- bzw. Job-Lauf) gelöscht, nicht bei jedem Schreiben.
+    """
+    global _last_flush, _pruned
+    with _buffer_lock:
+        spans = _buffer[:]
+        _buffer.clear()
+        _last_flush = time.monotonic()
+    if not spans or not PROFILING_ENABLED or _buffer_pid != os.getpid():
+        return
+
+    try:
+        write_spans(spans, METRICS_DB_PATH)
+        if not _pruned and multiprocessing.parent_process() is None:
+            _pruned = True
+            prune_spans(METRICS_DB_PATH)
+    except Exception as e:
+        # Messungen dürfen die eigentliche Berechnung nie abbrechen
+        logging.getLogger(__name__).warning("Messungen konnten nicht gespeichert werden: %s", e)
+
+
+@contextmanager
+def span(name, detail=None):
+    """
+    Misst einen Abschnitt als Knoten eines Span-Baums: innerhalb eines offenen Spans geöffnete Spans werden seine
+    Kinder. `name` ist die Stufe (z.B. "fit Prophet"), `detail` die Zeitreihe bzw. das Problem (z.B.
+    "Store 1 / Dept 2"). Ist der äußerste Span beendet, wird der ganze Baum zum gebündelten Schreiben vorgemerkt
+    (siehe flush_spans); innerhalb eines Baums findet keine Datenbankarbeit statt.
+    """
+    parent = _current_span.get()
+    span_id = uuid.uuid4().hex[:16]
+    root_id, finished = (parent[1], parent[2]) if parent else (span_id, [])
+    token = _current_span.set((span_id, root_id, finished))
+
+    started_at = datetime.now()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        _current_span.reset(token)
+        finished.append((span_id, parent[0] if parent else None, root_id, name,
+                         None if detail is None else str(detail), started_at.isoformat(timespec="milliseconds"),
+                         duration_ms, os.getpid(), status))
+        if parent is None:
+            _collect(finished)
+
+
+def timed(name=None):
+    """Dekorator: misst jeden Aufruf der Funktion als Span (Standardname: Funktionsname)."""
+
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def series_label(identifiers):
+    """Lesbare Bezeichnung einer Zeitreihe für Span-Details, z.B. "StoreID=1 / DeptID=2" (None wird ausgelassen)."""
+    return " / ".join(f"{key}={value}" for key, value in identifiers.items() if value is not None)
+
+
+@contextmanager
+def section_timer(label, timings=None):
+    """
+    Misst die Renderzeit eines Seitenabschnitts und protokolliert sie auf Debug-Ebene.
+    Optional wird sie zusätzlich in `timings` ({Abschnitt: Millisekunden}) abgelegt, z.B. für eine Anzeige.
+    """
+    start = time.perf_counter()
+    try:
+        with span(label):
+            yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if timings is not None:
+            timings[label] = elapsed_ms
+        logging.getLogger(__name__).debug("Renderzeit %s: %.0f ms", label, elapsed_ms)
+
+
+def stage_statistics(df_spans):
+    """Anzahl, Median (p50), p95, Maximum und Summe der Dauer je Stufe (Name), langsamste Stufe (p95) zuerst."""
+    grouped = df_spans.groupby("Name")["DurationMs"]
+    df_stats = grouped.agg(Anzahl="count", p50=lambda d: d.quantile(0.5), p95=lambda d: d.quantile(0.95),
+                           Maximum="max", Summe="sum")
+    return df_stats.sort_values("p95", ascending=False).reset_index()
+
+
+def slowest_series(df_spans, top=20):
+    """Die `top` langsamsten Spans mit Zeitreihen- bzw. Problembezug (Detail gesetzt)."""
+    df = df_spans[df_spans["Detail"].notna()]
+    return df.nlargest(top, "DurationMs")[["Name", "Detail", "DurationMs", "StartedAt", "Status"]]
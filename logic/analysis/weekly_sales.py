@@ -0,0 +1,95 @@
+# Reine Aggregatfunktionen (ohne Streamlit) für den WeeklySales-Bereich der deskriptiven Analyse.
+# Die Seite cached das Ergebnis von compute_weekly_sales_aggregates je Auswahl und Datenstand.
+import numpy as np
+import pandas as pd
+
+# Monatskürzel unabhängig von installierten Locales (dt.month liefert 1–12)
+MONTH_LABELS = {1: "Jan", 2: "Feb", 3: "Mär", 4: "Apr", 5: "Mai", 6: "Jun",
+                7: "Jul", 8: "Aug", 9: "Sep", 10: "Okt", 11: "Nov", 12: "Dez"}
+
+# Stichprobengrößen der Streudiagramme (wie bisher auf der Seite)
+TEMPERATURE_SAMPLE = 4000
+PAIRPLOT_SAMPLE = 500
+FEATURE_SAMPLE = 1000
+
+
+def filter_weekly_sales(df_enriched, stores, depts, start, end):
+    return df_enriched[
+        df_enriched["StoreID"].isin(stores) &
+        df_enriched["DeptID"].isin(depts) &
+        df_enriched["Date"].between(start, end)
+        ]
+
+
+def histogram_with_kde(values, bins=30, grid_points=200):
+    """Histogramm (Kanten, Häufigkeiten) und eine auf die Häufigkeiten skalierte Dichteschätzung."""
+    values = pd.Series(values).dropna().to_numpy()
+    if len(values) == 0:
+        return {"edges": np.array([]), "counts": np.array([]), "kde_x": np.array([]), "kde_y": np.array([])}
+
+    counts, edges = np.histogram(values, bins=bins)
+    kde_x = np.linspace(edges[0], edges[-1], grid_points)
+    kde_y = np.zeros_like(kde_x)
+    if len(values) > 1 and np.ptp(values) > 0:
+        # scipy erst hier importieren (teuer, nur für die Dichteschätzung nötig)
+        from scipy.stats import gaussian_kde
+
+        # Dichte × Anzahl × Klassenbreite → gleiche Skala wie die Balken (wie sns.histplot(kde=True))
+        kde_y = gaussian_kde(values)(kde_x) * len(values) * (edges[1] - edges[0])
+    return {"edges": edges, "counts": counts, "kde_x": kde_x, "kde_y": kde_y}
+
+
+def sales_by_combo(df_ws, stores, depts):
+    """Zeitreihen je Store/Dept-Kombination in Auswahlreihenfolge als {Label: DataFrame[Date, WeeklySales]}."""
+    grouped = dict(iter(df_ws.groupby(["StoreID", "DeptID"])))
+    return {f"S{s}-D{d}": grouped[(s, d)][["Date", "WeeklySales"]].reset_index(drop=True)
+            for s in stores for d in depts if (s, d) in grouped}
+
+
+def monthly_mean(df_ws):
+    """Ø WeeklySales je Kalendermonat (alle 12 Monate, chronologisch)."""
+    means = df_ws.groupby(df_ws["Date"].dt.month)["WeeklySales"].mean().reindex(range(1, 13))
+    return pd.DataFrame({"Month": means.index.map(MONTH_LABELS), "WeeklySales": means.to_numpy()})
+
+
+def store_month_pivot(df_ws):
+    """Summe WeeklySales je Store (Zeilen) und Monat (Spalten Jan–Dez)."""
+    pivot = (df_ws.groupby(["StoreID", df_ws["Date"].dt.month.rename("Monat")])["WeeklySales"]
+             .sum()
+             .unstack(fill_value=0)
+             .reindex(columns=range(1, 13)))
+    return pivot.rename(columns=MONTH_LABELS)
+
+
+def compute_weekly_sales_aggregates(df_enriched, stores, depts, start, end):
+    """
+    Alle Daten, die der WeeklySales-Bereich darstellt, für eine Auswahl (Stores, Depts, Zeitraum). `df_enriched` ist
+    die Sicht SalesEnriched (WeeklySales mit Features und Store-Daten), es wird nicht mehr gemergt.
+    """
+    df_ws = filter_weekly_sales(df_enriched, stores, depts, start, end)
+
+    num_cols = df_ws.select_dtypes(include="number")
+    corr_mat = num_cols.corr().round(2)
+
+    # Top-5 absolut höchsten Korrelationen zu WeeklySales (erstes Element ist die Selbstkorrelation)
+    top5 = corr_mat["WeeklySales"].abs().sort_values(ascending=False).iloc[1:6].index.tolist() \
+        if "WeeklySales" in corr_mat else []
+    pair_cols = ["WeeklySales"] + top5
+
+    return {
+        "rows": len(df_ws),
+        "histogram": histogram_with_kde(df_ws["WeeklySales"]),
+        "combos": sales_by_combo(df_ws, stores, depts),
+        "by_store_type": df_ws[["StoreType", "WeeklySales"]],
+        "monthly_mean": monthly_mean(df_ws),
+        "store_month": store_month_pivot(df_ws),
+        "temperature": df_ws[["Temperature", "WeeklySales"]].sample(n=min(TEMPERATURE_SAMPLE, len(df_ws)),
+                                                                    random_state=42),
+        "corr": corr_mat,
+        "pair_sample": num_cols[pair_cols].sample(n=min(PAIRPLOT_SAMPLE, len(num_cols)), random_state=0),
+        "holiday_mean": df_ws.groupby(df_ws["IsHoliday"].astype(bool))["WeeklySales"].mean().reindex([False, True]),
+        "cpi": df_ws[["CPI", "WeeklySales"]].sample(n=min(FEATURE_SAMPLE, len(df_ws)), random_state=1),
+        "unemployment": df_ws[["Unemployment", "WeeklySales"]].sample(n=min(FEATURE_SAMPLE, len(df_ws)),
+                                                                      random_state=2),
+        "by_store_size": df_ws[["StoreSize", "WeeklySales"]],
+    }
@@ -0,0 +1,217 @@
+# Batch-Läufe ohne Streamlit, z.B. nächtlich per cron aus dem Projektverzeichnis:
+#   python -m logic.batch forecast --models Prophet Global-GBM
+#   python -m logic.batch optimize --model Prophet --stores 1 2 3
+import argparse
+import multiprocessing
+import time
+
+from database.data_reader import read_data, read_full_forecast_data
+from database.data_writer import save_optimization_run
+from logic.forcasting.forecaster import available_models, create_pool, get_model
+from logic.forcasting.hierarchy import RECONCILIATION_METHODS, run_global_sales_forecast, \
+    run_hierarchical_sales_forecast
+from logic.optimization.coupled import run_coupled_promotion_optimization
+from logic.optimization.optimizations import run_promotion_sales_optimization_all
+from logic.optimization.preparation import prepare_optimization_sales
+
+FORECAST_MODELS = available_models()
+
+# Verkaufsdaten je Worker (einmal per Initializer übergeben statt mit jeder Aufgabe)
+_worker_sales = None
+
+
+class ProgressPrinter:
+    """
+    Gibt Fortschritt, Durchsatz und geschätzte Restzeit auf der Konsole aus.
+    Optional wird zusätzlich callback(done, total, message) aufgerufen (z.B. für die Job-Queue).
+    """
+
+    def __init__(self, label, total, unit, callback=None):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.callback = callback
+        self.start = time.perf_counter()
+
+    def __call__(self, done, detail=""):
+        elapsed = time.perf_counter() - self.start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - done) / rate if rate > 0 else float("nan")
+        message = f"[{self.label}] {done}/{self.total} {self.unit} | {rate:.2f} {self.unit}/s | " \
+                  f"Rest ~{remaining:.0f}s {detail}"
+        print(message, flush=True)
+        if self.callback:
+            self.callback(done, self.total, message)
+
+    def finish(self):
+        elapsed = time.perf_counter() - self.start
+        print(f"[{self.label}] Fertig: {self.total} {self.unit} in {elapsed:.1f}s "
+              f"({self.total / elapsed if elapsed > 0 else 0.0:.2f} {self.unit}/s)", flush=True)
+
+
+def _init_forecast_worker(df_sales):
+    global _worker_sales
+    _worker_sales = df_sales
+
+
+def _forecast_store(args):
+    model_option, store_id, periods, reconciliation, predictions_db_path = args
+    _, dept_frames, n_fits = run_hierarchical_sales_forecast(_worker_sales, model_option, store_id, periods,
+                                                             reconciliation, parallel=False, future_only=True,
+                                                             db_path=predictions_db_path)
+    return store_id, len(dept_frames), n_fits
+
+
+def run_forecasts(models, store_ids=None, periods=104, reconciliation=None, processes=None,
+                  db_path="database/walmart.db", predictions_db_path="database/predictions.db", progress_callback=None):
+    """
+    Berechnet die hierarchischen Sales-Prognosen aller (bzw. der angegebenen) Stores und speichert nur Zukunftswerte.
+    Lokale Modelle werden je Store in einem Pool angepasst (Threads oder Prozesse, siehe ForecastModel.executor),
+    Batch-Modelle wie das globale Modell einmal für alle Stores.
+    progress_callback(done, total, message) zählt über alle Modelle hinweg.
+    """
+    df_sales, df_features, _ = read_data(db_path)
+    store_ids = store_ids or sorted(int(s) for s in df_sales["StoreID"].dropna().unique())
+    processes = processes or multiprocessing.cpu_count()
+
+    for i, model_option in enumerate(models):
+        def report(done, total, message, offset=i * len(store_ids)):
+            if progress_callback:
+                progress_callback(offset + done, len(models) * total, message)
+
+        progress = ProgressPrinter(model_option, len(store_ids), "Stores", report)
+
+        if get_model(model_option).batch:
+            run_global_sales_forecast(df_sales, df_features, periods, store_ids, future_only=True,
+                                      progress_callback=lambda store_id, done, total: progress(
+                                          done, f"(Store {store_id})"), db_path=predictions_db_path)
+        else:
+            tasks = [(model_option, store_id, periods, reconciliation, predictions_db_path) for store_id in store_ids]
+            with create_pool(model_option, min(processes, len(tasks)), initializer=_init_forecast_worker,
+                             initargs=(df_sales,)) as pool:
+                fits = 0
+                for done, (store_id, n_depts, n_fits) in enumerate(pool.imap_unordered(_forecast_store, tasks), 1):
+                    fits += n_fits
+                    progress(done, f"(Store {store_id}: {n_depts} Departments, {fits} Modellanpassungen gesamt)")
+                # Worker regulär beenden (statt terminate), damit sie ihre gesammelten Messungen schreiben
+                pool.close()
+                pool.join()
+
+        progress.finish()
+
+
+def run_optimization(params, store_ids=None, dept_ids=None, processes=None, db_path="database/walmart.db",
+                     predictions_db_path="database/predictions.db", progress_callback=None, source="batch"):
+    """Führt die Promotion-Optimierung wie auf den Optimierer-Seiten aus und speichert das Ergebnis als Lauf."""
+    df_sales, df_features, _ = read_data(db_path)
+
+    df_pred = None
+    if params["use_prediction"]:
+        df_pred = read_full_forecast_data(params["selected_model"], "_Sales", predictions_db_path)
+        if df_pred.empty:
+            print(f"Keine gespeicherten Prognosen für {params['selected_model']} → historische Daten.", flush=True)
+            df_pred = None
+    df_sales = prepare_optimization_sales(df_sales, df_pred, store_ids, dept_ids)
+
+    if params.get("budget") or params.get("weekly_capacity"):
+        iterations = 10
+        progress = ProgressPrinter("Gekoppelte Optimierung", iterations, "Iterationen", progress_callback)
+        df_solution, results, _ = run_coupled_promotion_optimization(
+            df_sales,
+            df_features,
+            budget=params.get("budget") or None,
+            weekly_capacity=params.get("weekly_capacity") or None,
+            cost_rate=params["promo_cost"] * 0.01,
+            boost_max=params["promo_boost"] * 0.01,
+            recovery_rate=params["promo_scaling"] * 0.01,
+            decay_factor=1 - params["promo_decay"] * 0.01,
+            solver_timeout=params["solver_timeout"],
+            iterations=iterations,
+            processes=processes,
+            progress_callback=lambda iteration, _, info: progress(
+                iteration, f"(Ausgaben {info['Spend']:,.0f}, bester Zielwert {info['BestFeasibleValue']:,.0f}, "
+                           f"Schranke {info['UpperBound']:,.0f})")
+        )
+    else:
+        total = len(df_sales[["StoreID", "DeptID"]].drop_duplicates().dropna())
+        progress = ProgressPrinter("Optimierung", total, "Paare", progress_callback)
+        df_solution, results = run_promotion_sales_optimization_all(
+            df_sales,
+            df_features,
+            cost_rate=params["promo_cost"] * 0.01,
+            boost_max=params["promo_boost"] * 0.01,
+            recovery_rate=params["promo_scaling"] * 0.01,
+            decay_factor=1 - params["promo_decay"] * 0.01,
+            parallel=True,
+            solver_timeout=params["solver_timeout"],
+            processes=processes,
+            solve_times_db=predictions_db_path,
+            rolling_window=params.get("rolling_window") or None,
+            progress_callback=lambda store_id, dept_id, done, _: progress(
+                done, f"(Store {store_id} / Dept {dept_id})")
+        )
+    progress.finish()
+
+    run_id = save_optimization_run(df_solution, results, {**params, "selected_stores": store_ids,
+                                                           "selected_depts": dept_ids},
+                                   source=source, db_path=predictions_db_path)
+    print(f"Ergebnis unter RunID {run_id} in '{predictions_db_path}' gespeichert.", flush=True)
+    return run_id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prognosen und Optimierungen ohne Streamlit ausführen.")
+    parser.add_argument("--db", default="database/walmart.db", help="Pfad zur walmart.db")
+    parser.add_argument("--processes", type=int, default=None, help="Anzahl Worker-Prozesse (Standard: alle Kerne)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Gemeinsame Optionen der Unterbefehle
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument("--stores", type=int, nargs="+", default=None, help="Nur diese Stores (Standard: alle)")
+
+    forecast = commands.add_parser("forecast", parents=[selection],
+                                   help="Sales-Prognosen aller Stores berechnen und speichern")
+    forecast.add_argument("--models", nargs="+", default=["Prophet"], choices=FORECAST_MODELS)
+    forecast.add_argument("--periods", type=int, default=104, help="Prognosezeitraum in Wochen")
+    forecast.add_argument("--reconciliation", default="Bottom-Up", choices=list(RECONCILIATION_METHODS.keys()))
+
+    optimize = commands.add_parser("optimize", parents=[selection],
+                                   help="Promotion-Optimierung ausführen und Ergebnis speichern")
+    optimize.add_argument("--depts", type=int, nargs="+", default=None, help="Nur diese Departments")
+    optimize.add_argument("--model", default=None, choices=FORECAST_MODELS,
+                          help="Vorhersagenmodell (ohne Angabe nur historische Daten)")
+    optimize.add_argument("--cost", type=float, default=5.0, help="Kosten pro Promotion in % vom Umsatz")
+    optimize.add_argument("--boost", type=float, default=15.0, help="Maximaler Boost je Promotion in %")
+    optimize.add_argument("--recovery", type=float, default=25.0, help="Wirkungserholung je Woche in %")
+    optimize.add_argument("--decay", type=float, default=40.0, help="Wirkungsnachlass je Wiederholung in %")
+    optimize.add_argument("--timeout", type=int, default=150, help="Solver-Timeout in Sekunden")
+    optimize.add_argument("--budget", type=float, default=0.0,
+                          help="Gesamtbudget für Promo-Kosten über alle Paare (0 = unbegrenzt)")
+    optimize.add_argument("--weekly-capacity", type=int, default=0,
+                          help="Max. Promotionen je Woche über alle Paare (0 = unbegrenzt)")
+    optimize.add_argument("--rolling-window", type=int, default=0,
+                          help="Rolling-Horizon-Fenster in Wochen (0 = Gesamtmodell)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "forecast":
+        run_forecasts(args.models, args.stores, args.periods, RECONCILIATION_METHODS[args.reconciliation],
+                      args.processes, args.db)
+    elif args.command == "optimize":
+        params = {
+            "promo_cost": args.cost,
+            "promo_boost": args.boost,
+            "promo_scaling": args.recovery,
+            "promo_decay": args.decay,
+            "solver_timeout": args.timeout,
+            "rolling_window": args.rolling_window,
+            "budget": args.budget,
+            "weekly_capacity": args.weekly_capacity,
+            "use_prediction": args.model is not None,
+            "selected_model": args.model,
+        }
+        run_optimization(params, args.stores, args.depts, args.processes, args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# Registry der Modell-Backends: schwere Bibliotheken (prophet/Stan, pmdarima, statsmodels, scikit-learn) werden erst
+# importiert, wenn ihr Modell tatsächlich angepasst wird. Seiten, die nur die Modellnamen oder gespeicherte
+# Prognosen brauchen, starten dadurch ohne diese Imports.
+import importlib
+
+# Name des globalen Modells (logic/forcasting/global_model.py); hier definiert, damit die Registry ohne das Modul
+# auskommt
+GLOBAL_MODEL_NAME = "Global-GBM"
+
+# Modell → Modul, das die Modellklasse bzw. -funktion bereitstellt
+MODEL_BACKENDS = {
+    "Prophet": "prophet",
+    "ARIMA": "pmdarima",
+    "Holt-Winters": "statsmodels.tsa.holtwinters",
+    GLOBAL_MODEL_NAME: "sklearn.ensemble",
+}
+
+
+def load_backend(model_option):
+    """Importiert das Backend-Modul eines Modells beim ersten Aufruf (danach aus sys.modules)."""
+    try:
+        module_name = MODEL_BACKENDS[model_option]
+    except KeyError:
+        raise ValueError(f"Unbekanntes Modell: {model_option}") from None
+    return importlib.import_module(module_name)
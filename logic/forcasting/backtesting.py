@@ -0,0 +1,205 @@
+# Rolling-Origin-Backtesting: Genauigkeit und Laufzeit der Prognosemodelle auf historischen Daten
+import multiprocessing
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from database.connection import write_connection
+from logic.analysis.timing import span
+from logic.forcasting.forecast_helper import prepare_product_data
+from logic.forcasting.forecaster import available_models, fit_model, predict_frame
+
+BACKTEST_MODELS = available_models(batch=False)
+
+BACKTEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS BacktestResult (
+    RunID          TEXT    NOT NULL,
+    Kind           TEXT    NOT NULL,
+    Series         TEXT    NOT NULL,
+    Model          TEXT    NOT NULL,
+    Origin         TEXT    NOT NULL,
+    Horizon        INTEGER NOT NULL,
+    MAPE           REAL,
+    sMAPE          REAL,
+    MASE           REAL,
+    FitSeconds     REAL,
+    PredictSeconds REAL,
+    PeakMemoryMB   REAL,
+    Error          TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_backtest_run ON BacktestResult(RunID, Model);
+"""
+
+
+def mape(actual, forecast):
+    mask = actual != 0
+    if not mask.any():
+        return np.nan
+    return float(np.mean(np.abs((actual[mask] - forecast[mask]) / actual[mask])) * 100)
+
+
+def smape(actual, forecast):
+    denominator = np.abs(actual) + np.abs(forecast)
+    mask = denominator != 0
+    if not mask.any():
+        return np.nan
+    return float(np.mean(2 * np.abs(actual[mask] - forecast[mask]) / denominator[mask]) * 100)
+
+
+def mase(actual, forecast, train, season=52):
+    """
+    Mittlerer absoluter Fehler relativ zum saisonal naiven Verfahren auf den Trainingsdaten.
+    Ist die Historie kürzer als zwei Saisons, wird das naive Verfahren ohne Saison (Vorwoche) verwendet.
+    """
+    m = season if len(train) > 2 * season else 1
+    scale = np.mean(np.abs(train[m:] - train[:-m])) if len(train) > m else np.nan
+    if not scale or np.isnan(scale):
+        return np.nan
+    return float(np.mean(np.abs(actual - forecast)) / scale)
+
+
+def rolling_origins(n_obs, horizon, n_origins, step, min_train):
+    """
+    Schnittpunkte (Länge der Trainingsdaten) für die Rolling-Origin-Auswertung, der letzte endet am Datenende.
+    Ursprünge mit weniger als `min_train` Trainingsbeobachtungen entfallen.
+    """
+    last = n_obs - horizon
+    origins = [last - i * step for i in range(n_origins)]
+    return sorted(origin for origin in origins if origin >= min_train)
+
+
+def weekly_product_history(df_hist, identifiers):
+    """Produktnachfrage als Wochensummen, damit alle Modelle mit demselben Wochenraster arbeiten."""
+    df = prepare_product_data(df_hist, identifiers)
+    return df.set_index("ds")["y"].resample("W").sum().reset_index()
+
+
+def sample_sales_series(df_sales, n_series, seed=42, min_length=52):
+    """Zufällige Auswahl von Store/Dept-Zeitreihen (ds, y) mit mindestens `min_length` Wochen."""
+    counts = df_sales.groupby(["StoreID", "DeptID"]).size()
+    candidates = counts[counts >= min_length].index.to_frame(index=False)
+    sample = candidates.sample(n=min(n_series, len(candidates)), random_state=seed)
+
+    series = {}
+    for store_id, dept_id in sample.itertuples(index=False, name=None):
+        history = (df_sales[(df_sales["StoreID"] == store_id) & (df_sales["DeptID"] == dept_id)]
+                   .sort_values("Date")
+                   .rename(columns={"Date": "ds", "WeeklySales": "y"}))
+        series[f"Store {store_id} / Dept {dept_id}"] = history[["ds", "y"]].reset_index(drop=True)
+    return series
+
+
+def sample_product_series(df_hist, n_series, seed=42, min_length=52):
+    """Zufällige Auswahl von Produkt/Lager-Zeitreihen, wöchentlich aggregiert."""
+    combos = df_hist[["ProductCategory", "ProductCode", "WarehouseCode"]].drop_duplicates()
+    combos = combos.sample(frac=1.0, random_state=seed)
+
+    series = {}
+    for category, product, warehouse in combos.itertuples(index=False, name=None):
+        history = weekly_product_history(df_hist, {"ProductCategory": category, "ProductCode": product,
+                                                   "WarehouseCode": warehouse})
+        if len(history) >= min_length:
+            series[f"{product} / {warehouse}"] = history
+        if len(series) >= n_series:
+            break
+    return series
+
+
+def _backtest_series(args):
+    """Wertet ein Modell für eine Zeitreihe über alle Ursprünge aus (läuft im Worker-Prozess)."""
+    kind, name, history, model_option, horizon, n_origins, step, min_train = args
+    y = history["y"].to_numpy(dtype=float)
+
+    rows = []
+    # Ein Wurzel-Span je Zeitreihe: Anpassungen und Prognosen sind seine Kinder, gesammelte Messungen werden
+    # frühestens nach Ende der Schleife geschrieben, also nie innerhalb der Zeit- und Speichermessung
+    with span("backtest", f"{model_option}: {name}"):
+        for origin in rolling_origins(len(history), horizon, n_origins, step, min_train):
+            train = history.iloc[:origin].reset_index(drop=True)
+            actual = y[origin:origin + horizon]
+            row = {"Kind": kind, "Series": name, "Model": model_option,
+                   "Origin": train["ds"].iloc[-1].strftime("%Y-%m-%d"), "Horizon": horizon}
+
+            tracemalloc.start()
+            try:
+                start = time.perf_counter()
+                model = fit_model(train, model_option, name)
+                row["FitSeconds"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                frame = predict_frame(model, train, model_option, horizon, name)
+                row["PredictSeconds"] = time.perf_counter() - start
+
+                # Prophet liefert auch die Historie; die Prognoseschritte werden positionsweise verglichen,
+                # da die Modelle unterschiedliche Wochentage als Datum verwenden
+                forecast = frame["yhat"].to_numpy(dtype=float)[-horizon:]
+                row["MAPE"] = mape(actual, forecast)
+                row["sMAPE"] = smape(actual, forecast)
+                row["MASE"] = mase(actual, forecast, y[:origin])
+            except Exception as e:
+                row["Error"] = f"{type(e).__name__}: {e}"
+            finally:
+                row["PeakMemoryMB"] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+                tracemalloc.stop()
+
+            rows.append(row)
+    return rows
+
+
+def run_backtest(series_by_kind, models=None, horizon=12, n_origins=3, step=13, min_train=52, processes=None,
+                 progress_callback=None):
+    """
+    Rolling-Origin-Auswertung aller Zeitreihen in `series_by_kind` ({'Sales': {Name: (ds, y)}, ...}).
+    Jede Kombination aus Zeitreihe und Modell wird als eigene Aufgabe in einem Prozess-Pool berechnet.
+    progress_callback(done, total) wird nach jeder Aufgabe aufgerufen.
+
+    Die Spitzenlast des Speichers wird mit tracemalloc gemessen (Python- und NumPy-Allokationen).
+
+    Returns
+    -------
+    pd.DataFrame
+        Eine Zeile je Zeitreihe, Modell und Ursprung mit MAPE, sMAPE, MASE, Laufzeiten und Speicher.
+    """
+    models = models or BACKTEST_MODELS
+    tasks = [(kind, name, history, model_option, horizon, n_origins, step, min_train)
+             for kind, series in series_by_kind.items()
+             for name, history in series.items()
+             for model_option in models]
+
+    rows = []
+    processes = processes or multiprocessing.cpu_count()
+    with multiprocessing.Pool(processes=min(processes, max(len(tasks), 1))) as pool:
+        for i, task_rows in enumerate(pool.imap_unordered(_backtest_series, tasks)):
+            rows.extend(task_rows)
+            if progress_callback:
+                progress_callback(i + 1, len(tasks))
+        # Worker regulär beenden (statt terminate), damit sie ihre gesammelten Messungen schreiben
+        pool.close()
+        pool.join()
+
+    columns = ["Kind", "Series", "Model", "Origin", "Horizon", "MAPE", "sMAPE", "MASE", "FitSeconds",
+               "PredictSeconds", "PeakMemoryMB", "Error"]
+    return pd.DataFrame(rows).reindex(columns=columns).sort_values(["Kind", "Series", "Model", "Origin"],
+                                                                   ignore_index=True)
+
+
+def summarize_backtest(df_results):
+    """Kennzahlen je Art und Modell: Mittelwerte der Fehlermaße, Laufzeiten und Anzahl fehlgeschlagener Läufe."""
+    grouped = df_results.groupby(["Kind", "Model"])
+    summary = grouped[["MAPE", "sMAPE", "MASE", "FitSeconds", "PredictSeconds", "PeakMemoryMB"]].mean()
+    summary["Runs"] = grouped.size()
+    summary["Errors"] = grouped["Error"].count()
+    return summary.reset_index()
+
+
+def save_backtest_results(df_results, db_path="database/predictions.db", run_id=None):
+    """Hängt die Ergebnisse unter einer RunID an die Tabelle BacktestResult an und gibt die RunID zurück."""
+    run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S")
+    with write_connection(db_path) as conn:
+        conn.executescript(BACKTEST_SCHEMA)
+        df_results.assign(RunID=run_id).to_sql("BacktestResult", conn, if_exists="append", index=False)
+    return run_id
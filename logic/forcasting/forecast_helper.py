@@ -1,6 +1,8 @@
 # Zusatzfunktionen für KPIs
 import pandas as pd
 
+from logic.analysis.timing import timed
+
 
 def calculate_kpis(df):
     total = df['y'].sum()
@@ -21,6 +23,7 @@ def get_available_combinations(df_hist, df_prod, df_cat):
     return df_combos, df_products.tolist(), df_categories.tolist(), df_cat_lager
 
 
+@timed()
 def prepare_product_data(df_hist, identifiers):
     """
     Filtert df_hist nach allen in `identifiers` angegebenen Spaltenwerten
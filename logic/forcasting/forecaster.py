@@ -1,89 +1,183 @@
+import multiprocessing
+import sys
 from datetime import timedelta
+from multiprocessing.pool import ThreadPool
 
+import numpy as np
 import pandas as pd
-from pmdarima import auto_arima
-from prophet import Prophet
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
 
-import database.data_loader as data_loader
-from database.data_writer import save_sales_prophet_forecast, save_sales_arima_forecast, save_sales_hw_forecast, \
-    save_products_prophet_forecast, save_products_arima_forecast, save_products_hw_forecast
+from database.data_writer import save_forecast
+from logic.analysis.timing import series_label, span
+from logic.forcasting.backends import GLOBAL_MODEL_NAME, load_backend
 
 
-def prophet_forecast(df, periods):
-    model = Prophet()
+class ForecastModel:
+    """
+    Prognosemodell der Registry mit einheitlicher Schnittstelle und den Fähigkeiten, nach denen Batch-Läufe und
+    Seiten die Anpassungen planen.
+
+    fit(history) → angepasstes Modell, predict(model, history, periods) → DataFrame (ds, yhat, yhat_lower,
+    yhat_upper). Modelle mit `batch` werden einmal gemeinsam über alle Zeitreihen trainiert (siehe
+    hierarchy.run_global_sales_forecast) und haben kein fit/predict je Zeitreihe. `intervals` gibt an, ob das Modell
+    Prognoseintervalle liefert; `executor` ("thread" oder "process"), ob mehrere Anpassungen in Threads laufen
+    können (vektorisierte NumPy-Modelle) oder eigene Prozesse brauchen (Stan, reine Python-Schleifen).
+    """
+
+    def __init__(self, name, fit=None, predict=None, batch=False, intervals=False, executor="process"):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unbekannter Executor: {executor}")
+        self.name = name
+        self.fit = fit
+        self.predict = predict
+        self.batch = batch
+        self.intervals = intervals
+        self.executor = executor
+
+    def forecast(self, history, periods, series=None):
+        """
+        Passt das Modell an die Historie (ds, y) an und prognostiziert `periods` Wochen. Anpassung und Prognose
+        werden als Spans "fit <Modell>" bzw. "predict <Modell>" gemessen, `series` bezeichnet die Zeitreihe.
+        """
+        if self.batch:
+            raise ValueError(f"{self.name} wird gemeinsam über alle Zeitreihen trainiert, nicht je Zeitreihe.")
+        with span(f"fit {self.name}", series):
+            model = self.fit(history)
+        with span(f"predict {self.name}", series):
+            return self.predict(model, history, periods)
+
+    def save(self, frame, identifiers, table_suffix, history_end=None, future_only=False):
+        """Speichert eine Prognose dieses Modells für die Zeitreihe `identifiers`."""
+        return save_forecast(frame, identifiers, self.name, table_suffix, history_end=history_end,
+                             future_only=future_only)
+
+
+# Modellname → ForecastModel (Reihenfolge = Reihenfolge der Auswahl auf den Seiten)
+MODELS = {}
+
+
+def register_model(model):
+    """Nimmt ein Modell in die Registry auf; Seiten und Batch-Läufe bieten es danach automatisch an."""
+    MODELS[model.name] = model
+    return model
+
+
+def get_model(model_option):
+    try:
+        return MODELS[model_option]
+    except KeyError:
+        raise ValueError(f"Unbekanntes Modell: {model_option}") from None
+
+
+def available_models(batch=None):
+    """Namen aller registrierten Modelle; mit `batch=False` nur die je Zeitreihe angepassten."""
+    return [name for name, model in MODELS.items() if batch is None or model.batch == batch]
+
+
+def create_pool(model_option, processes, initializer=None, initargs=()):
+    """Worker-Pool passend zum Modell: Threads für thread-sichere Modelle, sonst Prozesse."""
+    pool_class = ThreadPool if get_model(model_option).executor == "thread" else multiprocessing.Pool
+    return pool_class(processes=processes, initializer=initializer, initargs=initargs)
+
+
+def prophet_fit(df):
+    model = load_backend("Prophet").Prophet()
     model.fit(df)
+    return model
+
+
+def prophet_predict(model, history, periods):
+    # Prophet liefert auch die In-Sample-Werte der Historie
     future = model.make_future_dataframe(periods=periods, freq='W')
-    forecast = model.predict(future)
-    return forecast
+    return model.predict(future)[["ds", "yhat", "yhat_lower", "yhat_upper"]]
 
 
-def arima_forecast(df, periods):
-    df = df.set_index("ds")
-    model = auto_arima(df["y"], seasonal=True, m=52)
+def arima_fit(df):
+    return load_backend("ARIMA").auto_arima(df.set_index("ds")["y"], seasonal=True, m=52)
+
+
+def arima_predict(model, history, periods):
     forecast, conf = model.predict(n_periods=periods, return_conf_int=True)
-    future_index = pd.date_range(df.index[-1], periods=periods, freq="W")
-    return forecast, future_index, conf
+    future_index = pd.date_range(history["ds"].iloc[-1], periods=periods, freq="W")
+    return pd.DataFrame({"ds": future_index, "yhat": np.asarray(forecast), "yhat_lower": conf[:, 0],
+                         "yhat_upper": conf[:, 1]})
 
 
-def holt_winters_forecast(df, periods):
+def holt_winters_fit(df):
     df = df.set_index("ds")
-    model = ExponentialSmoothing(
+    return load_backend("Holt-Winters").ExponentialSmoothing(
         df['y'],
         trend='additive',
         seasonal='additive',
         seasonal_periods=20,
         damped_trend=True
     ).fit()
+
+
+def holt_winters_predict(model, history, periods):
     forecast = model.forecast(periods)
-    future_dates = [df.index.max() + timedelta(weeks=i) for i in range(1, periods + 1)]
-    return forecast.values, future_dates
-
-
-def run_sales_forecast(history, model_option, store_id, dept_id, periods):
-    data = None
-    if model_option == "Prophet":
-        forcast = prophet_forecast(history, periods)
-        data = save_sales_prophet_forecast(forcast, store_id, dept_id)
-    elif model_option == "ARIMA":
-        forecast, future_index, conf = arima_forecast(history, periods)
-        data = save_sales_arima_forecast(forecast, future_index, store_id, dept_id, conf_int=conf)
-    elif model_option == "Holt-Winters":
-        forecast, future_index = holt_winters_forecast(history, periods)
-        data = save_sales_hw_forecast(forecast, future_index, store_id, dept_id)
+    future_dates = [history["ds"].max() + timedelta(weeks=i) for i in range(1, periods + 1)]
+    return pd.DataFrame({"ds": pd.to_datetime(future_dates), "yhat": forecast.values, "yhat_lower": None,
+                         "yhat_upper": None})
+
+
+register_model(ForecastModel("Prophet", prophet_fit, prophet_predict, intervals=True, executor="process"))
+register_model(ForecastModel("ARIMA", arima_fit, arima_predict, intervals=True, executor="process"))
+register_model(ForecastModel("Holt-Winters", holt_winters_fit, holt_winters_predict, executor="thread"))
+# Globales Modell (global_model.fit_predict_global): ein Training für alle Zeitreihen
+register_model(ForecastModel(GLOBAL_MODEL_NAME, batch=True, executor="thread"))
+
+
+def fit_model(history, model_option, series=None):
+    """Passt ein Modell an die Historie (ds, y) an, ohne zu prognostizieren."""
+    with span(f"fit {model_option}", series):
+        return get_model(model_option).fit(history)
+
+
+def predict_frame(model, history, model_option, periods, series=None):
+    """Prognose eines angepassten Modells einheitlich als DataFrame (ds, yhat, yhat_lower, yhat_upper)."""
+    with span(f"predict {model_option}", series):
+        return get_model(model_option).predict(model, history, periods)
+
+
+def forecast_frame(history, model_option, periods, series=None):
+    """Führt ein Modell aus und liefert die Prognose einheitlich als DataFrame (ds, yhat, yhat_lower, yhat_upper)."""
+    return get_model(model_option).forecast(history, periods, series)
+
+
+def clear_forecast_cache():
+    # Der Streamlit-Cache existiert nur, wenn die Lade-Funktionen in diesem Prozess importiert wurden (nicht im Batch)
+    data_loader = sys.modules.get("database.data_loader")
+    if data_loader is None:
+        return
 
-    # Clear cache
     data_loader.load_forecast_data.clear()
     data_loader.load_full_forecast_data.clear()
     data_loader.load_multi_forecast_data.clear()
+
+
+def run_sales_forecast(history, model_option, store_id, dept_id, periods, future_only=False):
+    model = get_model(model_option)
+    identifiers = {"StoreID": store_id, "DeptID": dept_id}
+    data = model.save(model.forecast(history, periods, series_label(identifiers)), identifiers, "_Sales",
+                      history_end=history["ds"].max(), future_only=future_only)
+
+    # Clear cache
+    clear_forecast_cache()
     return data
 
 
-def run_products_forecast(history, model_option, periods, wh_code=None, prod_code=None, cat_code=None):
-    data = None
-    if model_option == "Prophet":
-        forcast = prophet_forecast(history, periods)
-        data = save_products_prophet_forecast(forcast, wh_code, prod_code, cat_code)
-    elif model_option == "ARIMA":
-        forecast, future_index, conf = arima_forecast(history, periods)
-        data = save_products_arima_forecast(forecast, future_index, wh_code, prod_code, cat_code, conf_int=conf)
-    elif model_option == "Holt-Winters":
-        forecast, future_index = holt_winters_forecast(history, periods)
-        data = save_products_hw_forecast(forecast, future_index, wh_code, prod_code, cat_code)
+def run_products_forecast(history, model_option, periods, wh_code=None, prod_code=None, cat_code=None,
+                          future_only=False):
+    model = get_model(model_option)
+    identifiers = {"ProductCategory": cat_code, "ProductCode": prod_code, "WarehouseCode": wh_code}
+    data = model.save(model.forecast(history, periods, series_label(identifiers)), identifiers, "_Products",
+                      history_end=history["ds"].max(), future_only=future_only)
 
     # Clear cache
-    data_loader.load_forecast_data.clear()
-    data_loader.load_full_forecast_data.clear()
-    data_loader.load_multi_forecast_data.clear()
+    clear_forecast_cache()
     return data
 
 
 def generate_sales_forecasts(df, periods, model_choices, store_id, dept_id=-1):
-    forecasts = {}
-    if "Prophet" in model_choices:
-        forecasts['Prophet'] = run_sales_forecast(df.copy(), "Prophet", store_id, dept_id, periods)
-    if "ARIMA" in model_choices:
-        forecasts['ARIMA'] = run_sales_forecast(df.copy(), "ARIMA", store_id, dept_id, periods)
-    if "Holt-Winters" in model_choices:
-        forecasts['Holt-Winters'] = run_sales_forecast(df.copy(), "Holt-Winters", store_id, dept_id, periods)
-    return forecasts
+    return {model_option: run_sales_forecast(df.copy(), model_option, store_id, dept_id, periods)
+            for model_option in available_models(batch=False) if model_option in model_choices}
@@ -0,0 +1,139 @@
+# Globales Prognosemodell: ein Gradient-Boosting-Modell für alle Store/Dept-Zeitreihen gemeinsam
+import numpy as np
+import pandas as pd
+
+from logic.analysis.timing import timed
+from logic.forcasting.backends import GLOBAL_MODEL_NAME, load_backend
+
+# Verzögerungen in Wochen (52 = Vorjahreswoche)
+LAGS = [1, 2, 3, 4, 8, 13, 26, 52]
+
+# Kovariaten aus StoreFeature (fehlende Werte verarbeitet das Modell nativ)
+COVARIATES = ["Temperature", "FuelPrice", "CPI", "Unemployment",
+              "MarkDown1", "MarkDown2", "MarkDown3", "MarkDown4", "MarkDown5"]
+
+FEATURE_NAMES = ([f"lag_{lag}" for lag in LAGS] + ["rolling_mean_4", "week", "month", "holiday_week", "StoreID",
+                                                     "DeptID"] + COVARIATES)
+
+
+def build_panel(df_sales, min_length=10):
+    """
+    Wandelt die Verkaufsdaten in eine Matrix (Zeitreihe × Woche) auf einem lückenlosen Wochenraster um.
+    Zeitreihen mit weniger als `min_length` Beobachtungen werden verworfen.
+    """
+    wide = df_sales.pivot_table(index=["StoreID", "DeptID"], columns="Date", values="WeeklySales", aggfunc="sum")
+    wide = wide[wide.notna().sum(axis=1) >= min_length]
+    grid = pd.date_range(wide.columns.min(), wide.columns.max(), freq="7D")
+    return wide.reindex(columns=grid)
+
+
+def _calendar(dates, holiday_weeks):
+    iso_weeks = dates.isocalendar().week.to_numpy().astype(float)
+    return {
+        "week": iso_weeks,
+        "month": dates.month.to_numpy().astype(float),
+        "holiday_week": np.isin(iso_weeks, list(holiday_weeks)).astype(float),
+    }
+
+
+def _covariate_arrays(df_features, store_ids, dates):
+    """Kovariaten je Store und Woche; über die bekannten Daten hinaus wird der letzte Wert fortgeschrieben."""
+    arrays = []
+    for col in COVARIATES:
+        if df_features is None or col not in df_features.columns:
+            arrays.append(np.full((len(store_ids), len(dates)), np.nan))
+            continue
+        wide = df_features.pivot_table(index="StoreID", columns="Date", values=col, aggfunc="mean")
+        wide = wide.reindex(index=store_ids, columns=wide.columns.union(dates)).ffill(axis=1)
+        arrays.append(wide.reindex(columns=dates).to_numpy(dtype=float))
+    return arrays
+
+
+def _features_at(values, t, context):
+    """Merkmalsmatrix aller Zeitreihen für die Spalte `t` des Wochenrasters (ein Eintrag je Zeitreihe)."""
+    n_series = values.shape[0]
+    nan_col = np.full(n_series, np.nan)
+
+    lags = [values[:, t - lag] if t - lag >= 0 else nan_col for lag in LAGS]
+    recent = np.column_stack(lags[:4])
+    count = np.sum(~np.isnan(recent), axis=1)
+    rolling = np.where(count > 0, np.nansum(recent, axis=1) / np.maximum(count, 1), np.nan)
+
+    calendar = [np.full(n_series, context["calendar"][name][t]) for name in ["week", "month", "holiday_week"]]
+    covariates = [arr[context["store_index"], t] for arr in context["covariates"]]
+
+    return np.column_stack(lags + [rolling] + calendar + [context["store_ids"], context["dept_ids"]] + covariates)
+
+
+def _build_context(wide, df_features, dates):
+    series_stores = wide.index.get_level_values("StoreID").to_numpy()
+    store_ids = np.unique(series_stores)
+
+    holiday_weeks = set()
+    if df_features is not None and "IsHoliday" in df_features.columns:
+        holiday_dates = pd.DatetimeIndex(df_features.loc[df_features["IsHoliday"].astype(bool), "Date"].unique())
+        holiday_weeks = set(holiday_dates.isocalendar().week.astype(int))
+
+    return {
+        "store_ids": series_stores.astype(float),
+        "dept_ids": wide.index.get_level_values("DeptID").to_numpy().astype(float),
+        "store_index": np.searchsorted(store_ids, series_stores),
+        "calendar": _calendar(dates, holiday_weeks),
+        "covariates": _covariate_arrays(df_features, store_ids, dates),
+    }
+
+
+@timed(f"fit_predict {GLOBAL_MODEL_NAME}")
+def fit_predict_global(df_sales, df_features, periods, min_length=10, max_iter=300, random_state=42):
+    """
+    Trainiert ein Modell über alle Zeitreihen und prognostiziert `periods` Wochen rekursiv.
+    Je Prognoseschritt werden alle Zeitreihen mit einem einzigen, vektorisierten predict-Aufruf berechnet.
+
+    Die Zielgröße wird je Zeitreihe auf ihren mittleren Absolutumsatz skaliert, damit große und kleine
+    Departments gemeinsam gelernt werden können.
+
+    Returns
+    -------
+    pd.DataFrame
+        Spalten StoreID, DeptID, ds, yhat, yhat_lower, yhat_upper (Intervalle werden nicht geschätzt).
+    """
+    wide = build_panel(df_sales, min_length)
+    hist_dates = wide.columns
+    future_dates = pd.date_range(hist_dates[-1], periods=periods + 1, freq="7D")[1:]
+    dates = hist_dates.append(future_dates)
+
+    scale = np.maximum(np.nanmean(np.abs(wide.to_numpy(dtype=float)), axis=1), 1.0)
+    values = np.full((len(wide), len(dates)), np.nan)
+    values[:, :len(hist_dates)] = wide.to_numpy(dtype=float) / scale[:, np.newaxis]
+
+    context = _build_context(wide, df_features, dates)
+
+    # Trainingsdaten: jede beobachtete Woche jeder Zeitreihe mit ihren Merkmalen
+    X_train, y_train = [], []
+    for t in range(1, len(hist_dates)):
+        observed = ~np.isnan(values[:, t])
+        if observed.any():
+            X_train.append(_features_at(values, t, context)[observed])
+            y_train.append(values[observed, t])
+
+    X_train = np.vstack(X_train)
+
+    # Merkmale ohne Information (z.B. komplett fehlende MarkDowns) verwerfen
+    usable = np.array([np.unique(col[~np.isnan(col)]).size > 1 for col in X_train.T])
+    categorical = [name in ("StoreID", "DeptID") for name, use in zip(FEATURE_NAMES, usable) if use]
+
+    ensemble = load_backend(GLOBAL_MODEL_NAME)
+    model = ensemble.HistGradientBoostingRegressor(max_iter=max_iter, categorical_features=categorical,
+                                                   random_state=random_state)
+    model.fit(X_train[:, usable], np.concatenate(y_train))
+
+    # Rekursive Prognose: Vorhersagen dienen als Verzögerungen der folgenden Schritte
+    for t in range(len(hist_dates), len(dates)):
+        values[:, t] = model.predict(_features_at(values, t, context)[:, usable])
+
+    forecast = values[:, len(hist_dates):] * scale[:, np.newaxis]
+    df_forecast = pd.DataFrame(forecast, index=wide.index, columns=future_dates)
+    df_forecast = df_forecast.rename_axis(columns="ds").stack().rename("yhat").reset_index()
+    df_forecast["yhat_lower"] = None
+    df_forecast["yhat_upper"] = None
+    return df_forecast
@@ -0,0 +1,252 @@
+# Hierarchische Prognose: Store-Gesamtumsatz (DeptID = -1) als Summe der Department-Prognosen
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from database.data_writer import write_forecast
+from logic.analysis.timing import series_label
+from logic.forcasting.forecaster import create_pool, forecast_frame, clear_forecast_cache, get_model
+from logic.forcasting.global_model import GLOBAL_MODEL_NAME, fit_predict_global
+
+# Auswahl in der Oberfläche → Abgleichsverfahren (None = reines Bottom-Up)
+RECONCILIATION_METHODS = {
+    "Bottom-Up": None,
+    "OLS": "ols",
+    "MinT (Varianz-Skalierung)": "mint",
+}
+
+STORE_TOTAL_DEPT_ID = -1
+
+
+def get_department_histories(df_sales, store_id, min_length=10):
+    """Zeitreihen (ds, y) aller Departments eines Stores; zu kurze Reihen werden übersprungen."""
+    df_store = df_sales[df_sales["StoreID"] == store_id]
+
+    histories = {}
+    for dept_id, df_dept in df_store.groupby("DeptID"):
+        history = (df_dept[["Date", "WeeklySales"]]
+                   .sort_values("Date")
+                   .rename(columns={"Date": "ds", "WeeklySales": "y"})
+                   .reset_index(drop=True))
+        if len(history) >= min_length:
+            histories[int(dept_id)] = history
+    return histories
+
+
+def get_store_history(histories):
+    """Store-Gesamtumsatz als Summe der Department-Reihen je Datum."""
+    df_all = pd.concat(histories.values(), ignore_index=True)
+    return df_all.groupby("ds", as_index=False)["y"].sum()
+
+
+def _fit_series(args):
+    series_id, history, model_option, periods, label = args
+    return series_id, forecast_frame(history, model_option, periods, label)
+
+
+def fit_forecasts(histories, model_option, periods, parallel=True, progress_callback=None, store_id=None):
+    """
+    Passt das Modell für alle Zeitreihen in `histories` an (bei `parallel` in einem Thread- oder Prozess-Pool, je
+    nach Modell).
+    progress_callback(series_id, done, total) wird nach jeder Anpassung aufgerufen; `store_id` ergänzt nur die
+    Bezeichnung der Zeitreihen in den Messungen.
+    """
+    args = [(series_id, history, model_option, periods,
+             series_label({"StoreID": store_id, "DeptID": series_id}))
+            for series_id, history in histories.items()]
+    results = {}
+
+    def collect(series_id, frame):
+        results[series_id] = frame
+        if progress_callback:
+            progress_callback(series_id, len(results), len(args))
+
+    if parallel and len(args) > 1:
+        with create_pool(model_option, min(len(args), multiprocessing.cpu_count())) as pool:
+            for series_id, frame in pool.imap_unordered(_fit_series, args):
+                collect(series_id, frame)
+            # Worker regulär beenden (statt terminate), damit sie ihre gesammelten Messungen schreiben
+            pool.close()
+            pool.join()
+    else:
+        for arg in args:
+            collect(*_fit_series(arg))
+
+    return results
+
+
+def summing_matrix(n_bottom):
+    """Summationsmatrix S für zwei Ebenen: erste Zeile = Store-Summe, danach Einheitsmatrix der Departments."""
+    return np.vstack([np.ones((1, n_bottom)), np.eye(n_bottom)])
+
+
+def reconcile(base_top, base_bottom, method="ols", variances=None):
+    """
+    Abgleich der Basisprognosen beider Ebenen: y_tilde = S G y_hat mit G = (S' W⁻¹ S)⁻¹ S' W⁻¹.
+
+    Parameters
+    ----------
+    base_top : np.ndarray
+        Basisprognose der Store-Summe, Form (T,).
+    base_bottom : np.ndarray
+        Basisprognosen der Departments, Form (n, T).
+    method : str
+        'ols' (W = I) oder 'mint' (W = diag(variances), diagonale MinT-Schätzung).
+    variances : np.ndarray
+        Varianzen je Reihe in der Reihenfolge [Store, Departments...], nur für 'mint'.
+
+    Returns
+    -------
+    np.ndarray
+        Abgeglichene Department-Prognosen, Form (n, T). Die Store-Summe ergibt sich per Summation.
+    """
+    n_bottom = base_bottom.shape[0]
+    S = summing_matrix(n_bottom)
+    y_hat = np.vstack([base_top[np.newaxis, :], base_bottom])
+
+    if method == "ols":
+        w_inv = np.ones(n_bottom + 1)
+    elif method == "mint":
+        w_inv = 1.0 / np.maximum(np.asarray(variances, dtype=float), 1e-9)
+    else:
+        raise ValueError(f"Unbekanntes Abgleichsverfahren: {method}")
+
+    G = np.linalg.solve(S.T @ (w_inv[:, np.newaxis] * S), S.T * w_inv)
+    return G @ y_hat
+
+
+def run_hierarchical_sales_forecast(df_sales, model_option, store_id, periods, reconciliation=None, parallel=True,
+                                    future_only=False, progress_callback=None, df_features=None,
+                                    db_path="database/predictions.db"):
+    """
+    Prognostiziert alle Departments eines Stores und leitet daraus den Store-Gesamtumsatz ab.
+
+    Ohne `reconciliation` (Bottom-Up) wird nur je Department ein Modell angepasst. Bei 'ols' oder 'mint' wird
+    zusätzlich die Store-Summe einmal direkt prognostiziert und beide Ebenen werden abgeglichen, sodass sich die
+    gespeicherten Department-Prognosen wieder exakt zur Store-Prognose aufsummieren.
+    Batch-Modelle (das globale Modell) werden einmal über alle Zeitreihen trainiert und immer Bottom-Up aggregiert.
+
+    Returns
+    -------
+    (pd.DataFrame, dict, int)
+        Store-Prognose, Department-Prognosen je DeptID und Anzahl der Modellanpassungen.
+    """
+    if get_model(model_option).batch:
+        results = run_global_sales_forecast(df_sales, df_features, periods, [store_id], future_only, db_path=db_path)
+        store_frame, dept_frames = results.get(store_id, (pd.DataFrame(), {}))
+        return store_frame, dept_frames, 1
+
+    histories = get_department_histories(df_sales, store_id)
+    if not histories:
+        return pd.DataFrame(), {}, 0
+
+    series = dict(histories)
+    if reconciliation:
+        series[STORE_TOTAL_DEPT_ID] = get_store_history(histories)
+    frames = fit_forecasts(series, model_option, periods, parallel, progress_callback, store_id)
+    n_fits = len(frames)
+    base_top = frames.pop(STORE_TOTAL_DEPT_ID, None)
+
+    store_frame, dept_frames = save_store_hierarchy(store_id, histories, frames, model_option, reconciliation,
+                                                    base_top, future_only, db_path)
+    clear_forecast_cache()
+    return store_frame, dept_frames, n_fits
+
+
+def run_global_sales_forecast(df_sales, df_features, periods, store_ids=None, future_only=False,
+                              progress_callback=None, db_path="database/predictions.db"):
+    """
+    Trainiert das globale Modell einmal über alle Store/Dept-Zeitreihen und speichert Department- und
+    Store-Prognosen (Bottom-Up) für `store_ids` (alle Stores, falls None).
+    progress_callback(store_id, done, total) wird nach jedem gespeicherten Store aufgerufen.
+
+    Returns
+    -------
+    dict
+        StoreID → (Store-Prognose, Department-Prognosen je DeptID)
+    """
+    df_forecast = fit_predict_global(df_sales, df_features, periods)
+    if store_ids is None:
+        store_ids = sorted(df_forecast["StoreID"].unique())
+
+    results = {}
+    for i, store_id in enumerate(store_ids):
+        histories = get_department_histories(df_sales, store_id)
+        df_store = df_forecast[df_forecast["StoreID"] == store_id]
+        frames = {
+            int(dept_id): df_dept[["ds", "yhat", "yhat_lower", "yhat_upper"]].reset_index(drop=True)
+            for dept_id, df_dept in df_store.groupby("DeptID") if int(dept_id) in histories
+        }
+        if frames:
+            results[store_id] = save_store_hierarchy(store_id, histories, frames, GLOBAL_MODEL_NAME,
+                                                     future_only=future_only, db_path=db_path)
+        if progress_callback:
+            progress_callback(store_id, i + 1, len(store_ids))
+
+    clear_forecast_cache()
+    return results
+
+
+def save_store_hierarchy(store_id, histories, frames, model_option, reconciliation=None, base_top=None,
+                         future_only=False, db_path="database/predictions.db"):
+    """
+    Gleicht die Department-Prognosen eines Stores optional mit der Basisprognose der Store-Summe ab und
+    speichert beide Ebenen (Store-Summe unter DeptID -1).
+
+    Returns
+    -------
+    (pd.DataFrame, dict)
+        Store-Prognose und Department-Prognosen je DeptID.
+    """
+    history_ends = {dept_id: history["ds"].max() for dept_id, history in histories.items()}
+    store_history = get_store_history(histories)
+    store_end = store_history["ds"].max()
+
+    # Zukunftswerte je Department als Matrix (Datum × Department); fehlende Werte zählen als 0
+    dept_ids = sorted(frames)
+    future = pd.concat(
+        [frames[d].assign(DeptID=d) for d in dept_ids], ignore_index=True
+    )
+    future["ds"] = pd.to_datetime(future["ds"])
+    future = future[future["ds"] > future["DeptID"].map(history_ends)]
+    yhat = future.pivot_table(index="ds", columns="DeptID", values="yhat", aggfunc="sum").reindex(
+        columns=dept_ids).fillna(0.0)
+
+    reconciled = yhat.copy()
+    if reconciliation and base_top is not None and not yhat.empty:
+        top = base_top.assign(ds=pd.to_datetime(base_top["ds"])).set_index("ds")["yhat"]
+        # Wo keine Basisprognose der Summe vorliegt, bleibt es beim Bottom-Up-Wert
+        top = top.reindex(yhat.index).fillna(yhat.sum(axis=1))
+        variances = None
+        if reconciliation == "mint":
+            variances = np.nan_to_num([store_history["y"].var()] + [histories[d]["y"].var() for d in dept_ids])
+        reconciled.loc[:, :] = reconcile(top.to_numpy(), yhat.to_numpy().T, reconciliation, variances).T
+
+    # Department-Prognosen speichern (abgeglichene Werte inkl. verschobener Intervalle)
+    dept_frames = {}
+    for dept_id in dept_ids:
+        frame = frames[dept_id].copy()
+        frame["ds"] = pd.to_datetime(frame["ds"])
+        if reconciliation:
+            delta = (reconciled[dept_id] - yhat[dept_id]).reindex(frame["ds"]).fillna(0.0).to_numpy()
+            frame["yhat"] = frame["yhat"] + delta
+            for col in ["yhat_lower", "yhat_upper"]:
+                if frame[col].notna().any():
+                    frame[col] = frame[col] + delta
+        if future_only:
+            frame = frame[frame["ds"] > history_ends[dept_id]]
+        dept_frames[dept_id] = frame
+        write_forecast(frame.copy(), {"StoreID": int(store_id), "DeptID": dept_id}, model_option, "_Sales",
+                       db_path, history_end=history_ends[dept_id])
+
+    # Store-Summe: In-Sample-Werte (z.B. Prophet) und Zukunftswerte werden summiert.
+    # Intervalle lassen sich nicht additiv aggregieren und werden daher nicht gespeichert.
+    all_rows = pd.concat(dept_frames.values(), ignore_index=True)
+    store_frame = all_rows.groupby("ds", as_index=False)["yhat"].sum()
+    store_frame["yhat_lower"] = None
+    store_frame["yhat_upper"] = None
+    write_forecast(store_frame.copy(), {"StoreID": int(store_id), "DeptID": STORE_TOTAL_DEPT_ID}, model_option,
+                   "_Sales", db_path, history_end=store_end)
+
+    return store_frame, dept_frames
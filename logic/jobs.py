@@ -0,0 +1,140 @@
+# Hintergrund-Aufträge: Worker-Prozesse arbeiten die Job-Tabelle in predictions.db ab.
+# Start (optional, die App startet bei Bedarf selbst einen Worker):
+#   python -m logic.jobs --workers 2
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+from database.job_queue import claim_job, count_live_workers, ensure_job_schema, finish_job, heartbeat, \
+    requeue_stale_jobs, unregister_worker, update_job_progress
+
+# Sekunden zwischen zwei Heartbeats bzw. Fortschritts-Schreibvorgängen eines Workers
+HEARTBEAT_INTERVAL = 15
+PROGRESS_INTERVAL = 1.0
+
+# Ohne neue Aufträge beendet sich ein Worker nach dieser Zeit (Sekunden)
+IDLE_TIMEOUT = 600
+
+_last_spawn = None
+
+
+def _progress_writer(job_id, db_path):
+    """Fortschritts-Callback für die Batch-Funktionen, schreibt höchstens einmal je PROGRESS_INTERVAL."""
+    last_write = 0.0
+
+    def report(done, total, message):
+        nonlocal last_write
+        now = time.monotonic()
+        if now - last_write >= PROGRESS_INTERVAL or done >= total:
+            update_job_progress(job_id, done / total if total else 0.0, message, db_path)
+            last_write = now
+
+    return report
+
+
+def run_forecast_job(params, progress_callback, db_path):
+    # Import erst hier, damit der Worker-Start schnell bleibt
+    from logic.batch import run_forecasts
+    run_forecasts(params["models"], params.get("stores"), params.get("periods", 104), params.get("reconciliation"),
+                  params.get("processes"), predictions_db_path=db_path, progress_callback=progress_callback)
+    return {"models": params["models"]}
+
+
+def run_optimization_job(params, progress_callback, db_path):
+    from logic.batch import run_optimization
+    run_id = run_optimization(params["params"], params.get("stores"), params.get("depts"), params.get("processes"),
+                              predictions_db_path=db_path, progress_callback=progress_callback, source="job")
+    return {"run_id": run_id}
+
+
+# Auftragsart → Funktion(params, progress_callback, db_path) → Ergebnis (JSON-serialisierbar)
+JOB_HANDLERS = {
+    "forecast": run_forecast_job,
+    "optimize": run_optimization_job,
+}
+
+
+def _heartbeat_loop(stop_event, db_path):
+    while not stop_event.wait(HEARTBEAT_INTERVAL):
+        heartbeat(db_path)
+
+
+def run_job(job, db_path="database/predictions.db"):
+    job_id = job["JobID"]
+    try:
+        result = JOB_HANDLERS[job["Kind"]](job["Params"], _progress_writer(job_id, db_path), db_path)
+        finish_job(job_id, result=result, db_path=db_path)
+    except Exception as e:
+        traceback.print_exc()
+        finish_job(job_id, error=f"{type(e).__name__}: {e}", db_path=db_path)
+
+
+def run_worker(db_path="database/predictions.db", idle_timeout=IDLE_TIMEOUT, poll_interval=1.0):
+    """
+    Arbeitet wartende Aufträge nacheinander ab, bis `idle_timeout` Sekunden lang kein Auftrag kam.
+    Ein Hintergrund-Thread hält den Heartbeat auch während langer Aufträge aktuell.
+    """
+    heartbeat(db_path)
+    stop_event = threading.Event()
+    threading.Thread(target=_heartbeat_loop, args=(stop_event, db_path), daemon=True).start()
+
+    idle_since = time.monotonic()
+    try:
+        while time.monotonic() - idle_since < idle_timeout:
+            requeue_stale_jobs(db_path)
+            job = claim_job(db_path)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+
+            print(f"[Worker {os.getpid()}] Auftrag {job['JobID']} ({job['Kind']}) gestartet", flush=True)
+            run_job(job, db_path)
+            print(f"[Worker {os.getpid()}] Auftrag {job['JobID']} beendet", flush=True)
+            idle_since = time.monotonic()
+    finally:
+        stop_event.set()
+        unregister_worker(db_path)
+
+
+def run_worker_pool(workers=1, db_path="database/predictions.db", idle_timeout=IDLE_TIMEOUT):
+    """Startet `workers` Worker-Prozesse (nicht als Daemon, damit Aufträge selbst Prozess-Pools nutzen dürfen)."""
+    ensure_job_schema(db_path)
+    processes = [multiprocessing.Process(target=run_worker, args=(db_path, idle_timeout)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def ensure_workers(workers=1, db_path="database/predictions.db"):
+    """
+    Startet einen losgelösten Worker-Pool, falls kein Worker aktiv ist. Der Pool läuft unabhängig vom
+    Streamlit-Prozess weiter, sodass Aufträge ein Neuladen der Seite überstehen. Er nutzt dasselbe
+    Arbeitsverzeichnis wie die App, damit die relativen Datenbankpfade gleich aufgelöst werden.
+    """
+    global _last_spawn
+    recently_spawned = _last_spawn is not None and time.monotonic() - _last_spawn < 30
+    if recently_spawned or count_live_workers(db_path) > 0:
+        return False
+
+    with open("jobs.log", "a") as log_file:
+        subprocess.Popen([sys.executable, "-m", "logic.jobs", "--workers", str(workers), "--db", str(db_path)],
+                         stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True)
+    _last_spawn = time.monotonic()
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker für Hintergrund-Aufträge (Prognosen, Optimierungen).")
+    parser.add_argument("--workers", type=int, default=1, help="Anzahl Worker-Prozesse")
+    parser.add_argument("--db", default="database/predictions.db", help="Pfad zur predictions.db (Job-Tabelle)")
+    parser.add_argument("--idle-timeout", type=int, default=IDLE_TIMEOUT,
+                        help="Sekunden ohne Auftrag, nach denen sich ein Worker beendet")
+    args = parser.parse_args()
+
+    run_worker_pool(args.workers, args.db, args.idle_timeout)
@@ -0,0 +1,220 @@
+# Gekoppelte Optimierung über mehrere Stores: globales Promotion-Budget und maximale Anzahl Promotionen je Woche.
+# Die koppelnden Nebenbedingungen werden per Lagrange-Relaxation in die Zielfunktionen der einzelnen Store/Dept-
+# Modelle verschoben (Subgradientenverfahren), die Teilprobleme bleiben unabhängig und laufen parallel.
+import math
+import multiprocessing
+from collections import defaultdict
+
+import pandas as pd
+import pulp
+
+from logic.analysis.timing import series_label, span
+from logic.optimization.helper import create_solver, plan_parallelism, report_status
+from logic.optimization.optimizations import build_promotion_model, compute_model_inputs, create_data_row, \
+    holiday_dates, prepare_weekly_sales, simulate_boost
+
+# Modell-Eingaben je Paar in den Worker-Prozessen (einmal per Initializer übergeben)
+_worker_inputs = None
+
+
+def _init_coupled_worker(pair_inputs):
+    global _worker_inputs
+    _worker_inputs = pair_inputs
+
+
+def _solve_penalized_pair(task):
+    """Löst das Teilproblem eines Paares mit Strafkosten je Promotion → (Paar, x, Zielfunktionswert, Status)."""
+    pair, penalty, dynamics, solver_timeout, threads = task
+    sorted_keys, base_sales, boost_potential, promo_cost = _worker_inputs[pair]
+    label = series_label({"StoreID": pair[0], "DeptID": pair[1]})
+    with span("milp.build", label):
+        model, x, _ = build_promotion_model(sorted_keys, base_sales, boost_potential, promo_cost, x_penalty=penalty,
+                                            **dynamics)
+    with span("milp.solve", label):
+        model.solve(create_solver(solver_timeout=solver_timeout, threads=threads))
+    x_values = {key: round(x[key].varValue or 0) for key in sorted_keys}
+    return pair, x_values, pulp.value(model.objective) or 0.0, pulp.LpStatus[model.status]
+
+
+def promotion_gains(pair_inputs, x_by_pair, dynamics):
+    """Netto-Gewinn jeder geplanten Promotion {Woche: Gewinn} nach der Boost-Dynamik des Plans."""
+    gains = {}
+    for pair, x_values in x_by_pair.items():
+        sorted_keys, base_sales, boost_potential, promo_cost = pair_inputs[pair]
+        boost_values = simulate_boost(sorted_keys, x_values, **dynamics)
+        for key in sorted_keys:
+            if x_values[key]:
+                gains[key] = base_sales[key] * boost_values[key] * boost_potential[key] - promo_cost[key]
+    return gains
+
+
+def repair_schedule(pair_inputs, x_by_pair, dynamics, budget=None, weekly_capacity=None):
+    """
+    Macht einen Plan zulässig: streicht Promotionen ohne Gewinn, in überbuchten Wochen die schwächsten und
+    anschließend bis zum Budget die mit dem geringsten Gewinn je Kosteneinheit.
+    """
+    x_by_pair = {pair: dict(x_values) for pair, x_values in x_by_pair.items()}
+    promo_cost = {key: cost for inputs in pair_inputs.values() for key, cost in inputs[3].items()}
+    gains = promotion_gains(pair_inputs, x_by_pair, dynamics)
+
+    def drop(key):
+        x_by_pair[(key[0], key[1])][key] = 0
+        del gains[key]
+
+    for key in [key for key, gain in gains.items() if gain <= 0]:
+        drop(key)
+
+    if weekly_capacity:
+        by_week = defaultdict(list)
+        for key in gains:
+            by_week[(key[2], key[3])].append(key)
+        for keys in by_week.values():
+            for key in sorted(keys, key=gains.get)[:max(0, len(keys) - weekly_capacity)]:
+                drop(key)
+
+    if budget is not None:
+        spend = sum(promo_cost[key] for key in gains)
+        for key in sorted(gains, key=lambda k: gains[k] / promo_cost[k] if promo_cost[k] else math.inf):
+            if spend <= budget:
+                break
+            spend -= promo_cost[key]
+            drop(key)
+
+    return x_by_pair
+
+
+def _violations(pair_inputs, x_by_pair, budget, weekly_capacity):
+    spend = 0.0
+    week_counts = defaultdict(int)
+    for pair, x_values in x_by_pair.items():
+        promo_cost = pair_inputs[pair][3]
+        for key, value in x_values.items():
+            if value:
+                spend += promo_cost[key]
+                week_counts[(key[2], key[3])] += 1
+    return spend, week_counts
+
+
+def run_coupled_promotion_optimization(df_sales, df_features,
+                                       budget=None,
+                                       weekly_capacity=None,
+                                       boost_max=0.15,
+                                       decay_factor=0.5,
+                                       recovery_rate=0.05,
+                                       cost_rate=0.05,
+                                       solver_timeout=150,
+                                       iterations=10,
+                                       step_size=1.0,
+                                       processes=None,
+                                       ui_status=None,
+                                       progress_callback=None):
+    """
+    Optimiert alle Store/Dept-Paare gemeinsam unter einem Gesamtbudget für Promo-Kosten (`budget`) und höchstens
+    `weekly_capacity` Promotionen je Kalenderwoche über alle Paare. Je Iteration werden die Teilprobleme mit den
+    aktuellen Multiplikatoren (Budget: Aufschlag auf die Promo-Kosten, Woche: Betrag je Promotion) parallel
+    gelöst, die Multiplikatoren per Subgradient angepasst und der Plan gierig zulässig gemacht.
+    progress_callback(iteration, iterations, info) wird nach jeder Iteration aufgerufen.
+
+    Returns
+    -------
+    (pd.DataFrame, list, pd.DataFrame)
+        Beste zulässige Lösung und Status je Paar wie bei run_promotion_sales_optimization_all sowie der Verlauf
+        (Multiplikatoren, Ausgaben, Schranke und zulässiger Zielwert je Iteration).
+    """
+    dynamics = {"boost_max": boost_max, "decay_factor": decay_factor, "recovery_rate": recovery_rate}
+
+    report_status(ui_status, None, None, "Daten vorbereiten...")
+    pair_inputs = {}
+    holidays = holiday_dates(df_features)
+    for (store_id, dept_id), df_pair in df_sales.groupby(["StoreID", "DeptID"]):
+        inputs = compute_model_inputs(prepare_weekly_sales(df_pair.copy(), df_features, holidays), cost_rate)
+        if inputs[0]:
+            pair_inputs[(store_id, dept_id)] = inputs
+    if not pair_inputs:
+        return pd.DataFrame(), [], pd.DataFrame()
+
+    # Skalierung der Wochen-Multiplikatoren: typischer maximaler Zusatzumsatz einer Promotion
+    potential = sorted(inputs[1][key] * boost_max * inputs[2][key]
+                       for inputs in pair_inputs.values() for key in inputs[0])
+    week_scale = potential[len(potential) // 2] or 1.0
+
+    workers, threads = plan_parallelism(len(pair_inputs), [len(inputs[0]) for inputs in pair_inputs.values()],
+                                        max_workers=processes)
+    budget_multiplier = 0.0
+    week_multipliers = defaultdict(float)
+    best_value, best_x, best_status = -math.inf, None, {}
+    history = []
+
+    with multiprocessing.Pool(processes=workers, initializer=_init_coupled_worker,
+                              initargs=(pair_inputs,)) as pool:
+        for iteration in range(1, iterations + 1):
+            report_status(ui_status, None, None, f"Lagrange-Iteration {iteration}/{iterations}...")
+            tasks = []
+            for pair, (sorted_keys, _, _, promo_cost) in pair_inputs.items():
+                penalty = {key: budget_multiplier * promo_cost[key] + week_multipliers[(key[2], key[3])]
+                           for key in sorted_keys}
+                tasks.append((pair, penalty, dynamics, solver_timeout, threads))
+
+            x_by_pair, statuses, relaxed_value = {}, {}, 0.0
+            for pair, x_values, objective, status in pool.imap_unordered(_solve_penalized_pair, tasks):
+                x_by_pair[pair], statuses[pair] = x_values, status
+                relaxed_value += objective
+
+            # Obere Schranke der Lagrange-Relaxation (nur gültig, wenn alle Teilprobleme optimal gelöst wurden)
+            spend, week_counts = _violations(pair_inputs, x_by_pair, budget, weekly_capacity)
+            bound = relaxed_value + budget_multiplier * (budget or 0.0) + \
+                sum(week_multipliers[week] * (weekly_capacity or 0) for week in week_multipliers)
+
+            # Zulässigen Plan erzeugen und bewerten
+            repaired = repair_schedule(pair_inputs, x_by_pair, dynamics, budget, weekly_capacity)
+            value = sum(promotion_gains(pair_inputs, repaired, dynamics).values())
+            if value > best_value:
+                best_value, best_x, best_status = value, repaired, statuses
+
+            history.append({
+                "Iteration": iteration,
+                "BudgetMultiplier": budget_multiplier,
+                "MaxWeekMultiplier": max(week_multipliers.values(), default=0.0),
+                "Spend": spend,
+                "MaxPromotionsPerWeek": max(week_counts.values(), default=0),
+                "UpperBound": bound,
+                "FeasibleValue": value,
+                "BestFeasibleValue": best_value,
+            })
+            if progress_callback:
+                progress_callback(iteration, iterations, history[-1])
+
+            # Subgradient-Schritt mit abnehmender Schrittweite
+            step = step_size / math.sqrt(iteration)
+            budget_violation = (spend - budget) / budget if budget else 0.0
+            budget_multiplier = max(0.0, budget_multiplier + step * budget_violation)
+            if weekly_capacity:
+                for week in set(week_counts) | set(week_multipliers):
+                    violation = (week_counts.get(week, 0) - weekly_capacity) / weekly_capacity
+                    week_multipliers[week] = max(0.0, week_multipliers[week] + step * week_scale * violation)
+
+            over_capacity = weekly_capacity and any(count > weekly_capacity for count in week_counts.values())
+            if budget_violation <= 0 and not over_capacity and bound - value <= 1e-6 * max(1.0, abs(bound)):
+                # Relaxierte Lösung ist zulässig und optimal → fertig
+                break
+
+        # Worker regulär beenden (statt terminate), damit sie ihre gesammelten Messungen schreiben
+        pool.close()
+        pool.join()
+
+    report_status(ui_status, None, None, "Lösung verarbeiten...")
+    results = []
+    for pair, (sorted_keys, base_sales, boost_potential, promo_cost) in pair_inputs.items():
+        x_values = best_x[pair]
+        boost_values = simulate_boost(sorted_keys, x_values, **dynamics)
+        df_pair = pd.DataFrame([
+            create_data_row(store_id=key[0], dept_id=key[1], year=key[2], week=key[3], x=x_values[key],
+                            base_sales=base_sales[key], dynamic_boost=boost_values[key],
+                            boost_potential=boost_potential[key], promo_cost=promo_cost[key])
+            for key in sorted_keys
+        ])
+        results.append((df_pair, best_status.get(pair, "Not Solved")))
+
+    df_solution = pd.concat([df for df, _ in results], ignore_index=True)
+    report_status(ui_status, None, None, "Gekoppelte Optimierung abgeschlossen.", "complete")
+    return df_solution, results, pd.DataFrame(history)
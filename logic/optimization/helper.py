@@ -2,114 +2,22 @@ import math
 import multiprocessing
 import os
 import platform
-import threading
-import time
-from multiprocessing import Lock
 from multiprocessing.managers import BaseProxy
 from multiprocessing.queues import Queue
 
 import pulp
-import streamlit as st
-from streamlit.elements.lib.mutable_status_container import StatusContainer
-from streamlit.runtime.scriptrunner_utils.script_run_context import add_script_run_ctx, get_script_run_ctx
-
-
-def start_ui_status_updater(ui_status, status_queue, total=None):
-    # Zentraler Speicher für aktuellen Status
-    parallel_status_map = {}
-    parallel_status_lock = Lock()
-    completed_set = set()
-    stop_event = threading.Event()
-
-    def updater():
-        stopped = False
-        placeholder = None
-
-        while not stopped:
-            # Ensure last run is executed
-            stopped = stop_event.is_set()
-
-            while not status_queue.empty():
-                try:
-                    store_id, dept_id, label, state = status_queue.get_nowait()
-                except Exception:
-                    continue
-
-                key = (store_id, dept_id)
-                with parallel_status_lock:
-                    if label is None or state != "running":  # Signal zur Entfernung
-                        parallel_status_map.pop(key, None)
-                        completed_set.add(key)
-                    else:
-                        parallel_status_map[key] = label
-
-            # Fortschrittsdaten auslesen
-            with parallel_status_lock:
-                current_done = len(completed_set)
-                current_running = len(parallel_status_map)
-                progress = f"{current_done} / {total}" if total else f"{current_done} abgeschlossen"
-
-                # Überschrift für Statusbereich
-                status_label = f"Optimierung wird durchgeführt... ({progress})"
-
-                # Details aufbereiten
-                details = []
-
-                if current_running > 0:
-                    details.append("**Aktive Optimierungen:**")
-                    for (s, d), msg in sorted(parallel_status_map.items()):
-                        details.append(f"- Store `{s}` / Dept `{d}`: _{msg}_")
-
-                if current_done > 0:
-                    details.append("**Abgeschlossen:**")
-                    for (s, d) in sorted(completed_set):
-                        if (s, d) not in parallel_status_map:
-                            details.append(f"- Store `{s}` / Dept `{d}`")
-
-            # UI-Update zentral ausführen
-            placeholder = update_status(
-                ui_status,
-                label=status_label,
-                state="running" if current_running > 0 else "complete",
-                details=details,
-                placeholder=placeholder
-            )
-
-            time.sleep(0.5)  # Regelmäßiges Polling
-
-    thread = threading.Thread(target=updater, daemon=True)
-    # Expose context to thread
-    add_script_run_ctx(thread, get_script_run_ctx())
-    thread.start()
-    return stop_event
 
 
 def report_status(status_object, store_id, dept_id, label, state="running", expanded=None, details=None):
     if isinstance(status_object, Queue) or (
             isinstance(status_object, BaseProxy) and hasattr(status_object, "put") and hasattr(status_object, "get")):
         status_object.put((store_id, dept_id, label, state))
-    elif isinstance(status_object, StatusContainer):
+    elif status_object is not None:
+        # Streamlit erst hier laden, damit Batch-Läufe ohne Oberfläche (status_object=None) kein Streamlit benötigen
+        from logic.optimization.status_ui import update_status
         update_status(status_object, label, state, expanded, details)
 
 
-def update_status(ui_status, label, state="running", expanded=None, details=None, placeholder=None):
-    if ui_status:
-        # Initialer UI-Block für Statusnachrichten (wird jedes Mal neu geschrieben)
-        with ui_status:
-            # neuer Container für sauberes Leeren
-            if placeholder is None:
-                placeholder = st.empty()
-
-            # Inhalte einfügen
-            with placeholder.container():
-                if details:
-                    for line in details:
-                        st.markdown(line)
-
-        ui_status.update(label=label, state=state, expanded=expanded)
-    return placeholder
-
-
 # Automatische Pfadwahl je nach Betriebssystem
 def get_default_cplex_path():
     system = platform.system()
@@ -123,12 +31,75 @@ def get_default_cplex_path():
         return None
 
 
+# CBC/CPLEX skalieren bei diesen Modellgrößen kaum über so viele Threads hinaus
+MAX_SOLVER_THREADS = 8
+
+# Ab dieser Anzahl Wochen je Paar lohnt sich ein weiterer Solver-Thread eher als ein weiterer Worker
+WEEKS_PER_SOLVER_THREAD = 100
+
+
+def solver_threads(remaining, workers, cores=None):
+    """
+    Threads für den nächsten Solver: die Kerne werden auf die noch aktiven Solver verteilt. Sind weniger Probleme
+    übrig als Worker vorhanden, werden Kerne frei und die letzten Solver erhalten entsprechend mehr Threads.
+    """
+    cores = cores or multiprocessing.cpu_count()
+    active = max(1, min(workers, remaining))
+    return max(1, min(MAX_SOLVER_THREADS, cores // active))
+
+
+def plan_parallelism(n_problems, problem_sizes=None, cores=None, max_workers=None):
+    """
+    Wählt die Anzahl Pool-Worker und die Solver-Threads je Worker aus Anzahl und Größe (Wochen je Paar) der
+    Probleme sowie den verfügbaren Kernen. Viele kleine Probleme → viele Worker mit je einem Thread,
+    wenige große Probleme → wenige Worker mit mehreren Threads. Gibt (workers, threads) zurück.
+    """
+    cores = cores or multiprocessing.cpu_count()
+    if n_problems <= 1:
+        return 1, solver_threads(1, 1, cores)
+
+    preferred_threads = 1
+    if problem_sizes is not None and len(problem_sizes) > 0:
+        median_size = sorted(problem_sizes)[len(problem_sizes) // 2]
+        preferred_threads = min(MAX_SOLVER_THREADS, max(1, int(median_size) // WEEKS_PER_SOLVER_THREAD))
+
+    workers = max(1, min(n_problems, cores // preferred_threads, max_workers or cores))
+    return workers, solver_threads(n_problems, workers, cores)
+
+
+# Die Laufzeit des MILP wächst überlinear mit der Anzahl gekoppelter Wochen (Verzweigungen im Branch-and-Bound)
+COST_EXPONENT = 1.5
+
+
+def estimate_problem_costs(problem_sizes, solve_times=None):
+    """
+    Geschätzte Solver-Laufzeit je Paar aus {Paar: Wochen} und den Messungen früherer Läufe
+    ({Paar: (Wochen, Sekunden)}, siehe read_solve_times). Bekannte Paare werden von ihrer letzten Messung auf die
+    aktuelle Wochenanzahl skaliert, unbekannte über den mittleren Faktor Sekunden / Wochen^COST_EXPONENT.
+    """
+    solve_times = solve_times or {}
+    factors = sorted(seconds / max(weeks, 1) ** COST_EXPONENT for weeks, seconds in solve_times.values() if weeks)
+    factor = factors[len(factors) // 2] if factors else 1.0
+
+    costs = {}
+    for pair, weeks in problem_sizes.items():
+        if pair in solve_times and solve_times[pair][0]:
+            known_weeks, seconds = solve_times[pair]
+            costs[pair] = seconds * (weeks / known_weeks) ** COST_EXPONENT
+        else:
+            costs[pair] = factor * weeks ** COST_EXPONENT
+    return costs
+
+
 def create_solver(solver_timeout=150,
                   cplex_path=get_default_cplex_path(),
-                  multithreading=True, debug=False):
+                  multithreading=True, debug=False, threads=None):
     # Verwende mindestens 1, am besten 5% der CPU-Kerne, wenn wir mit anderen Solvern gleichzeitig ausführen
     thread_count = max(1, math.ceil(multiprocessing.cpu_count() * 0.05))
-    if multithreading:
+    if threads is not None:
+        # Vom Scheduler vorgegeben (siehe plan_parallelism / solver_threads)
+        thread_count = threads
+    elif multithreading:
         # Benutze alle CPU-Kerne, wenn wir alleine ausführen
         thread_count = multiprocessing.cpu_count()
 
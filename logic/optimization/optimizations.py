@@ -1,4 +1,6 @@
+import logging
 import multiprocessing
+import time
 import traceback
 from datetime import date, timedelta
 
@@ -6,21 +8,52 @@ import numpy as np
 import pandas as pd
 import pulp
 
-from logic.optimization.helper import report_status, start_ui_status_updater, create_solver
+from database.data_reader import read_solve_times
+from database.data_writer import save_solve_times
+from logic.analysis.timing import series_label, span
+from logic.optimization.helper import report_status, create_solver, estimate_problem_costs, plan_parallelism, \
+    solver_threads
 
 # Konstante Big-M (sollte größer als maximaler Boost sein)
 M = 2
 
 
+# Status-Queue und Scheduler-Zustand der Worker-Prozesse (per Pool-Initializer vererbt, da sich eine
+# multiprocessing.Queue bzw. ein multiprocessing.Value nicht als Argument einer Aufgabe übergeben lässt)
+_worker_status_queue = None
+_worker_schedule = None
+
+
+def _init_worker(status_queue, remaining, workers, cores):
+    global _worker_status_queue, _worker_schedule
+    _worker_status_queue = status_queue
+    _worker_schedule = (remaining, workers, cores)
+
+
+def _current_solver_threads():
+    """Solver-Threads nach aktuellem Stand der Warteschlange (mehr Threads, sobald Worker untätig werden)."""
+    remaining, workers, cores = _worker_schedule
+    return solver_threads(remaining.value, workers, cores)
+
+
+def _finish_problem():
+    remaining = _worker_schedule[0]
+    with remaining.get_lock():
+        remaining.value -= 1
+
+
 def run_single_store_dept_optimization(args):
-    store_id, dept_id, df_sales, df_features, params, ui_status = args
+    store_id, dept_id, df_sales, holidays, params, ui_status = args
+    if ui_status is None:
+        ui_status = _worker_status_queue
 
     # Filter nur auf aktuellen Store/Dept
     filtered_sales = df_sales[(df_sales["StoreID"] == store_id) & (df_sales["DeptID"] == dept_id)].copy()
     try:
         return run_promotion_sales_optimization(
             filtered_sales,
-            df_features,
+            None,
+            holidays=holidays,
             boost_max=params["boost_max"],
             decay_factor=params["decay_factor"],
             recovery_rate=params["recovery_rate"],
@@ -29,12 +62,25 @@ def run_single_store_dept_optimization(args):
             dept_id=dept_id,
             ui_status=ui_status,
             solver_timeout=params["solver_timeout"],
-            parallel=params["parallel"]
+            threads=params["threads"] or _current_solver_threads(),
+            rolling_window=params["rolling_window"],
+            rolling_step=params["rolling_step"]
         )
     except Exception as e:
         traceback.print_exc()
         report_status(ui_status, store_id, dept_id, f"Fehler aufgetreten: {e}.", "error")
         return pd.DataFrame([create_data_row(store_id, dept_id)]), f"Error for Store {store_id} Dept {dept_id}: {e}"
+    finally:
+        _finish_problem()
+
+
+def _timed_optimization(task):
+    """Pool-Aufgabe: (Index, Argumente) → (Index, Ergebnis, Laufzeit in Sekunden)."""
+    index, args = task
+    start = time.perf_counter()
+    with span("optimize_pair", series_label({"StoreID": args[0], "DeptID": args[1]})):
+        result = run_single_store_dept_optimization(args)
+    return index, result, time.perf_counter() - start
 
 
 def run_promotion_sales_optimization_all(df_sales, df_features,
@@ -44,40 +90,107 @@ def run_promotion_sales_optimization_all(df_sales, df_features,
                                          cost_rate=0.05,
                                          ui_status=None,
                                          parallel=True,
-                                         solver_timeout=150):
-    # Queue für Statusupdates
-    manager = multiprocessing.Manager()  # Erzeugt eine Warnung, die kann aber ignoriert werden!
-    status_queue = manager.Queue()
-
+                                         solver_timeout=150,
+                                         processes=None,
+                                         progress_callback=None,
+                                         threads=None,
+                                         solve_times_db="database/predictions.db",
+                                         rolling_window=None,
+                                         rolling_step=None):
+    """
+    Optimiert alle Store/Dept-Paare in `df_sales` (bei `parallel` in einem Prozess-Pool).
+    Anzahl Worker und Solver-Threads wählt plan_parallelism aus Anzahl und Größe der Probleme; `processes` begrenzt
+    die Worker, `threads` legt die Solver-Threads fest, statt sie mit der Warteschlange mitwachsen zu lassen.
+    Die Paare werden nach geschätzter Laufzeit absteigend einzeln verteilt, damit kein langes Problem am Ende
+    allein weiterläuft; die gemessenen Laufzeiten landen in `solve_times_db` (None = nicht lesen/speichern).
+    `rolling_window`/`rolling_step` aktivieren den Rolling Horizon (siehe run_promotion_sales_optimization).
+    Ohne `ui_status` läuft die Optimierung ohne Streamlit (z.B. im Batch-Betrieb);
+    progress_callback(store_id, dept_id, done, total) wird nach jedem abgeschlossenen Paar aufgerufen.
+    """
     unique_pairs = df_sales[["StoreID", "DeptID"]].drop_duplicates().dropna().values.tolist()
     total = len(unique_pairs)
-    # Vermeide unnötigen Overhead durch multiprocessing bei kleinen Problemgrößen
-    parallel = parallel and total > multiprocessing.cpu_count() * 0.5
+    cores = multiprocessing.cpu_count()
+    weeks_per_pair = df_sales.groupby(["StoreID", "DeptID"]).size().to_dict()
+    problem_sizes = {(store_id, dept_id): weeks_per_pair[(store_id, dept_id)] for store_id, dept_id in unique_pairs}
+
+    # Teuerste Probleme zuerst, damit sich die kurzen am Ende auf die Worker verteilen
+    costs = estimate_problem_costs(problem_sizes, read_solve_times(solve_times_db) if solve_times_db else None)
+    order = sorted(range(total), key=lambda i: costs[tuple(unique_pairs[i])], reverse=True)
+
+    workers, planned_threads = plan_parallelism(total, list(problem_sizes.values()), cores,
+                                                processes if parallel else 1)
+    if threads is not None and parallel:
+        # Feste Solver-Threads: Worker nur durch `processes` und die Anzahl Probleme begrenzt
+        workers = max(1, min(total, processes or cores))
+    # Ein einzelner Worker läuft ohne Pool-Overhead direkt im aktuellen Prozess
+    parallel = workers > 1
     params = {
         "boost_max": boost_max,
         "decay_factor": decay_factor,
         "recovery_rate": recovery_rate,
         "cost_rate": cost_rate,
         "solver_timeout": solver_timeout,
-        "parallel": not parallel,
+        "threads": threads,
+        "rolling_window": rolling_window,
+        "rolling_step": rolling_step,
     }
-
-    args = [(store_id, dept_id, df_sales, df_features, params, status_queue) for store_id, dept_id in
-            unique_pairs]
-
-    stop_event = start_ui_status_updater(ui_status, status_queue, total)
+    logging.getLogger(__name__).debug("Optimierung von %d Paaren: %d Worker, anfangs %d Solver-Threads je Worker "
+                                      "(%d Kerne)", total, workers, threads or planned_threads, cores)
+
+    # Queue für Statusupdates (nur mit Oberfläche); eine einfache Queue statt eines Manager-Proxys
+    status_queue = None
+    stop_updater = None
+    if ui_status is not None:
+        from logic.optimization.status_ui import start_ui_status_updater
+        status_queue = multiprocessing.Queue()
+        stop_updater = start_ui_status_updater(ui_status, status_queue, total)
+
+    # Anzahl noch nicht abgeschlossener Probleme, geteilt mit den Workern für die Thread-Verteilung
+    remaining = multiprocessing.Value("i", total)
+    init_args = (status_queue, remaining, workers, cores)
+
+    # Feiertage einmal für alle Paare; jede Aufgabe erhält nur die Zeilen ihres Paares
+    holidays = holiday_dates(df_features)
+    pair_sales = dict(iter(df_sales.groupby(["StoreID", "DeptID"])))
+
+    # Im Pool erhalten die Worker die Queue über den Initializer, seriell wird sie direkt übergeben
+    args = [(store_id, dept_id, pair_sales[(store_id, dept_id)], holidays, params,
+             None if parallel else status_queue)
+            for store_id, dept_id in unique_pairs]
+
+    # Ergebnisse in der ursprünglichen Reihenfolge der Paare, Laufzeiten für die nächste Schätzung
+    results = [None] * total
+    solve_times = []
+    tasks = [(i, args[i]) for i in order]
+
+    def collect(index, result, seconds):
+        results[index] = result
+        store_id, dept_id = unique_pairs[index]
+        solve_times.append((store_id, dept_id, problem_sizes[(store_id, dept_id)], seconds))
+        if progress_callback:
+            progress_callback(store_id, dept_id, len(solve_times), total)
 
     if parallel:
-        with multiprocessing.Pool(processes=multiprocessing.cpu_count()) as pool:
-            results = pool.map(run_single_store_dept_optimization, args)
+        with multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=init_args) as pool:
+            for index, result, seconds in pool.imap_unordered(_timed_optimization, tasks, chunksize=1):
+                collect(index, result, seconds)
+            # Worker regulär beenden (statt terminate), damit sie ihre gesammelten Messungen schreiben
+            pool.close()
+            pool.join()
     else:
-        results = [run_single_store_dept_optimization(arg) for arg in args]
+        _init_worker(*init_args)
+        for task in tasks:
+            collect(*_timed_optimization(task))
+
+    if solve_times_db and solve_times:
+        save_solve_times(solve_times, solve_times_db)
 
     solutions = [df for df, status in results if not df.empty]
     combined_result = pd.concat(solutions, ignore_index=True) if solutions else pd.DataFrame()
 
     # Stoppe den Updater-Thread
-    stop_event.set()
+    if stop_updater is not None:
+        stop_updater()
 
     return combined_result, results
 
@@ -91,7 +204,17 @@ def run_promotion_sales_optimization(df_sales, df_features,
                                      store_id=None,
                                      dept_id=None,
                                      ui_status=None,
-                                     parallel=False):
+                                     parallel=False,
+                                     threads=None,
+                                     rolling_window=None,
+                                     rolling_step=None,
+                                     holidays=None):
+    """
+    Optimiert die Promotionen eines Store/Dept-Paares. Mit `rolling_window` (Wochen) wird statt des Gesamtmodells
+    eine Folge überlappender Fenster gelöst (Rolling Horizon): von jedem Fenster werden die ersten `rolling_step`
+    Wochen (Standard: halbes Fenster) festgeschrieben, der Boost-Zustand der letzten festen Woche startet das
+    nächste Fenster. `holidays` (siehe holiday_dates) ersetzt das Mergen mit `df_features`.
+    """
     if cost_rate >= boost_max:
         report_status(ui_status, store_id, dept_id,
                       f"Es können keine Promotionen durchgeführt werden, wenn die Kosten ({cost_rate:.2f}) höher als der maximale Zuwachs ({boost_max:.2f}) sind.",
@@ -99,7 +222,56 @@ def run_promotion_sales_optimization(df_sales, df_features,
         return pd.DataFrame([create_data_row(store_id, dept_id)]), pulp.const.LpStatus[pulp.const.LpStatusInfeasible]
 
     report_status(ui_status, store_id, dept_id, "Daten vorbereiten...")
+    weekly_sales = prepare_weekly_sales(df_sales, df_features, holidays)
+
+    report_status(ui_status, store_id, dept_id, "Entscheidungsvariablen erstellen...")
+    sorted_keys, base_sales, boost_potential, promo_cost = compute_model_inputs(weekly_sales, cost_rate)
+    dynamics = {"boost_max": boost_max, "decay_factor": decay_factor, "recovery_rate": recovery_rate}
+    label = series_label({"StoreID": store_id, "DeptID": dept_id})
+
+    if rolling_window and len(sorted_keys) > rolling_window:
+        x_values, boost_values, status = solve_rolling_horizon(sorted_keys, base_sales, boost_potential, promo_cost,
+                                                               dynamics, rolling_window, rolling_step, solver_timeout,
+                                                               parallel, threads, ui_status, store_id, dept_id)
+    else:
+        report_status(ui_status, store_id, dept_id, "Modell definieren...")
+        with span("milp.build", label):
+            model, x, dynamic_boost = build_promotion_model(sorted_keys, base_sales, boost_potential, promo_cost,
+                                                            **dynamics)
+
+        report_status(ui_status, store_id, dept_id, "Optimierung wird durchgeführt...")
+        solver = create_solver(solver_timeout=solver_timeout, multithreading=parallel, threads=threads)
+        with span("milp.solve", label):
+            model.solve(solver)
+        x_values = {key: x[key].varValue for key in sorted_keys}
+        boost_values = {key: dynamic_boost[key].varValue for key in sorted_keys}
+        status = pulp.LpStatus[model.status]
+
+    report_status(ui_status, store_id, dept_id, "Lösung verarbeiten...")
+
+    # Ergebnisse extrahieren
+    with span("milp.extract", label):
+        result = [
+            create_data_row(store_id=key[0], dept_id=key[1], year=key[2], week=key[3], x=x_values[key],
+                            base_sales=base_sales[key], dynamic_boost=boost_values[key],
+                            boost_potential=boost_potential[key], promo_cost=promo_cost[key])
+            for key in sorted_keys
+        ]
+        df_solution = pd.DataFrame(result)
+    report_status(ui_status, store_id, dept_id, "Optimierung abgeschlossen.", "complete")
+    return df_solution, status
 
+
+def holiday_dates(df_features):
+    """Feiertage je Store (StoreID, Date) laut StoreFeature."""
+    return df_features.loc[df_features["IsHoliday"] == 1, ["StoreID", "Date"]].drop_duplicates()
+
+
+def prepare_weekly_sales(df_sales, df_features, holidays=None):
+    """
+    Wöchentlicher Durchschnittsumsatz je Store/Dept ohne Ausreißer und Feiertagswochen. Mehrere Paare können die
+    einmal berechneten Feiertage `holidays` (siehe holiday_dates) teilen; sonst kommen sie aus `df_features`.
+    """
     # Zeitspalten
     df_sales["Week"] = df_sales["Date"].dt.isocalendar().week.astype(int)
     df_sales["Year"] = df_sales["Date"].dt.isocalendar().year.astype(int)
@@ -111,17 +283,12 @@ def run_promotion_sales_optimization(df_sales, df_features,
     weekly_sales = (weekly_sales_raw.groupby(["StoreID", "DeptID"], group_keys=False)[weekly_sales_raw.columns]
                     .apply(remove_outliers).reset_index(drop=True))
 
-    # Feiertage entfernen
-    df_merged = pd.merge(
-        df_sales.drop(columns=["IsHoliday"], errors="ignore"),
-        df_features,
-        on=["StoreID", "Date"],
-        how="left"
-    )
-    df_merged["Week"] = df_merged["Date"].dt.isocalendar().week.astype(int)
-    df_merged["Year"] = df_merged["Date"].dt.isocalendar().year.astype(int)
-    holiday_weeks = df_merged[df_merged["IsHoliday"] == 1][["StoreID", "Year", "Week"]].drop_duplicates()
-
+    # Feiertage entfernen: nur Wochen, in denen eine Verkaufszeile genau auf einen Feiertag ihres Stores fällt
+    # (Prognosezeilen mit abweichendem Wochentag bleiben erhalten)
+    if holidays is None:
+        holidays = holiday_dates(df_features)
+    holiday_weeks = (df_sales[["StoreID", "Date", "Year", "Week"]].merge(holidays, on=["StoreID", "Date"])
+                     [["StoreID", "Year", "Week"]].drop_duplicates())
     weekly_sales = pd.merge(
         weekly_sales,
         holiday_weeks,
@@ -132,10 +299,11 @@ def run_promotion_sales_optimization(df_sales, df_features,
     weekly_sales = weekly_sales[weekly_sales["_merge"] == "left_only"].drop(columns="_merge")
 
     # Zeilen mit NA in Schlüsselspalten sicher entfernen
-    weekly_sales = weekly_sales.dropna(subset=["StoreID", "DeptID", "Year", "Week", "WeeklySales"])
+    return weekly_sales.dropna(subset=["StoreID", "DeptID", "Year", "Week", "WeeklySales"])
 
-    report_status(ui_status, store_id, dept_id, "Entscheidungsvariablen erstellen...")
 
+def compute_model_inputs(weekly_sales, cost_rate):
+    """Sortierte Wochenschlüssel sowie Basisumsatz, Boost-Potenzial und Promo-Kosten je Schlüssel."""
     # Keys erzeugen ohne NA
     week_tuples = [
         (r.StoreID, r.DeptID, r.Year, r.Week)
@@ -149,46 +317,69 @@ def run_promotion_sales_optimization(df_sales, df_features,
         for key, val in zip(week_tuples, weekly_sales["WeeklySales"])
     }
 
-    # Boost-Potenzial nach Umsatzstärke
+    # Boost-Potenzial nach Umsatzstärke (über alle Wochen normiert, auch wenn in Fenstern gelöst wird)
     boost_potential = compute_boost_potential(base_sales, fallback_value=0.0, normalize=True)
     promo_cost = {key: base_sales[key] * cost_rate for key in base_sales}
 
+    sorted_keys = sorted(week_tuples, key=lambda t: (t[0], t[1], t[2], t[3]))
+    return sorted_keys, base_sales, boost_potential, promo_cost
+
+
+def build_promotion_model(sorted_keys, base_sales, boost_potential, promo_cost, boost_max, decay_factor,
+                          recovery_rate, start_boost=None, x_penalty=None, handles=None):
+    """
+    Baut das MILP für die Wochen `sorted_keys`. Die erste Woche ohne Vorgänger startet mit `start_boost`
+    (Standard: boost_max), beim Rolling Horizon mit dem fortgeschriebenen Boost des vorherigen Fensters.
+    `x_penalty` ({Woche: Betrag}) verteuert Promotionen zusätzlich, z.B. um Lagrange-Multiplikatoren gekoppelter
+    Nebenbedingungen (siehe coupled.py). Ist `handles` ein dict, werden darin die parameterabhängigen Variablen und
+    Nebenbedingungen abgelegt, damit update_model_parameters das Modell für andere Parameter anpassen kann, ohne
+    es neu aufzubauen (siehe sweep.py). Gibt (Modell, x, dynamic_boost) zurück.
+    """
+    x_penalty = x_penalty or {}
     # Entscheidungsvariablen
     # x ist unser Ziel. 0 → Keine Promo in der Woche, 1 → Promo!
-    x = pulp.LpVariable.dicts("Promo", week_tuples, cat="Binary")
+    x = pulp.LpVariable.dicts("Promo", sorted_keys, cat="Binary")
     # dynamic_boost wird für die dynamische Anpassung des Umsatzboosts einer Promo benötigt, welcher jeweils darauf
     # basiert, ob in der Vorwoche eine Promotion stattgefunden hat (--> Decay) oder nicht (--> Recovery)
-    dynamic_boost = pulp.LpVariable.dicts("DynamicBoost", week_tuples, lowBound=0, upBound=boost_max)
+    dynamic_boost = pulp.LpVariable.dicts("DynamicBoost", sorted_keys, lowBound=0, upBound=boost_max)
     # dynamic_boost_effective ist für die linearisierung der Zielfunktion nötig. In dieser müssten ansonsten die
     # zwei Variablen x und dynamic_boost multipliziert werden, was ein nichtlinieares Problem ist.
-    dynamic_boost_effective = pulp.LpVariable.dicts("DynamicBoostEffective", week_tuples, lowBound=0, upBound=boost_max)
+    dynamic_boost_effective = pulp.LpVariable.dicts("DynamicBoostEffective", sorted_keys, lowBound=0,
+                                                    upBound=boost_max)
 
     # Hilfsvariablen (global abrufbar für Debug-Zwecke)
     # limited_recovery modeliert min(recovery_rate hoch blah, boost_max) um OOB zu vermeiden
-    limited_recovery = pulp.LpVariable.dicts(f"LimitedRecovery", week_tuples, lowBound=0, upBound=boost_max)
+    limited_recovery = pulp.LpVariable.dicts(f"LimitedRecovery", sorted_keys, lowBound=0, upBound=boost_max)
     # z_decay und z_recovery modellieren mittels Big-M dynamic_boost[prev] * x[prev] für decay und recovery des boosts
-    z_decay = pulp.LpVariable.dicts(f"Z_Decay", week_tuples, lowBound=0)
-    z_recovery = pulp.LpVariable.dicts(f"Z_Recovery", week_tuples, lowBound=0, upBound=boost_max)
+    z_decay = pulp.LpVariable.dicts(f"Z_Decay", sorted_keys, lowBound=0)
+    z_recovery = pulp.LpVariable.dicts(f"Z_Recovery", sorted_keys, lowBound=0, upBound=boost_max)
 
-    report_status(ui_status, store_id, dept_id, "Triviale Initiallösung erstellen...")
-    sorted_keys = sorted(week_tuples, key=lambda t: (t[0], t[1], t[2], t[3]))
     # Versuche, die triviale Lösung ("Keine Promotionen") als Startpunkt zu verwenden → Ziel-Fkt = 0
     for key in sorted_keys:
         x[key].setInitialValue(0)
 
-    report_status(ui_status, store_id, dept_id, "Modell definieren...")
-
     model = pulp.LpProblem("Adaptive_Promotion_Model", pulp.LpMaximize)
+    if handles is not None:
+        handles.update({"x": x, "z_decay": z_decay, "dynamic_boost": dynamic_boost, "constraints": [],
+                        "bounded": [dynamic_boost, dynamic_boost_effective, limited_recovery, z_recovery]})
+
+    def add(constraint, name=None, role=None, key=None, prev=None, gap_weeks=None):
+        # role beschreibt, wie update_model_parameters die Nebenbedingung an neue Parameter anpasst
+        model.addConstraint(constraint, name)
+        if handles is not None and role is not None:
+            handles["constraints"].append((role, key, prev, gap_weeks, constraint))
 
     # Zielfunktion: Netto-Umsatz (Boost - Promo-Kosten)
     model += pulp.lpSum([
-        base_sales[key] * dynamic_boost_effective[key] * boost_potential[key] - promo_cost[key] * x[key]
+        base_sales[key] * dynamic_boost_effective[key] * boost_potential[key]
+        - (promo_cost[key] + x_penalty.get(key, 0.0)) * x[key]
         for key in sorted_keys
     ]), "Net_Promotion_Benefit"
 
     # Dynamik (Decay / Recovery)
-    for i, key in enumerate(sorted_keys):
-        prev, gap_weeks = get_latest_previous_week(key, set(sorted_keys))
+    available_keys = set(sorted_keys)
+    for key in sorted_keys:
+        prev, gap_weeks = get_latest_previous_week(key, available_keys)
         if prev:
             # Berechne erwarteten Boost nach Recovery über mehrere Wochen
             # angenommen: keine Promo während der Lücke (x[prev] = 0 für alle)
@@ -199,59 +390,153 @@ def run_promotion_sales_optimization(df_sales, df_features,
             is_capped = pulp.LpVariable(f"IsCapped_{key}", cat="Binary")
 
             # McCormick-artige Hülle für: limited_recovery = min(dynamic_boost[prev] * recovery_multiplier, boost_max)
-            model += limited_recovery[key] <= dynamic_boost[prev] * recovery_multiplier, f"RecoveryMin_UB1_{key}"
-            model += limited_recovery[key] <= boost_max, f"RecoveryMin_UB2_{key}"
-            model += limited_recovery[key] >= dynamic_boost[
-                prev] * recovery_multiplier - M * is_capped, f"RecoveryMin_LB1_{key}"
-            model += limited_recovery[key] >= boost_max - M * (1 - is_capped), f"RecoveryMin_LB2_{key}"
+            add(limited_recovery[key] <= dynamic_boost[prev] * recovery_multiplier, f"RecoveryMin_UB1_{key}",
+                "recovery", key, prev, gap_weeks)
+            add(limited_recovery[key] <= boost_max, f"RecoveryMin_UB2_{key}", "rhs_boost")
+            add(limited_recovery[key] >= dynamic_boost[prev] * recovery_multiplier - M * is_capped,
+                f"RecoveryMin_LB1_{key}", "recovery", key, prev, gap_weeks)
+            add(limited_recovery[key] >= boost_max - M * (1 - is_capped), f"RecoveryMin_LB2_{key}",
+                "rhs_boost_minus_m")
 
             # Da 2 Variablen multipliziert (dynamic_boost[prev]*x[prev] → Linearisierung mit Big-M Constraints
             # Hilfsvariablen für beide Fälle (--> verschoben für Debug-Zwecke)
             # z_decay und z_recovery
 
             # Fall 1: x == 1 → Decay
-            model += z_decay[key] <= dynamic_boost[prev], f"Z_Decay_Upper_{key}"
-            model += z_decay[key] <= boost_max * x[prev], f"Z_Decay_Upper_Max_{key}"
-            model += z_decay[key] >= dynamic_boost[prev] - M * (1 - x[prev]), f"Z_Decay_Lower_{key}"
+            add(z_decay[key] <= dynamic_boost[prev], f"Z_Decay_Upper_{key}")
+            add(z_decay[key] <= boost_max * x[prev], f"Z_Decay_Upper_Max_{key}", "decay_x", key, prev)
+            add(z_decay[key] >= dynamic_boost[prev] - M * (1 - x[prev]), f"Z_Decay_Lower_{key}")
 
             # Fall 2: x == 0 → Recovery
-            model += z_recovery[key] <= limited_recovery[key], f"Z_Recovery_Upper_{key}"
-            model += z_recovery[key] <= boost_max * (1 - x[prev]), f"Z_Recovery_Upper_Max_{key}"
-            model += z_recovery[key] >= (limited_recovery[key] - M * x[prev]), f"Z_Recovery_Lower_{key}"
+            add(z_recovery[key] <= limited_recovery[key], f"Z_Recovery_Upper_{key}")
+            add(z_recovery[key] <= boost_max * (1 - x[prev]), f"Z_Recovery_Upper_Max_{key}", "recovery_x", key, prev)
+            add(z_recovery[key] >= (limited_recovery[key] - M * x[prev]), f"Z_Recovery_Lower_{key}")
 
             # Gesamtwert: entweder Decay oder Recovery
-            model += dynamic_boost[key] == z_decay[key] * decay_factor + z_recovery[key], f"Boost_Update_{key}"
+            add(dynamic_boost[key] == z_decay[key] * decay_factor + z_recovery[key], f"Boost_Update_{key}", "decay",
+                key)
 
         else:
             # Startwert
-            model += dynamic_boost[key] == boost_max
+            add(dynamic_boost[key] == (boost_max if start_boost is None else start_boost),
+                role="rhs_boost" if start_boost is None else None)
 
         # Lineare Bedingungen zur Modellierung von boost_effective = dynamic_boost * x
         # maximal dynamic_boost
-        model += dynamic_boost_effective[key] <= dynamic_boost[key], f"BoostEff_LE_Boost_{key}"
+        add(dynamic_boost_effective[key] <= dynamic_boost[key], f"BoostEff_LE_Boost_{key}")
         # maximal boost_max oder 0 (falls x = 0)
-        model += dynamic_boost_effective[key] <= boost_max * x[key], f"BoostEff_LE_IfX_{key}"
+        add(dynamic_boost_effective[key] <= boost_max * x[key], f"BoostEff_LE_IfX_{key}", "eff_x", key)
         # minimal dynamic_boost oder 0 (falls x = 0, da var. als >= 0 definiert)
-        model += (dynamic_boost_effective[key] >= dynamic_boost[key] - boost_max * (1 - x[key]),
-                  f"BoostEff_GE_BoostIfX_{key}")
-
-    report_status(ui_status, store_id, dept_id, "Optimierung wird durchgeführt...")
-    solver = create_solver(solver_timeout=solver_timeout, multithreading=parallel)
-    model.solve(solver)
-
-    report_status(ui_status, store_id, dept_id, "Lösung verarbeiten...")
+        add(dynamic_boost_effective[key] >= dynamic_boost[key] - boost_max * (1 - x[key]),
+            f"BoostEff_GE_BoostIfX_{key}", "eff_ge", key)
+
+    return model, x, dynamic_boost
+
+
+def update_model_parameters(model, handles, promo_cost, boost_max, decay_factor, recovery_rate):
+    """
+    Passt ein mit `handles` gebautes Modell an neue Parameter an, indem nur Koeffizienten, rechte Seiten und
+    Schranken ersetzt werden (Struktur und Variablen bleiben erhalten). `promo_cost` enthält die Kosten je Woche.
+    """
+    x = handles["x"]
+    for key, cost in promo_cost.items():
+        model.objective[x[key]] = -cost
+    for variables in handles["bounded"]:
+        for variable in variables.values():
+            variable.upBound = boost_max
+
+    for role, key, prev, gap_weeks, constraint in handles["constraints"]:
+        if role == "rhs_boost":
+            constraint.changeRHS(boost_max)
+        elif role == "rhs_boost_minus_m":
+            constraint.changeRHS(boost_max - M)
+        elif role == "recovery":
+            constraint.expr[handles["dynamic_boost"][prev]] = -(1 + recovery_rate) ** gap_weeks
+        elif role == "decay_x":
+            constraint.expr[x[prev]] = -boost_max
+        elif role == "recovery_x":
+            constraint.expr[x[prev]] = boost_max
+            constraint.changeRHS(boost_max)
+        elif role == "decay":
+            constraint.expr[handles["z_decay"][key]] = -decay_factor
+        elif role == "eff_x":
+            constraint.expr[x[key]] = -boost_max
+        elif role == "eff_ge":
+            constraint.expr[x[key]] = -boost_max
+            constraint.changeRHS(-boost_max)
+
+
+def next_boost(boost, promoted, gap_weeks, boost_max, decay_factor, recovery_rate):
+    """Boost der Folgewoche nach einer festgeschriebenen Woche (dieselbe Dynamik wie im Modell)."""
+    if promoted:
+        return boost * decay_factor
+    return min(boost * (1 + recovery_rate) ** gap_weeks, boost_max)
+
+
+def simulate_boost(sorted_keys, x_values, boost_max, decay_factor, recovery_rate):
+    """Boost je Woche für einen festen Promotionsplan {Woche: 0/1}, z.B. nach dem Streichen von Promotionen."""
+    available_keys = set(sorted_keys)
+    boost_values = {}
+    for key in sorted_keys:
+        prev, gap_weeks = get_latest_previous_week(key, available_keys)
+        if prev is None:
+            boost_values[key] = boost_max
+        else:
+            boost_values[key] = next_boost(boost_values[prev], round(x_values.get(prev) or 0) == 1, gap_weeks,
+                                           boost_max, decay_factor, recovery_rate)
+    return boost_values
+
+
+def solve_rolling_horizon(sorted_keys, base_sales, boost_potential, promo_cost, dynamics, window, step=None,
+                          solver_timeout=150, parallel=False, threads=None, ui_status=None, store_id=None,
+                          dept_id=None):
+    """
+    Löst die Wochen in überlappenden Fenstern der Länge `window` und schreibt je Fenster die ersten `step` Wochen
+    fest. Gibt (x je Woche, dynamic_boost je Woche, schlechtester Solver-Status der Fenster) zurück.
+    """
+    step = max(1, min(step or window // 2, window))
+    available_keys = set(sorted_keys)
+    x_values = {}
+    boost_values = {}
+    statuses = []
+    start_boost = None
+    label = series_label({"StoreID": store_id, "DeptID": dept_id})
+
+    for start in range(0, len(sorted_keys), step):
+        window_keys = sorted_keys[start:start + window]
+        # Das letzte Fenster wird vollständig übernommen
+        commit_keys = window_keys if start + window >= len(sorted_keys) else window_keys[:step]
 
-    # Ergebnisse extrahieren
-    result = [
-        create_data_row(store_id=key[0], dept_id=key[1], year=key[2], week=key[3], x=x[key].varValue,
-                        base_sales=base_sales[key], dynamic_boost=dynamic_boost[key].varValue,
-                        boost_potential=boost_potential[key], promo_cost=promo_cost[key])
-        for key in sorted_keys
-    ]
+        report_status(ui_status, store_id, dept_id,
+                      f"Fenster ab Woche {start + 1} von {len(sorted_keys)} wird optimiert...")
+        # Jedes Fenster als eigener Build/Solve-Span; Detail mit Startwoche des Fensters
+        window_label = f"{label} / Woche {start + 1}"
+        with span("milp.build", window_label):
+            model, x, dynamic_boost = build_promotion_model(window_keys, base_sales, boost_potential, promo_cost,
+                                                            start_boost=start_boost, **dynamics)
+        with span("milp.solve", window_label):
+            model.solve(create_solver(solver_timeout=solver_timeout, multithreading=parallel, threads=threads))
+        statuses.append(pulp.LpStatus[model.status])
+
+        for key in commit_keys:
+            x_values[key] = x[key].varValue
+            boost_values[key] = dynamic_boost[key].varValue
+        if len(commit_keys) == len(window_keys):
+            break
+
+        # Boost-Zustand der letzten festgeschriebenen Woche in das nächste Fenster übernehmen
+        last_key = commit_keys[-1]
+        next_key = sorted_keys[start + len(commit_keys)]
+        prev, gap_weeks = get_latest_previous_week(next_key, available_keys)
+        if prev == last_key:
+            start_boost = next_boost(boost_values[last_key], round(x_values[last_key] or 0) == 1, gap_weeks,
+                                     **dynamics)
+        else:
+            # Lücke von über einem Jahr → Neustart wie im Gesamtmodell
+            start_boost = None
 
-    df_solution = pd.DataFrame(result)
-    report_status(ui_status, store_id, dept_id, "Optimierung abgeschlossen.", "complete")
-    return df_solution, pulp.LpStatus[model.status]
+    status = next((s for s in statuses if s != "Optimal"), "Optimal")
+    return x_values, boost_values, status
 
 
 # IQR Methode zur Ausreißerentfernung
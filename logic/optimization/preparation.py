@@ -0,0 +1,56 @@
+import pandas as pd
+
+
+def prepare_optimization_sales(df_sales, df_pred=None, selected_stores=None, selected_depts=None):
+    """
+    Filtert die Verkaufsdaten auf die Auswahl und ergänzt sie um die Zukunftswerte aus `df_pred`, falls vorhanden.
+    """
+    # Filter Stores und Depts
+    df_sales = filter_sales(df_sales, selected_stores, selected_depts)
+
+    if df_pred is not None:
+        # Store-Summen (DeptID -1) der hierarchischen Prognose sind kein eigenes Department
+        df_pred = df_pred[df_pred["DeptID"] != -1]
+        df_pred = filter_sales(df_pred, selected_stores, selected_depts)
+        df_sales = merge_forecast_with_sales(df_sales, df_pred)
+
+    return df_sales
+
+
+def _merge_keys(dates, stores, depts):
+    # Datum als int64 (Nanosekunden) → vergleichbar unabhängig von der Zeitauflösung der Spalte
+    dates = pd.to_datetime(dates).to_numpy(dtype="datetime64[ns]").view("int64")
+    return pd.MultiIndex.from_arrays([dates, stores.to_numpy(), depts.to_numpy()])
+
+
+def merge_forecast_with_sales(df_sales, df_pred):
+    # Anti-Join über (Date, StoreID, DeptID): nur zukünftige Vorhersagen behalten (nicht in df_sales enthalten)
+    sales_keys = _merge_keys(df_sales["Date"], df_sales["StoreID"], df_sales["DeptID"])
+    pred_keys = _merge_keys(df_pred["ds"], df_pred["StoreID"], df_pred["DeptID"])
+
+    future_preds = df_pred.loc[~pred_keys.isin(sales_keys)].copy()
+    future_preds.rename(columns={"ds": "Date", "yhat": "WeeklySales"}, inplace=True)
+
+    future_preds["IsHoliday"] = False
+
+    # DataFrames kombinieren
+    df_combined = pd.concat([df_sales, future_preds[df_sales.columns]], ignore_index=True)
+    df_combined.sort_values(["StoreID", "DeptID", "Date"], inplace=True)
+
+    return df_combined
+
+
+def filter_sales(df_sales, selected_stores=None, selected_depts=None):
+    # Filter für StoreID
+    if selected_stores is not None:
+        if not isinstance(selected_stores, (list, tuple, set)):
+            selected_stores = [selected_stores]
+        df_sales = df_sales[df_sales["StoreID"].isin(selected_stores)]
+
+    # Filter für DeptID
+    if selected_depts is not None:
+        if not isinstance(selected_depts, (list, tuple, set)):
+            selected_depts = [selected_depts]
+        df_sales = df_sales[df_sales["DeptID"].isin(selected_depts)]
+
+    return df_sales
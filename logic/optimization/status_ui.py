@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+from streamlit.runtime.scriptrunner_utils.script_run_context import add_script_run_ctx, get_script_run_ctx
+
+
+class StatusAggregator:
+    """
+    Verdichtet die Statusmeldungen der Worker: je Store/Dept zählt nur der letzte Zustand, angezeigt werden
+    lediglich Zähler und die `recent` neuesten Ereignisse statt einer Zeile je Paar.
+    """
+
+    def __init__(self, total=None, recent=10):
+        self.total = total
+        self.running = {}
+        self.completed = set()
+        self.errors = set()
+        self.events = deque(maxlen=recent)
+
+    def apply(self, event):
+        store_id, dept_id, label, state = event
+        key = (store_id, dept_id)
+        if label is None or state != "running":  # Signal zur Entfernung
+            self.running.pop(key, None)
+            self.completed.add(key)
+            if state == "error":
+                self.errors.add(key)
+        else:
+            self.running[key] = label
+        self.events.append(f"Store `{store_id}` / Dept `{dept_id}`: _{label}_")
+
+    @property
+    def progress(self):
+        return min(len(self.completed) / self.total, 1.0) if self.total else None
+
+    def label(self):
+        done = len(self.completed)
+        progress = f"{done} / {self.total}" if self.total else f"{done} abgeschlossen"
+        return f"Optimierung wird durchgeführt... ({progress})"
+
+    def details(self):
+        details = [f"**Laufend:** {len(self.running)} | **Abgeschlossen:** {len(self.completed)} | "
+                   f"**Fehler:** {len(self.errors)}"]
+        if self.events:
+            details.append("**Letzte Ereignisse:**")
+            details.extend(f"- {event}" for event in reversed(self.events))
+        return details
+
+
+def start_ui_status_updater(ui_status, status_queue, total=None, recent=10, redraw_interval=1.0):
+    """
+    Startet einen Thread, der blockierend (mit Timeout) auf Statusmeldungen wartet, alle bis dahin
+    angefallenen Meldungen gesammelt übernimmt und höchstens alle `redraw_interval` Sekunden neu zeichnet.
+    Gibt eine Stopp-Funktion zurück: Sie übernimmt restliche Meldungen, zeichnet ein letztes Mal und wartet
+    auf das Ende des Threads.
+    """
+    aggregator = StatusAggregator(total, recent)
+    stop_event = threading.Event()
+
+    def drain(first_timeout):
+        """Übernimmt alle vorliegenden Meldungen; wartet höchstens `first_timeout` Sekunden auf die erste."""
+        received = 0
+        try:
+            event = status_queue.get(timeout=first_timeout)
+            while True:
+                aggregator.apply(event)
+                received += 1
+                event = status_queue.get_nowait()
+        except (queue.Empty, EOFError, OSError):
+            pass
+        return received
+
+    def updater():
+        placeholder = None
+        last_draw = 0.0
+        dirty = True
+
+        while True:
+            stopped = stop_event.is_set()
+            # Nach dem Stopp nur noch kurz auf Meldungen warten, die sich noch in der Pipe befinden
+            dirty = drain(0.1 if stopped else redraw_interval) > 0 or dirty
+
+            if dirty and (stopped or time.monotonic() - last_draw >= redraw_interval):
+                placeholder = update_status(
+                    ui_status,
+                    label=aggregator.label(),
+                    state="running" if aggregator.running and not stopped else "complete",
+                    details=aggregator.details(),
+                    placeholder=placeholder,
+                    progress=aggregator.progress
+                )
+                last_draw = time.monotonic()
+                dirty = False
+
+            if stopped:
+                break
+
+    thread = threading.Thread(target=updater, daemon=True)
+    # Expose context to thread
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+
+    def stop():
+        stop_event.set()
+        thread.join(timeout=redraw_interval + 5)
+
+    return stop
+
+
+def update_status(ui_status, label, state="running", expanded=None, details=None, placeholder=None, progress=None):
+    if ui_status:
+        # Initialer UI-Block für Statusnachrichten (wird jedes Mal neu geschrieben)
+        with ui_status:
+            # neuer Container für sauberes Leeren
+            if placeholder is None:
+                placeholder = st.empty()
+
+            # Inhalte einfügen
+            with placeholder.container():
+                if progress is not None:
+                    st.progress(progress)
+                if details:
+                    for line in details:
+                        st.markdown(line)
+
+        ui_status.update(label=label, state=state, expanded=expanded)
+    return placeholder
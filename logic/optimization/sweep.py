@@ -0,0 +1,136 @@
+# Parameterstudie für die Promotion-Optimierung: je Store/Dept wird das Modell einmal aufgebaut und für jede
+# Parameterkombination nur in Koeffizienten, rechten Seiten und Schranken angepasst (update_model_parameters).
+import itertools
+import math
+import multiprocessing
+import time
+
+import pandas as pd
+import pulp
+
+from logic.analysis.timing import series_label, span
+from logic.optimization.helper import create_solver, plan_parallelism
+from logic.optimization.optimizations import build_promotion_model, compute_model_inputs, holiday_dates, \
+    prepare_weekly_sales, update_model_parameters
+
+# Parameter der Optimierer-Seiten (in %) → Modellparameter
+SWEEP_PARAMETERS = {
+    "promo_cost": "Kosten (% vom Umsatz)",
+    "promo_boost": "Maximaler Boost (%)",
+    "promo_scaling": "Wirkungserholung (%)",
+    "promo_decay": "Wirkungsnachlass (%)",
+}
+
+# Modell-Eingaben je Paar in den Worker-Prozessen (einmal per Initializer übergeben)
+_worker_inputs = None
+
+
+def _init_sweep_worker(pair_inputs):
+    global _worker_inputs
+    _worker_inputs = pair_inputs
+
+
+def parameter_grid(ranges, base_params):
+    """
+    Alle Kombinationen der Werte in `ranges` ({Parameter: [Werte]}); nicht variierte Parameter kommen aus
+    `base_params` (z.B. die aktuellen Seitenparameter).
+    """
+    names = list(ranges.keys())
+    grid = []
+    for values in itertools.product(*(ranges[name] for name in names)):
+        combo = {name: base_params[name] for name in SWEEP_PARAMETERS}
+        combo.update(zip(names, values))
+        grid.append(combo)
+    return grid
+
+
+def _model_parameters(combo):
+    return {
+        "cost_rate": combo["promo_cost"] * 0.01,
+        "boost_max": combo["promo_boost"] * 0.01,
+        "recovery_rate": combo["promo_scaling"] * 0.01,
+        "decay_factor": 1 - combo["promo_decay"] * 0.01,
+    }
+
+
+def _sweep_pair(task):
+    """Löst alle Kombinationen `grid` für ein Paar mit einem einzigen, jeweils angepassten Modell."""
+    pair, grid, solver_timeout, threads = task
+    sorted_keys, base_sales, boost_potential, _ = _worker_inputs[pair]
+    rows = []
+    model = handles = None
+    label = series_label({"StoreID": pair[0], "DeptID": pair[1]})
+
+    for combo in grid:
+        params = _model_parameters(combo)
+        cost_rate = params.pop("cost_rate")
+        promo_cost = {key: base_sales[key] * cost_rate for key in sorted_keys}
+        row = {"StoreID": pair[0], "DeptID": pair[1], **combo}
+
+        # Kosten über dem maximalen Boost → keine Promotion lohnt sich (wie run_promotion_sales_optimization)
+        if cost_rate >= params["boost_max"]:
+            rows.append({**row, "Objective": 0.0, "Promotions": 0, "Status": "Infeasible", "Seconds": 0.0})
+            continue
+
+        start = time.perf_counter()
+        if model is None:
+            handles = {}
+            with span("milp.build", label):
+                model, _, _ = build_promotion_model(sorted_keys, base_sales, boost_potential, promo_cost,
+                                                    handles=handles, **params)
+        else:
+            with span("milp.update", label):
+                update_model_parameters(model, handles, promo_cost, **params)
+        with span("milp.solve", label):
+            model.solve(create_solver(solver_timeout=solver_timeout, threads=threads))
+
+        x = handles["x"]
+        rows.append({**row, "Objective": pulp.value(model.objective) or 0.0,
+                     "Promotions": int(sum(round(x[key].varValue or 0) for key in sorted_keys)),
+                     "Status": pulp.LpStatus[model.status], "Seconds": time.perf_counter() - start})
+    return rows
+
+
+def run_parameter_sweep(df_sales, df_features, grid, solver_timeout=30, processes=None, progress_callback=None):
+    """
+    Optimiert alle Store/Dept-Paare in `df_sales` für jede Parameterkombination in `grid` (siehe parameter_grid).
+    Die Kombinationen eines Paares werden in Blöcke aufgeteilt, sodass auch wenige Paare alle Kerne nutzen; jeder
+    Block baut sein Modell einmal auf. progress_callback(done, total) zählt abgeschlossene Blöcke.
+
+    Returns
+    -------
+    (pd.DataFrame, pd.DataFrame)
+        Ergebnis je Paar und Kombination sowie die Summe der Zielfunktionswerte je Kombination.
+    """
+    pair_inputs = {}
+    holidays = holiday_dates(df_features)
+    for pair, df_pair in df_sales.groupby(["StoreID", "DeptID"]):
+        inputs = compute_model_inputs(prepare_weekly_sales(df_pair.copy(), df_features, holidays), 1.0)
+        if inputs[0]:
+            pair_inputs[pair] = inputs
+    if not pair_inputs or not grid:
+        return pd.DataFrame(), pd.DataFrame()
+
+    cores = multiprocessing.cpu_count()
+    chunks_per_pair = max(1, min(len(grid), math.ceil((processes or cores) / len(pair_inputs))))
+    chunk_size = math.ceil(len(grid) / chunks_per_pair)
+    workers, threads = plan_parallelism(len(pair_inputs) * chunks_per_pair,
+                                        [len(inputs[0]) for inputs in pair_inputs.values()], cores, processes)
+    tasks = [(pair, grid[i:i + chunk_size], solver_timeout, threads)
+             for pair in pair_inputs for i in range(0, len(grid), chunk_size)]
+
+    rows = []
+    with multiprocessing.Pool(processes=workers, initializer=_init_sweep_worker, initargs=(pair_inputs,)) as pool:
+        for done, chunk_rows in enumerate(pool.imap_unordered(_sweep_pair, tasks), 1):
+            rows.extend(chunk_rows)
+            if progress_callback:
+                progress_callback(done, len(tasks))
+        # Worker regulär beenden (statt terminate), damit sie ihre gesammelten Messungen schreiben
+        pool.close()
+        pool.join()
+
+    df_results = pd.DataFrame(rows)
+    summary = (df_results.groupby(list(SWEEP_PARAMETERS), as_index=False)
+               .agg(Objective=("Objective", "sum"), Promotions=("Promotions", "sum"), Seconds=("Seconds", "sum"),
+                    NotOptimal=("Status", lambda status: int((status != "Optimal").sum()))))
+    return df_results, summary
@@ -1,6 +1,5 @@
 import matplotlib.pyplot as plt
 import pandas as pd
-import seaborn as sns
 from matplotlib import ticker
 
 
@@ -32,7 +31,8 @@ def plot_promotion_optimization(df_solution):
         # Sortieren nach Datum
         df_melted = df_melted.sort_values(by='YearWeek')
 
-        # Plot
+        # Plot (seaborn erst beim Zeichnen importieren, der Import kostet knapp eine Sekunde)
+        import seaborn as sns
         fig, ax = plt.subplots(figsize=(16, 8))
         sns.barplot(
             data=df_melted,
@@ -53,17 +53,24 @@ def plot_promotion_optimization(df_solution):
         return fig
 
 
+def iso_week_start(years, weeks):
+    """Montag der ISO-Woche (vektorisiert): Montag der Woche des 4. Januar plus (Woche - 1) Wochen."""
+    jan4 = pd.to_datetime(years.astype(int) * 10000 + 104, format="%Y%m%d")
+    return jan4 - pd.to_timedelta(jan4.dt.weekday, unit="D") + pd.to_timedelta((weeks.astype(int) - 1) * 7, unit="D")
+
+
 def prepare_solution_data(df_solution):
+    """
+    Lösung je Store/Dept als {(StoreID, DeptID): DataFrame} (nach Woche sortiert, Spalte YearWeek = Wochenbeginn),
+    damit die Ergebnisanzeige ein Paar direkt nachschlagen kann, statt die Gesamtlösung je Paar zu filtern.
+    """
     if df_solution.empty:
-        return df_solution
+        return {}
 
-    df = df_solution.copy().dropna()
-    df['YearWeek'] = df.apply(
-        lambda row: pd.to_datetime(f"{int(row['Year'])}-W{int(row['Week']):02d}-1", format="%G-W%V-%u"),
-        axis=1
-    )
+    df = df_solution.dropna().copy()
+    df['YearWeek'] = iso_week_start(df['Year'], df['Week'])
     df = df.sort_values(['StoreID', 'DeptID', 'YearWeek'])
-    return df
+    return dict(iter(df.groupby(['StoreID', 'DeptID'], sort=True)))
 
 
 def plot_sales_boost(df_dept, store_id, dept_id):
@@ -89,6 +96,7 @@ def plot_sales_boost(df_dept, store_id, dept_id):
         value_name='Sales'
     )
 
+    import seaborn as sns
     fig, ax = plt.subplots(figsize=(14, 6))
     sns.barplot(
         data=df_melted,
@@ -139,3 +147,24 @@ def plot_sales_boost(df_dept, store_id, dept_id):
 
     fig.tight_layout()
     return fig
+
+
+def plot_parameter_sweep(df_summary, x_param, hue_param=None, labels=None):
+    # Zielfunktionswert (Netto-Gewinn aller Paare) je Parameterwert, optional eine Linie je Wert eines 2. Parameters
+    if df_summary.empty:
+        return None
+    labels = labels or {}
+
+    import seaborn as sns
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.lineplot(data=df_summary, x=x_param, y="Objective", hue=hue_param, marker="o", palette="viridis", ax=ax)
+
+    ax.set_title("Netto-Gewinn in Abhängigkeit der Parameter")
+    ax.set_xlabel(labels.get(x_param, x_param))
+    ax.set_ylabel("Netto-Gewinn (Zielfunktion)")
+    ax.yaxis.set_major_formatter(ticker.StrMethodFormatter("{x:,.0f}"))
+    if hue_param:
+        ax.legend(title=labels.get(hue_param, hue_param))
+    fig.tight_layout()
+
+    return fig
@@ -13,6 +13,7 @@ promo_optimizer_stores = st.Page("pages/promotion_optimizer/promo_optimizer_stor
 promo_optimizer_depts = st.Page("pages/promotion_optimizer/promo_optimizer_departments.py",
                                 title="Department Promotion optimizer")
 util_page = st.Page("pages/util.py", title="Verwaltung")
+performance_page = st.Page("pages/performance.py", title="Performance")
 descriptive_page = st.Page("pages/descriptive_analysis.py", title="Deskriptive Analyse")
 forecast_store_page = st.Page("pages/forecast/forecast_stores.py", title="Verkaufsprognose-Tool (Weekly Sales)")
 forecast_dept_page = st.Page("pages/forecast/forecast_departments.py", title="Verkaufsprognose (Departments)")
@@ -20,7 +21,7 @@ forecast_products_page = st.Page("pages/forecast/forecast_products.py", title="N
 
 # Hier werden die Seiten den Navigationskategorien zugeordnet
 pg = st.navigation({
-    "Home": [main_page, util_page],
+    "Home": [main_page, util_page, performance_page],
     "Optimizer": [promo_optimizer_stores, promo_optimizer_depts],
     "KI": [forecast_store_page, forecast_dept_page, forecast_products_page],
     "Deskriptive Analyse": [descriptive_page],
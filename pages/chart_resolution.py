@@ -0,0 +1,46 @@
+# Gemeinsame Streamlit-Bausteine für reduzierte Zeitreihen-Diagramme (siehe logic/analysis/downsampling.py):
+# Schalter für volle Auflösung in der Sidebar und Kennzahlen zur übertragenen Datenmenge.
+import pandas as pd
+import streamlit as st
+
+from logic.analysis.downsampling import MAX_POINTS, downsample, payload_bytes
+
+FULL_RESOLUTION_KEY = "chart_full_resolution"
+
+
+def full_resolution_toggle():
+    """Sidebar-Schalter; True = alle Punkte zeichnen."""
+    return st.sidebar.toggle(
+        "Diagramme in voller Auflösung",
+        key=FULL_RESOLUTION_KEY,
+        help=f"Standardmäßig werden Zeitreihen mit mehr als {MAX_POINTS:,} Punkten formerhaltend (LTTB) reduziert."
+    )
+
+
+def chart_points(df, x, y, stats, label, max_points=MAX_POINTS):
+    """
+    Punkte einer Reihe für ein Diagramm; ohne volle Auflösung per LTTB reduziert. Die Punktzahlen und Datenmengen
+    vorher/nachher werden für show_payload_metrics an `stats` angehängt.
+    """
+    shown = df if st.session_state.get(FULL_RESOLUTION_KEY, False) else downsample(df, x, y, max_points)
+    stats.append({
+        "Reihe": label,
+        "Punkte": len(df),
+        "Angezeigt": len(shown),
+        "KB gesamt": payload_bytes(df, [x, y]) / 1024,
+        "KB angezeigt": payload_bytes(shown, [x, y]) / 1024,
+    })
+    return shown
+
+
+def show_payload_metrics(stats):
+    """Sidebar-Expander mit den angezeigten Punkten und der Datenmenge aller Reihen dieses Durchlaufs."""
+    if not stats:
+        return
+    df_stats = pd.DataFrame(stats)
+    with st.sidebar.expander("Diagramm-Datenmenge"):
+        st.metric("Punkte", f"{df_stats['Angezeigt'].sum():,}",
+                  delta=f"{df_stats['Angezeigt'].sum() - df_stats['Punkte'].sum():,}", delta_color="off")
+        st.metric("Daten (KB)", f"{df_stats['KB angezeigt'].sum():,.1f}",
+                  delta=f"{df_stats['KB angezeigt'].sum() - df_stats['KB gesamt'].sum():,.1f}", delta_color="off")
+        st.dataframe(df_stats.round(1), hide_index=True)
@@ -6,8 +6,14 @@ import pandas as pd
 import seaborn as sns
 import streamlit as st
 
-from database.data_loader import load_data, load_product_data
+from database.data_loader import load_data, load_data_profile, load_product_data, load_sales_enriched, \
+    load_weekly_sales_aggregates
+from database.data_profile import profile_table
 from layout import with_layout
+from logic.analysis.timing import section_timer
+from logic.analysis.weekly_sales import MONTH_LABELS
+from pages.chart_resolution import chart_points, full_resolution_toggle, show_payload_metrics
+from pages.figure_cache import figure_key, show_cached_figure, show_figure, show_figure_cache_stats
 
 
 # Hinweis: st.set_page_config sollte in main.py stehen
@@ -41,54 +47,42 @@ def page():
     if section == "Datenübersicht":
         st.title("1) Datenübersicht")
 
-        # Hilfs-Funktion: Stat-Block pro DataFrame
-        def overview_block(name, df, date_col=None):
-            rows, cols = df.shape
+        # Vorberechnete Statistiken je Datenstand (siehe database/data_profile.py)
+        profiles = load_data_profile()
 
+        # Hilfs-Funktion: Stat-Block pro Tabelle
+        def overview_block(name, profile):
             # Layout in drei Spalten
             c1, c2, c3 = st.columns(3)
-            c1.metric("Zeilen", f"{rows:,}")
-            c1.metric("Spalten", f"{cols}")
-
-            # Datums­spanne, falls Spalte angegeben
-            if date_col and date_col in df.columns:
-                span = f"{df[date_col].min().date()} → {df[date_col].max().date()}"
-            else:
-                span = "—"
+            c1.metric("Zeilen", f"{profile['rows']:,}")
+            c1.metric("Spalten", f"{profile['columns']}")
+
+            # Datums­spanne, falls vorhanden
+            span = f"{profile['date_min']} → {profile['date_max']}" if profile["date_min"] else "—"
             c2.metric("Zeitraum", span)
 
             # Fehlende Werte absolut & %
-            miss = df.isna().sum().sum()
-            miss_pct = miss / (rows * cols) * 100
-            c3.metric("Fehlende", f"{miss:,}  ({miss_pct:.2f} %)")
+            c3.metric("Fehlende", f"{profile['missing']:,}  ({profile['missing_pct']:.2f} %)")
 
             # Detail-Expander
             with st.expander(f"Details zu **{name}**"):
                 st.write("Datentypen:")
-                st.dataframe(df.dtypes.to_frame("Typ"))
+                st.dataframe(profile_table(profile, "dtypes"))
                 st.write("Kopf der Tabelle:")
-                st.dataframe(df.head())
+                st.dataframe(profile_table(profile, "head"))
 
         # Anzeige für jede Tabelle
-        st.markdown("### Store")
-        overview_block("Store", df_stores)
-
-        st.markdown("### StoreFeature")
-        overview_block("StoreFeature", df_features, date_col="Date")
-
-        st.markdown("### WeeklySales")
-        overview_block("WeeklySales", df_sales, date_col="Date")
-
-        st.markdown("### HistoricalDemand")
-        overview_block("HistoricalDemand", df_demand, date_col="Date")
+        for name, profile in profiles.items():
+            st.markdown(f"### {name}")
+            overview_block(name, profile)
 
         # Gesamt-Überblick numerische Statistiken
         st.markdown("---")
         st.subheader("Deskriptive Statistik (numerische Spalten)")
-        tabs = st.tabs(["StoreFeature", "WeeklySales", "HistoricalDemand"])
-        tabs[0].dataframe(df_features.select_dtypes("number").describe().T)
-        tabs[1].dataframe(df_sales[["WeeklySales"]].describe().T)
-        tabs[2].dataframe(df_demand[["OrderDemand"]].describe().T)
+        described = ["StoreFeature", "WeeklySales", "HistoricalDemand"]
+        tabs = st.tabs(described)
+        for tab, name in zip(tabs, described):
+            tab.dataframe(profile_table(profiles[name], "describe"))
         return
 
     # ----------------------------------------
@@ -106,297 +100,241 @@ def page():
             [df_sales['Date'].min(), df_sales['Date'].max()]
         )
         start, end = pd.to_datetime(dr[0]), pd.to_datetime(dr[1])
-        df_ws = df_sales[
-            df_sales['StoreID'].isin(sel_stores) &
-            df_sales['DeptID'].isin(sel_depts) &
-            df_sales['Date'].between(start, end)
-            ]
+        full_resolution_toggle()
+        chart_stats = []
+
+        # Alle Aggregate je Auswahl und Datenstand gecacht (siehe logic/analysis/weekly_sales.py)
+        timings = {}
+        with section_timer("WeeklySales: Aggregate", timings):
+            agg = load_weekly_sales_aggregates(sel_stores, sel_depts, start, end)
 
         # Univariate: WeeklySales-Verteilung
-        st.subheader("Univariate: Verteilung der WeeklySales")
-        fig1, ax1 = plt.subplots(figsize=(6, 4))
-        sns.histplot(df_ws['WeeklySales'], bins=30, kde=True, ax=ax1)
-        ax1.set_title('Histogramm WeeklySales')
-        ax1.set_xmargin(0)
-        st.pyplot(fig1,  use_container_width=False, bbox_inches="tight")
+        with section_timer("WeeklySales: Histogramm", timings):
+            st.subheader("Univariate: Verteilung der WeeklySales")
+            hist = agg["histogram"]
+            key = figure_key("ws_hist", agg["histogram"])
+            if not show_cached_figure(key):
+                fig1, ax1 = plt.subplots(figsize=(6, 4))
+                if len(hist["counts"]):
+                    ax1.stairs(hist["counts"], hist["edges"], fill=True, alpha=0.5, edgecolor="white")
+                    ax1.plot(hist["kde_x"], hist["kde_y"])
+                ax1.set_xlabel('WeeklySales')
+                ax1.set_ylabel('Count')
+                ax1.set_title('Histogramm WeeklySales')
+                ax1.set_xmargin(0)
+                show_figure(key, fig1)
 
         # Bivariate: Zeitreihe pro Store/Dept
-        st.subheader("Bivariate: Zeitreihe nach Store/Dept")
-        fig2, ax2 = plt.subplots(figsize=(10, 4))
-        cmap = plt.cm.get_cmap('tab10')
-        combos = [(s, d) for s in sel_stores for d in sel_depts]
-        for idx, (s, d) in enumerate(combos):
-            sub = df_ws[(df_ws['StoreID'] == s) & (df_ws['DeptID'] == d)]
-            if sub.empty: continue
-            ax2.plot(sub['Date'], sub['WeeklySales'],
-                     marker='o', linestyle='-', label=f"S{s}-D{d}",
-                     color=cmap(idx))
-        ax2.set_xlabel('Datum')
-        ax2.set_ylabel('WeeklySales')
-        ax2.xaxis.set_major_locator(mdates.AutoDateLocator())
-        ax2.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%y'))
-        plt.setp(ax2.get_xticklabels(), rotation=45, ha='right')
-        ax2.legend(loc='upper left', bbox_to_anchor=(1, 1))
-        ax2.grid(True)
-        ax2.set_xmargin(0)
-        st.pyplot(fig2,  use_container_width=False, bbox_inches="tight")
-
-        st.markdown("---")
-        st.subheader("Boxplot: WeeklySales pro StoreType")
-
-        # StoreType anhängen
-        df_ws_type = df_ws.merge(df_stores[["StoreID", "StoreType"]], on="StoreID", how="left")
-
-        fig3, ax3 = plt.subplots(figsize=(6, 4))
-        sns.boxplot(data=df_ws_type, x="StoreType", y="WeeklySales", palette="pastel", ax=ax3)
-        ax3.set_xlabel("StoreType")
-        ax3.set_ylabel("WeeklySales")
-        ax3.set_title("Verteilung der WeeklySales nach StoreType")
-        st.pyplot(fig3,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig3)
+        with section_timer("WeeklySales: Zeitreihen", timings):
+            st.subheader("Bivariate: Zeitreihe nach Store/Dept")
+            combos = [f"S{s}-D{d}" for s in sel_stores for d in sel_depts]
+            # Farbe je Position in der Auswahl → auch fehlende Kombinationen belegen ihren Index
+            series = {idx: (label, chart_points(agg["combos"][label], 'Date', 'WeeklySales', chart_stats, label))
+                      for idx, label in enumerate(combos) if label in agg["combos"]}
+            key = figure_key("ws_combos", series)
+            if not show_cached_figure(key):
+                fig2, ax2 = plt.subplots(figsize=(10, 4))
+                cmap = plt.get_cmap('tab10')
+                for idx, (label, sub) in series.items():
+                    ax2.plot(sub['Date'], sub['WeeklySales'],
+                             marker='o', linestyle='-', label=label,
+                             color=cmap(idx))
+                ax2.set_xlabel('Datum')
+                ax2.set_ylabel('WeeklySales')
+                ax2.xaxis.set_major_locator(mdates.AutoDateLocator())
+                ax2.xaxis.set_major_formatter(mdates.DateFormatter('%d.%m.%y'))
+                plt.setp(ax2.get_xticklabels(), rotation=45, ha='right')
+                ax2.legend(loc='upper left', bbox_to_anchor=(1, 1))
+                ax2.grid(True)
+                ax2.set_xmargin(0)
+                show_figure(key, fig2)
+
+        with section_timer("WeeklySales: StoreType", timings):
+            st.markdown("---")
+            st.subheader("Boxplot: WeeklySales pro StoreType")
+
+            key = figure_key("ws_store_type", agg["by_store_type"])
+            if not show_cached_figure(key):
+                fig3, ax3 = plt.subplots(figsize=(6, 4))
+                sns.boxplot(data=agg["by_store_type"], x="StoreType", y="WeeklySales", palette="pastel", ax=ax3)
+                ax3.set_xlabel("StoreType")
+                ax3.set_ylabel("WeeklySales")
+                ax3.set_title("Verteilung der WeeklySales nach StoreType")
+                show_figure(key, fig3)
 
         # ------------------------------------------------------------------
         # 2.2 Ø WeeklySales pro Monat
         # ------------------------------------------------------------------
-        st.markdown("---")
-        st.subheader("Durchschnittlicher WeeklySales je Monat")
-
-        # Monat aus dem Date-Feld holen (3-stellige dt. Abkürzung)
-        df_ws["Month"] = df_ws["Date"].dt.month_name(locale="de_DE").str[:3]
-
-        # Mittelwert pro Monat berechnen und chronologisch sortieren
-        month_order = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun",
-                       "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
-
-        month_mean = (
-            df_ws.groupby("Month")["WeeklySales"]
-            .mean()
-            .reindex(month_order)  # fixe Reihenfolge
-            .reset_index()
-        )
-
-        fig_m, ax_m = plt.subplots(figsize=(7, 3))
-        sns.barplot(
-            data=month_mean,
-            x="Month",
-            y="WeeklySales",
-            palette="Greens_d",
-            ax=ax_m
-        )
-        ax_m.set_xlabel("Monat")
-        ax_m.set_ylabel("Ø WeeklySales")
-        ax_m.set_title("Ø WeeklySales pro Monat")
-        plt.xticks(rotation=45, ha="right")
-        st.pyplot(fig_m,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig_m)
+        with section_timer("WeeklySales: Monatsmittel", timings):
+            st.markdown("---")
+            st.subheader("Durchschnittlicher WeeklySales je Monat")
+
+            # Bereits chronologisch sortiert (Monatsnummer → Kürzel, unabhängig vom Locale)
+            key = figure_key("ws_month", agg["monthly_mean"])
+            if not show_cached_figure(key):
+                fig_m, ax_m = plt.subplots(figsize=(7, 3))
+                sns.barplot(
+                    data=agg["monthly_mean"],
+                    x="Month",
+                    y="WeeklySales",
+                    palette="Greens_d",
+                    ax=ax_m
+                )
+                ax_m.set_xlabel("Monat")
+                ax_m.set_ylabel("Ø WeeklySales")
+                ax_m.set_title("Ø WeeklySales pro Monat")
+                plt.xticks(rotation=45, ha="right")
+                show_figure(key, fig_m)
 
         # ------------------------------------------------------------------
         # 2.3 Heatmap: WeeklySales pro Monat & StoreID
         # ------------------------------------------------------------------
-        st.markdown("---")
-        st.subheader("Heatmap: Umsatzsaison je Store & Monat")
-
-        df_ws["Monat"] = df_ws["Date"].dt.month_name(locale="de_DE").str[:3]
-        pivot_ws = (
-            df_ws.groupby(["StoreID", "Monat"])["WeeklySales"]
-            .sum()
-            .unstack(fill_value=0)
-        )
-        monat_order = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun",
-                       "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
-        pivot_ws = pivot_ws.reindex(columns=monat_order)
-
-        fig5, ax5 = plt.subplots(figsize=(9, 4))
-        sns.heatmap(pivot_ws, cmap="YlGnBu", linewidths=0.5, annot=False, ax=ax5)
-        ax5.set_xlabel("Monat")
-        ax5.set_ylabel("StoreID")
-        ax5.set_title("Summe WeeklySales pro Store & Monat")
-        st.pyplot(fig5,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig5)
+        with section_timer("WeeklySales: Store-Monat-Heatmap", timings):
+            st.markdown("---")
+            st.subheader("Heatmap: Umsatzsaison je Store & Monat")
+
+            key = figure_key("ws_store_month", agg["store_month"])
+            if not show_cached_figure(key):
+                fig5, ax5 = plt.subplots(figsize=(9, 4))
+                sns.heatmap(agg["store_month"], cmap="YlGnBu", linewidths=0.5, annot=False, ax=ax5)
+                ax5.set_xlabel("Monat")
+                ax5.set_ylabel("StoreID")
+                ax5.set_title("Summe WeeklySales pro Store & Monat")
+                show_figure(key, fig5)
 
         # ------------------------------------------------------------------
         # 2.4 Scatter: WeeklySales vs. Temperatur
         # ------------------------------------------------------------------
-        st.markdown("---")
-        st.subheader("Scatter: WeeklySales vs. Temperatur")
-
-        # Temperatur aus Features anhängen
-        df_temp = df_ws.merge(
-            df_features[["StoreID", "Date", "Temperature"]],
-            on=["StoreID", "Date"],
-            how="left"
-        )
-        # Stichprobe für bessere Performance
-        sample_temp = df_temp.sample(n=min(4000, len(df_temp)), random_state=42)
-
-        fig6, ax6 = plt.subplots(figsize=(6, 4))
-        sns.scatterplot(
-            data=sample_temp,
-            x="Temperature",
-            y="WeeklySales",
-            alpha=0.3,
-            ax=ax6
-        )
-        ax6.set_xlabel("Temperatur (°F)")
-        ax6.set_ylabel("WeeklySales")
-        ax6.set_title("Zusammenhang: Temperatur vs. WeeklySales")
-        ax6.set_xmargin(0)
-        st.pyplot(fig6,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig6)
+        with section_timer("WeeklySales: Temperatur", timings):
+            st.markdown("---")
+            st.subheader("Scatter: WeeklySales vs. Temperatur")
+
+            # Stichprobe für bessere Performance (in den Aggregaten gezogen)
+            key = figure_key("ws_temperature", agg["temperature"])
+            if not show_cached_figure(key):
+                fig6, ax6 = plt.subplots(figsize=(6, 4))
+                sns.scatterplot(
+                    data=agg["temperature"],
+                    x="Temperature",
+                    y="WeeklySales",
+                    alpha=0.3,
+                    ax=ax6
+                )
+                ax6.set_xlabel("Temperatur (°F)")
+                ax6.set_ylabel("WeeklySales")
+                ax6.set_title("Zusammenhang: Temperatur vs. WeeklySales")
+                ax6.set_xmargin(0)
+                show_figure(key, fig6)
 
         # ------------------------------------------------------------------
         # 2.3 Korrelationsmatrix (WeeklySales + numerische Features)
         # ------------------------------------------------------------------
-        st.markdown("---")
-        st.subheader("Korrelationsmatrix: WeeklySales & Features")
-
-        # ❶  Merge: WeeklySales-Ausschnitt + Features-Tabelle
-        df_corr = (
-            df_ws.merge(
-                df_features,  # enthält Temperature, FuelPrice, CPI, …
-                on=["StoreID", "Date"],
-                how="left"
-            )
-            .merge(
-                df_stores[["StoreID", "StoreSize"]],  # optional: StoreSize anhängen
-                on="StoreID",
-                how="left"
-            )
-        )
-
-        # ❷  Nur numerische Spalten auswählen
-        num_cols = df_corr.select_dtypes(include="number")
-
-        # ❸  Korrelation berechnen
-        corr_mat = num_cols.corr().round(2)
-
-        # ❹  Heatmap plotten
-        fig_corr, ax_corr = plt.subplots(figsize=(9, 6))
-        sns.heatmap(
-            corr_mat,
-            annot=True,
-            fmt=".2f",
-            cmap="coolwarm",
-            linewidths=0.4,
-            ax=ax_corr
-        )
-        ax_corr.set_title("Korrelationen zwischen WeeklySales & numerischen Features")
-        st.pyplot(fig_corr,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig_corr)
+        with section_timer("WeeklySales: Korrelationen", timings):
+            st.markdown("---")
+            st.subheader("Korrelationsmatrix: WeeklySales & Features")
+
+            key = figure_key("ws_corr", agg["corr"])
+            if not show_cached_figure(key):
+                fig_corr, ax_corr = plt.subplots(figsize=(9, 6))
+                sns.heatmap(
+                    agg["corr"],
+                    annot=True,
+                    fmt=".2f",
+                    cmap="coolwarm",
+                    linewidths=0.4,
+                    ax=ax_corr
+                )
+                ax_corr.set_title("Korrelationen zwischen WeeklySales & numerischen Features")
+                show_figure(key, fig_corr)
 
         # ------------------------------------------------------------------
         # 2.4 (Optional) Scatter-Matrix der Top-5 korrelierenden Variablen
         # ------------------------------------------------------------------
-        # Top-5 absolut höchsten Korrelationen zu WeeklySales wählen
-        top5 = (
-            corr_mat["WeeklySales"]
-            .abs()
-            .sort_values(ascending=False)
-            .iloc[1:6]  # erstes Element ist 1.0 (Self-Corr)
-            .index
-            .tolist()
-        )
-        pair_cols = ["WeeklySales"] + top5
-
-        st.markdown("#### Scatter-Matrix der 5 stärksten Korrelationen")
-        fig_pair = sns.pairplot(
-            data=num_cols[pair_cols].sample(n=min(500, len(num_cols))),  # Sample für Geschwindigkeit
-            diag_kind="kde",
-            plot_kws=dict(alpha=0.3, s=20)
-        )
-        st.pyplot(fig_pair.figure,  use_container_width=False, bbox_inches="tight")
-        plt.close("all")
+        with section_timer("WeeklySales: Scatter-Matrix", timings):
+            st.markdown("#### Scatter-Matrix der 5 stärksten Korrelationen")
+            key = figure_key("ws_pairplot", agg["pair_sample"])
+            if not show_cached_figure(key):
+                fig_pair = sns.pairplot(
+                    data=agg["pair_sample"],  # Sample für Geschwindigkeit
+                    diag_kind="kde",
+                    plot_kws=dict(alpha=0.3, s=20)
+                )
+                show_figure(key, fig_pair)
 
         # ------------------------------------------------------------------
         # 2.5 Zusätzliche Zusammenhänge mit Features
         # ------------------------------------------------------------------
-        st.markdown("---")
-        st.subheader("Zusätzliche Analysen: CPI, Unemployment, IsHoliday, StoreSize")
-
-        # ■ ❶ Merge mit Features und StoreSize
-        df_ws_feat = (
-            df_ws
-            .merge(
-                df_features[["StoreID", "Date", "CPI", "Unemployment", "IsHoliday"]],
-                on=["StoreID", "Date"], how="left"
-            )
-            .merge(
-                df_stores[["StoreID", "StoreSize"]],
-                on="StoreID", how="left"
-            )
-        )
-
-        # ← Neu: gemeinsame Holiday-Flag erzeugen (bool)
-        df_ws_feat["HolidayFlag"] = (
-                df_ws_feat.get("IsHoliday_x", False) |
-                df_ws_feat.get("IsHoliday_y", False)
-        )
-
-        # ■ ❷ Barplot: Ø WeeklySales an Feiertagen vs. normalen Wochen
-        fig_hol, ax_hol = plt.subplots(figsize=(6, 3))
-        sns.barplot(
-            data=df_ws_feat,
-            x="HolidayFlag",  # statt IsHoliday
-            y="WeeklySales",
-            ci=None,
-            palette=["skyblue", "salmon"],
-            ax=ax_hol
-        )
-        ax_hol.set_xticklabels(["Normal", "Feiertag"])
-        ax_hol.set_xlabel("")
-        ax_hol.set_ylabel("Ø WeeklySales")
-        ax_hol.set_title("Durchschnittlicher Umsatz: Feiertag vs. Normal")
-        st.pyplot(fig_hol,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig_hol)
-
-        # ■ ❸ Scatter: WeeklySales vs. CPI
-        fig_cpi, ax_cpi = plt.subplots(figsize=(6, 4))
-        sns.scatterplot(
-            data=df_ws_feat.sample(n=min(1000, len(df_ws_feat)), random_state=1),
-            x="CPI",
-            y="WeeklySales",
-            alpha=0.4,
-            ax=ax_cpi
-        )
-        ax_cpi.set_title("WeeklySales vs. CPI")
-        ax_cpi.set_xlabel("Consumer Price Index (CPI)")
-        ax_cpi.set_ylabel("WeeklySales")
-        ax_cpi.set_xmargin(0)
-        st.pyplot(fig_cpi,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig_cpi)
-
-        # ■ ❹ Scatter: WeeklySales vs. Unemployment
-        fig_unemp, ax_unemp = plt.subplots(figsize=(6, 4))
-        sns.scatterplot(
-            data=df_ws_feat.sample(n=min(1000, len(df_ws_feat)), random_state=2),
-            x="Unemployment",
-            y="WeeklySales",
-            alpha=0.4,
-            ax=ax_unemp
-        )
-        ax_unemp.set_title("WeeklySales vs. Unemployment Rate")
-        ax_unemp.set_xlabel("Unemployment Rate")
-        ax_unemp.set_ylabel("WeeklySales")
-        st.pyplot(fig_unemp,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig_unemp)
-
-        # ■ ❺ Boxplot: WeeklySales nach StoreSize-Klassen
-        st.markdown("---")
-        st.subheader("WeeklySales nach StoreSize")
-        fig_ss, ax_ss = plt.subplots(figsize=(6, 4))
-        sns.boxplot(
-            data=df_ws_feat,
-            x="StoreSize",
-            y="WeeklySales",
-            palette="vlag",
-            ax=ax_ss
-        )
-        ax_ss.set_title("Verteilung der WeeklySales nach StoreSize")
-        ax_ss.set_xlabel("StoreSize")
-        ax_ss.set_ylabel("WeeklySales")
-        st.pyplot(fig_ss,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig_ss)
-
+        with section_timer("WeeklySales: Features", timings):
+            st.markdown("---")
+            st.subheader("Zusätzliche Analysen: CPI, Unemployment, IsHoliday, StoreSize")
+
+            # ■ ❶ Barplot: Ø WeeklySales an Feiertagen vs. normalen Wochen
+            key = figure_key("ws_holiday", agg["holiday_mean"])
+            if not show_cached_figure(key):
+                fig_hol, ax_hol = plt.subplots(figsize=(6, 3))
+                ax_hol.bar(["Normal", "Feiertag"], agg["holiday_mean"].fillna(0).to_numpy(),
+                           color=["skyblue", "salmon"])
+                ax_hol.set_xlabel("")
+                ax_hol.set_ylabel("Ø WeeklySales")
+                ax_hol.set_title("Durchschnittlicher Umsatz: Feiertag vs. Normal")
+                show_figure(key, fig_hol)
+
+            # ■ ❷ Scatter: WeeklySales vs. CPI
+            key = figure_key("ws_cpi", agg["cpi"])
+            if not show_cached_figure(key):
+                fig_cpi, ax_cpi = plt.subplots(figsize=(6, 4))
+                sns.scatterplot(
+                    data=agg["cpi"],
+                    x="CPI",
+                    y="WeeklySales",
+                    alpha=0.4,
+                    ax=ax_cpi
+                )
+                ax_cpi.set_title("WeeklySales vs. CPI")
+                ax_cpi.set_xlabel("Consumer Price Index (CPI)")
+                ax_cpi.set_ylabel("WeeklySales")
+                ax_cpi.set_xmargin(0)
+                show_figure(key, fig_cpi)
+
+            # ■ ❸ Scatter: WeeklySales vs. Unemployment
+            key = figure_key("ws_unemployment", agg["unemployment"])
+            if not show_cached_figure(key):
+                fig_unemp, ax_unemp = plt.subplots(figsize=(6, 4))
+                sns.scatterplot(
+                    data=agg["unemployment"],
+                    x="Unemployment",
+                    y="WeeklySales",
+                    alpha=0.4,
+                    ax=ax_unemp
+                )
+                ax_unemp.set_title("WeeklySales vs. Unemployment Rate")
+                ax_unemp.set_xlabel("Unemployment Rate")
+                ax_unemp.set_ylabel("WeeklySales")
+                show_figure(key, fig_unemp)
+
+        # ■ ❹ Boxplot: WeeklySales nach StoreSize-Klassen
+        with section_timer("WeeklySales: StoreSize", timings):
+            st.markdown("---")
+            st.subheader("WeeklySales nach StoreSize")
+            key = figure_key("ws_store_size", agg["by_store_size"])
+            if not show_cached_figure(key):
+                fig_ss, ax_ss = plt.subplots(figsize=(6, 4))
+                sns.boxplot(
+                    data=agg["by_store_size"],
+                    x="StoreSize",
+                    y="WeeklySales",
+                    palette="vlag",
+                    ax=ax_ss
+                )
+                ax_ss.set_title("Verteilung der WeeklySales nach StoreSize")
+                ax_ss.set_xlabel("StoreSize")
+                ax_ss.set_ylabel("WeeklySales")
+                show_figure(key, fig_ss)
+
+        show_figure_cache_stats()
+        show_payload_metrics(chart_stats)
+        with st.sidebar.expander("Renderzeiten"):
+            st.dataframe(pd.Series(timings, name="ms").round(0))
         return
 
     # ----------------------------------------
@@ -424,13 +362,14 @@ def page():
         df_hd["OrderDemand"] = pd.to_numeric(df_hd["OrderDemand"], errors="coerce").fillna(0)
 
         st.markdown("### 3.1 Histogramm OrderDemand")
-        fig1, ax1 = plt.subplots(figsize=(6, 3))
-        sns.histplot(df_hd["OrderDemand"], bins=40, kde=True, ax=ax1, color="#5A9")
-        ax1.set_xlabel("Bestellmenge")
-        ax1.set_ylabel("Häufigkeit")
-        ax1.set_xmargin(0)
-        st.pyplot(fig1,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig1)
+        key = figure_key("hd_hist", df_hd["OrderDemand"])
+        if not show_cached_figure(key):
+            fig1, ax1 = plt.subplots(figsize=(6, 3))
+            sns.histplot(df_hd["OrderDemand"], bins=40, kde=True, ax=ax1, color="#5A9")
+            ax1.set_xlabel("Bestellmenge")
+            ax1.set_ylabel("Häufigkeit")
+            ax1.set_xmargin(0)
+            show_figure(key, fig1)
 
         st.markdown("### 3.2 Monatliche Summe + 6-Monats-Ø")
         df_hd["YearMonth"] = df_hd["Date"].dt.to_period("M").dt.to_timestamp()
@@ -438,16 +377,17 @@ def page():
         # rolling mean funktioniert jetzt
         monthly["Rolling6"] = monthly["OrderDemand"].rolling(6).mean()
 
-        fig2, ax2 = plt.subplots(figsize=(8, 3))
-        ax2.plot(monthly["YearMonth"], monthly["OrderDemand"], marker="o", label="Monatssumme")
-        ax2.plot(monthly["YearMonth"], monthly["Rolling6"], color="red", label="6-Monats-Ø")
-        ax2.set_xlabel("Monat")
-        ax2.set_ylabel("Summe OrderDemand")
-        ax2.legend()
-        ax2.set_xmargin(0)
-        plt.xticks(rotation=45, ha="right")
-        st.pyplot(fig2,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig2)
+        key = figure_key("hd_monthly", monthly)
+        if not show_cached_figure(key):
+            fig2, ax2 = plt.subplots(figsize=(8, 3))
+            ax2.plot(monthly["YearMonth"], monthly["OrderDemand"], marker="o", label="Monatssumme")
+            ax2.plot(monthly["YearMonth"], monthly["Rolling6"], color="red", label="6-Monats-Ø")
+            ax2.set_xlabel("Monat")
+            ax2.set_ylabel("Summe OrderDemand")
+            ax2.legend()
+            ax2.set_xmargin(0)
+            plt.xticks(rotation=45, ha="right")
+            show_figure(key, fig2)
 
         # ------------------------------------------------------------------------
         # 3.3 Statische Ranglisten
@@ -479,7 +419,7 @@ def page():
         # ------------------------------------------------------------------------
         st.markdown("### 3.4 Heatmap Warehouse × Monat")
 
-        df_hd["Monat"] = df_hd["Date"].dt.month_name(locale="de_DE").str[:3]
+        df_hd["Monat"] = df_hd["Date"].dt.month.map(MONTH_LABELS)
         pivot = (
             df_hd.groupby(["WarehouseCode", "Monat"])["OrderDemand"]
             .sum()
@@ -491,20 +431,21 @@ def page():
 
         st.dataframe(pivot)  # Überblick
 
-        fig3, ax3 = plt.subplots(figsize=(8, 4))
-        sns.heatmap(
-            pivot,
-            annot=True,
-            fmt=".0f",
-            cmap="YlGnBu",
-            linewidths=0.4,
-            ax=ax3,
-        )
-        ax3.set_xlabel("Monat")
-        ax3.set_ylabel("Warehouse")
-        ax3.set_title("OrderDemand pro Warehouse & Monat")
-        st.pyplot(fig3,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig3)
+        key = figure_key("hd_heatmap", pivot)
+        if not show_cached_figure(key):
+            fig3, ax3 = plt.subplots(figsize=(8, 4))
+            sns.heatmap(
+                pivot,
+                annot=True,
+                fmt=".0f",
+                cmap="YlGnBu",
+                linewidths=0.4,
+                ax=ax3,
+            )
+            ax3.set_xlabel("Monat")
+            ax3.set_ylabel("Warehouse")
+            ax3.set_title("OrderDemand pro Warehouse & Monat")
+            show_figure(key, fig3)
 
         # ------------------------------------------------------------------------
         # 3.5 Top-10 Produkte nach OrderDemand (bleibt!)
@@ -519,19 +460,20 @@ def page():
         )
         st.table(top10)
 
-        fig4, ax4 = plt.subplots(figsize=(6, 4))
-        sns.barplot(
-            data=top10,
-            x="OrderDemand",
-            y="ProductCode",
-            palette="pastel",
-            ax=ax4,
-        )
-        ax4.set_title("Top-10 Produkte nach OrderDemand")
-        ax4.set_xlabel("Summe OrderDemand")
-        ax4.set_ylabel("ProductCode")
-        st.pyplot(fig4,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig4)
+        key = figure_key("hd_top10", top10)
+        if not show_cached_figure(key):
+            fig4, ax4 = plt.subplots(figsize=(6, 4))
+            sns.barplot(
+                data=top10,
+                x="OrderDemand",
+                y="ProductCode",
+                palette="pastel",
+                ax=ax4,
+            )
+            ax4.set_title("Top-10 Produkte nach OrderDemand")
+            ax4.set_xlabel("Summe OrderDemand")
+            ax4.set_ylabel("ProductCode")
+            show_figure(key, fig4)
 
         # ------------------------------------------------------------------------
         # 3.6 Korrelationsmatrix (OrderDemand & kodierte Kategorien)
@@ -550,18 +492,20 @@ def page():
 
         corr_mat = df_corr[num_cols].corr().round(2)
 
-        fig_corr, ax_corr = plt.subplots(figsize=(6, 4))
-        sns.heatmap(
-            corr_mat,
-            annot=True,
-            cmap="coolwarm",
-            linewidths=0.4,
-            ax=ax_corr
-        )
-        ax_corr.set_title("Korrelationen: OrderDemand & kodierte Kategorien")
-        st.pyplot(fig_corr,  use_container_width=False, bbox_inches="tight")
-        plt.close(fig_corr)
+        key = figure_key("hd_corr", corr_mat)
+        if not show_cached_figure(key):
+            fig_corr, ax_corr = plt.subplots(figsize=(6, 4))
+            sns.heatmap(
+                corr_mat,
+                annot=True,
+                cmap="coolwarm",
+                linewidths=0.4,
+                ax=ax_corr
+            )
+            ax_corr.set_title("Korrelationen: OrderDemand & kodierte Kategorien")
+            show_figure(key, fig_corr)
 
+        show_figure_cache_stats()
         return
     # ----------------------------------------
     # 5b) Datensatz-Vergleich (WeeklySales vs. OrderDemand)
@@ -648,7 +592,8 @@ def page():
         }
 
         # 2) Flags in df_ev setzen
-        df_ev = df_sales.copy()
+        # StoreType kommt aus der vorab verknüpften Sicht SalesEnriched (kein Merge mit df_stores)
+        df_ev = load_sales_enriched()[["StoreID", "Date", "WeeklySales", "IsHoliday", "StoreType"]].copy()
         df_ev["IsHoliday"] = df_ev["IsHoliday"].astype(bool)
         for ev_name, ev_dates in events.items():
             df_ev[ev_name] = df_ev["Date"].isin(pd.to_datetime(ev_dates))
@@ -669,45 +614,46 @@ def page():
             .fillna(0)
         )
 
-        fig_pie, ax_pie = plt.subplots(figsize=(2.8, 2.8))
-        ax_pie.pie(
-            type_counts,
-            labels=type_counts.index.map(lambda t: f"Type {t}"),
-            autopct="%1.1f %%",
-            textprops={"fontsize": 12},
-            startangle=90,
-            colors=sns.color_palette("Set2")[: len(type_counts)],
-        )
-        ax_pie.set_title("Anteil der Store-Typen", fontsize=13)
-        ax_pie.axis("equal")
-        st.pyplot(fig_pie, use_container_width=False, bbox_inches="tight")
-        plt.close(fig_pie)
+        key = figure_key("ev_store_types", type_counts)
+        if not show_cached_figure(key):
+            fig_pie, ax_pie = plt.subplots(figsize=(2.8, 2.8))
+            ax_pie.pie(
+                type_counts,
+                labels=type_counts.index.map(lambda t: f"Type {t}"),
+                autopct="%1.1f %%",
+                textprops={"fontsize": 12},
+                startangle=90,
+                colors=sns.color_palette("Set2")[: len(type_counts)],
+            )
+            ax_pie.set_title("Anteil der Store-Typen", fontsize=13)
+            ax_pie.axis("equal")
+            show_figure(key, fig_pie)
 
         # ▸ 2) Box-Plot: StoreSize pro Typ
         st.markdown("### StoreSize nach Store-Typ")
 
-        fig_box, ax_box = plt.subplots(figsize=(4, 2.8))
-        sns.boxplot(
-            data=df_stores,
-            x="StoreType",
-            y="StoreSize",
-            palette="Set2",
-            order=["A", "B", "C"],
-            ax=ax_box,
-            showfliers=False,
-        )
-        ax_box.set_xlabel("Store-Typ")
-        ax_box.set_ylabel("StoreSize")
-        ax_box.set_title("Verteilung der Verkaufsfläche je Typ")
-        st.pyplot(fig_box, use_container_width=False, bbox_inches="tight")
-        plt.close(fig_box)
+        key = figure_key("ev_store_size", df_stores[["StoreType", "StoreSize"]])
+        if not show_cached_figure(key):
+            fig_box, ax_box = plt.subplots(figsize=(4, 2.8))
+            sns.boxplot(
+                data=df_stores,
+                x="StoreType",
+                y="StoreSize",
+                palette="Set2",
+                order=["A", "B", "C"],
+                ax=ax_box,
+                showfliers=False,
+            )
+            ax_box.set_xlabel("Store-Typ")
+            ax_box.set_ylabel("StoreSize")
+            ax_box.set_title("Verteilung der Verkaufsfläche je Typ")
+            show_figure(key, fig_box)
         # ─────────────────────────────────────────────────────────────
         st.markdown("### 4.2 Event-Analyse")
         st.subheader("Holiday-Effekt nach Store-Typ")
 
        
-        df_ht = df_ev.merge(df_stores[["StoreID", "StoreType"]],
-                            on="StoreID", how="left")
+        df_ht = df_ev
         holiday_names = list(events.keys())
         means = {
             hol: df_ht[df_ht[hol]].groupby("StoreType")["WeeklySales"].mean()
@@ -724,27 +670,29 @@ def page():
         x = np.arange(len(holiday_names))
         width = 0.25
 
-        fig1, ax1 = plt.subplots(figsize=(8, 4))
-        barsA = ax1.bar(x - width, A_means, width, label="Type A")
-        barsB = ax1.bar(x, B_means, width, label="Type B")
-        barsC = ax1.bar(x + width, C_means, width, label="Type C")
-
-        ax1.set_xticks(x)
-        ax1.set_xticklabels(holiday_names, rotation=45)
-        ax1.set_ylabel("Avg WeeklySales")
-        ax1.axhline(mean_hol, color="red", linestyle="--", label="Holiday Ø")
-        ax1.axhline(mean_non, color="green", linestyle="--", label="Non-Holiday Ø")
-        ax1.legend(loc="upper left", bbox_to_anchor=(1, 1))
-
-        for bars in (barsA, barsB, barsC):
-            for r in bars:
-                h = r.get_height()
-                ax1.annotate(f"{h:,.0f}",
-                             xy=(r.get_x() + r.get_width() / 2, h),
-                             xytext=(0, 3), textcoords="offset points",
-                             ha="center", va="bottom")
-
-        st.pyplot(fig1,  use_container_width=False, bbox_inches="tight")
+        key = figure_key("ev_holiday_types", [A_means, B_means, C_means, mean_hol, mean_non])
+        if not show_cached_figure(key):
+            fig1, ax1 = plt.subplots(figsize=(8, 4))
+            barsA = ax1.bar(x - width, A_means, width, label="Type A")
+            barsB = ax1.bar(x, B_means, width, label="Type B")
+            barsC = ax1.bar(x + width, C_means, width, label="Type C")
+
+            ax1.set_xticks(x)
+            ax1.set_xticklabels(holiday_names, rotation=45)
+            ax1.set_ylabel("Avg WeeklySales")
+            ax1.axhline(mean_hol, color="red", linestyle="--", label="Holiday Ø")
+            ax1.axhline(mean_non, color="green", linestyle="--", label="Non-Holiday Ø")
+            ax1.legend(loc="upper left", bbox_to_anchor=(1, 1))
+
+            for bars in (barsA, barsB, barsC):
+                for r in bars:
+                    h = r.get_height()
+                    ax1.annotate(f"{h:,.0f}",
+                                 xy=(r.get_x() + r.get_width() / 2, h),
+                                 xytext=(0, 3), textcoords="offset points",
+                                 ha="center", va="bottom")
+
+            show_figure(key, fig1)
         st.markdown("---")
 
         # --------------------------------------------------
@@ -756,6 +704,8 @@ def page():
             options=holiday_names,
             default=holiday_names
         )
+        full_resolution_toggle()
+        chart_stats = []
 
         # 3a) Barplot: Ø WeeklySales pro ausgewähltem Event
         overall = (
@@ -769,35 +719,45 @@ def page():
             .sort_values(ascending=False)
             .reset_index()
         )
-        fig2, ax2 = plt.subplots(figsize=(6, 3))
-        sns.barplot(data=overall, x="WeeklySales", y="Event", ax=ax2, palette="pastel")
-        ax2.set_xlabel("Ø WeeklySales")
-        ax2.set_title("Average WeeklySales pro Event")
-        st.pyplot(fig2,  use_container_width=False, bbox_inches="tight")
+        key = figure_key("ev_overall", overall)
+        if not show_cached_figure(key):
+            fig2, ax2 = plt.subplots(figsize=(6, 3))
+            sns.barplot(data=overall, x="WeeklySales", y="Event", ax=ax2, palette="pastel")
+            ax2.set_xlabel("Ø WeeklySales")
+            ax2.set_title("Average WeeklySales pro Event")
+            show_figure(key, fig2)
 
         st.markdown("---")
 
         # 3b) Zeitreihe: WeeklySales über Zeit für ausgewählte Events & Non-Event
-        fig3, ax3 = plt.subplots(figsize=(10, 4))
+        series = {}
         for ev in sel_events:
             ser = (df_ev[df_ev[ev]]
-                   .groupby("Date")["WeeklySales"]
-                   .mean()
-                   .rename(ev))
-            ax3.plot(ser.index, ser.values, marker='o', label=ev)
+                   .groupby("Date", as_index=False)["WeeklySales"]
+                   .mean())
+            series[ev] = chart_points(ser, "Date", "WeeklySales", chart_stats, ev)
 
         non = (df_ev[~df_ev[sel_events].any(axis=1)]
-               .groupby("Date")["WeeklySales"]
-               .mean()
-               .rename("Non_Event"))
-        ax3.plot(non.index, non.values, color="gray", linestyle="--", label="Non_Event")
-
-        ax3.set_xlabel("Datum")
-        ax3.set_ylabel("Ø WeeklySales")
-        ax3.legend(loc="upper left", bbox_to_anchor=(1, 1))
-        ax3.grid(True)
-        ax3.set_xmargin(0)
-        st.pyplot(fig3, use_container_width=False, bbox_inches="tight")
+               .groupby("Date", as_index=False)["WeeklySales"]
+               .mean())
+        non = chart_points(non, "Date", "WeeklySales", chart_stats, "Non_Event")
+
+        key = figure_key("ev_series", [series, non])
+        if not show_cached_figure(key):
+            fig3, ax3 = plt.subplots(figsize=(10, 4))
+            for ev, ser in series.items():
+                ax3.plot(ser["Date"], ser["WeeklySales"], marker='o', label=ev)
+            ax3.plot(non["Date"], non["WeeklySales"], color="gray", linestyle="--", label="Non_Event")
+
+            ax3.set_xlabel("Datum")
+            ax3.set_ylabel("Ø WeeklySales")
+            ax3.legend(loc="upper left", bbox_to_anchor=(1, 1))
+            ax3.grid(True)
+            ax3.set_xmargin(0)
+            show_figure(key, fig3)
+
+        show_figure_cache_stats()
+        show_payload_metrics(chart_stats)
 
         return
 
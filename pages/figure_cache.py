@@ -0,0 +1,133 @@
+# Cache gerenderter Matplotlib/Seaborn-Diagramme als PNG-Bytes, geschlüsselt nach (Diagramm-ID, Hash der Daten,
+# Optionen). Bei einem Treffer wird die Abbildung gar nicht erst erzeugt, sondern das PNG per st.image angezeigt;
+# neu gezeichnete Abbildungen werden nach dem Rendern sofort geschlossen, damit pyplot keine Figures ansammelt.
+#
+# Verwendung:
+#     key = figure_key("ws_hist", agg["histogram"], bins=30)
+#     if not show_cached_figure(key):
+#         fig, ax = plt.subplots()
+#         ...
+#         show_figure(key, fig)
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import streamlit as st
+from matplotlib.figure import Figure
+
+# Höchstanzahl gespeicherter PNGs (älteste werden verdrängt) und Auflösung der Bilder (wie st.pyplot)
+MAX_CACHED_FIGURES = 256
+FIGURE_DPI = 200
+# Breitere Bilder verkleinert Streamlit bei jeder Anzeige → einmal beim Speichern verkleinern
+MAX_IMAGE_WIDTH = 2 * 730
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def _update_hash(digest, obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        labels = list(obj.columns) if isinstance(obj, pd.DataFrame) else [obj.name]
+        digest.update(repr((type(obj).__name__, obj.shape, labels)).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Index):
+        digest.update(pd.util.hash_pandas_object(obj).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(repr((obj.dtype.str, obj.shape)).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=repr):
+            digest.update(repr(key).encode())
+            _update_hash(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _update_hash(digest, item)
+    else:
+        digest.update(repr(obj).encode())
+
+
+def data_hash(data):
+    """Stabiler Hash für DataFrames, Series, Arrays sowie (verschachtelte) dicts, Listen und Skalare."""
+    digest = hashlib.sha1()
+    _update_hash(digest, data)
+    return digest.hexdigest()
+
+
+def figure_key(chart_id, data, **options):
+    """Cache-Schlüssel eines Diagramms aus ID, den dargestellten Daten und den Zeichenoptionen."""
+    return chart_id, data_hash(data), data_hash(options)
+
+
+def render_png(fig):
+    """Rendert eine Abbildung als PNG (höchstens MAX_IMAGE_WIDTH Pixel breit) und schließt sie."""
+    try:
+        buffer = BytesIO()
+        fig.savefig(buffer, format="png", dpi=FIGURE_DPI, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+
+    from PIL import Image
+    image = Image.open(buffer)
+    if image.width <= MAX_IMAGE_WIDTH:
+        return buffer.getvalue()
+    height = int(image.height * MAX_IMAGE_WIDTH / image.width)
+    resized = BytesIO()
+    image.resize((MAX_IMAGE_WIDTH, height), resample=Image.BILINEAR).save(resized, format="PNG")
+    return resized.getvalue()
+
+
+def show_cached_figure(key, use_container_width=False):
+    """Zeigt das gespeicherte Diagramm zu `key` an; False, wenn es (noch) nicht im Cache liegt."""
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        _stats["hits" if entry is not None else "misses"] += 1
+    if entry is None:
+        return False
+    st.image(entry, use_container_width=use_container_width)
+    return True
+
+
+def show_figure(key, fig, use_container_width=False):
+    """
+    Rendert `fig` (Matplotlib-Figure oder Seaborn-Grid), legt das PNG unter `key` ab und zeigt es an. Mit
+    `use_container_width` wird es auf die Breite des Containers skaliert, sonst in der Breite der Abbildung.
+    """
+    png = render_png(fig if isinstance(fig, Figure) else fig.figure)
+    with _lock:
+        _cache[key] = png
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_FIGURES:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+    st.image(png, use_container_width=use_container_width)
+
+
+def figure_cache_stats():
+    with _lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": _stats["evictions"],
+            "cached_figures": len(_cache),
+            "cached_bytes": sum(len(png) for png in _cache.values()),
+            "open_figures": len(plt.get_fignums()),
+        }
+
+
+def show_figure_cache_stats():
+    """Sidebar-Expander mit Trefferquote des Caches und Anzahl noch offener pyplot-Figures."""
+    stats = figure_cache_stats()
+    with st.sidebar.expander("Diagramm-Cache"):
+        st.metric("Trefferquote", f"{stats['hit_rate']:.0%}", help=f"{stats['hits']} Treffer, {stats['misses']} neu")
+        st.metric("Gespeicherte Diagramme", f"{stats['cached_figures']} ({stats['cached_bytes'] / 1024 ** 2:.1f} MB)")
+        st.metric("Offene Figures", stats["open_figures"])
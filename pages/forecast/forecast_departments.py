@@ -5,12 +5,16 @@ import streamlit as st
 
 from database.data_loader import load_data, load_sales_forecast_data
 from layout import with_layout
-from logic.forcasting.forecaster import run_sales_forecast
+from logic.forcasting.forecaster import available_models, get_model, run_sales_forecast
+from logic.forcasting.hierarchy import run_hierarchical_sales_forecast
+from pages.chart_resolution import chart_points, full_resolution_toggle, show_payload_metrics
+from pages.figure_cache import figure_key, show_cached_figure, show_figure, show_figure_cache_stats
 
 
 @with_layout()
 def page():
-    model_option = st.sidebar.selectbox("Modell", ["Prophet", "ARIMA", "Holt-Winters"])
+    model_option = st.sidebar.selectbox("Modell", available_models())
+    full_resolution_toggle()
 
     st.title(f"📈 Nachfrageprognose mit {model_option}")
     st.subheader("Interaktive Visualisierung pro Store und Abteilung")
@@ -45,7 +49,12 @@ def page():
             with st.status("Führe Vorhersage durch... Bitte warten", state="running") as ui_status:
                 try:
                     # Führe die Vorhersage durch
-                    run_sales_forecast(history, model_option, selected_store, selected_dept, 104)
+                    if get_model(model_option).batch:
+                        # Das globale Modell lernt aus allen Zeitreihen und speichert den ganzen Store
+                        run_hierarchical_sales_forecast(df_sales, model_option, selected_store, 104,
+                                                        df_features=df_features)
+                    else:
+                        run_sales_forecast(history, model_option, selected_store, selected_dept, 104)
                     ui_status.update(label="Vorhersage erfolgreich durchgeführt und abgespeichert!", state="complete")
                 except Exception as e:
                     traceback.print_exc()
@@ -58,24 +67,32 @@ def page():
 
         # Lade Prognose, falls vorhanden
         if forecast is not None and not forecast.empty:
-            # Plot mit Matplotlib
-            fig, ax = plt.subplots(figsize=(10, 5))
-            ax.plot(history["ds"], history["y"], label="Historisch", color="black")
-            ax.plot(forecast["ds"], forecast["yhat"], label="Prognose", color="blue")
-
-            if forecast[['yhat_lower', 'yhat_upper']].notna().any(axis=None):
-                ax.fill_between(forecast["ds"], forecast["yhat_lower"], forecast["yhat_upper"],
-                                color="blue", alpha=0.2, label="Konfidenzintervall")
-
-            ax.set_title(f"Store {selected_store} – Dept {selected_dept}")
-            ax.set_xlabel("Datum")
-            ax.set_ylabel("Verkäufe")
-            ax.set_xmargin(0)
-            ax.legend()
-            ax.grid(True)
-
-            st.pyplot(fig)
+            # Plot mit Matplotlib (lange Reihen reduziert)
+            chart_stats = []
+            history_points = chart_points(history, "ds", "y", chart_stats, "Historisch")
+            forecast_points = chart_points(forecast, "ds", "yhat", chart_stats, "Prognose")
+            key = figure_key("forecast_department", [history_points[["ds", "y"]], forecast_points],
+                             store=selected_store, dept=selected_dept)
+            if not show_cached_figure(key, use_container_width=True):
+                fig, ax = plt.subplots(figsize=(10, 5))
+                ax.plot(history_points["ds"], history_points["y"], label="Historisch", color="black")
+                ax.plot(forecast_points["ds"], forecast_points["yhat"], label="Prognose", color="blue")
+
+                if forecast[['yhat_lower', 'yhat_upper']].notna().any(axis=None):
+                    ax.fill_between(forecast_points["ds"], forecast_points["yhat_lower"],
+                                    forecast_points["yhat_upper"], color="blue", alpha=0.2,
+                                    label="Konfidenzintervall")
+
+                ax.set_title(f"Store {selected_store} – Dept {selected_dept}")
+                ax.set_xlabel("Datum")
+                ax.set_ylabel("Verkäufe")
+                ax.set_xmargin(0)
+                ax.legend()
+                ax.grid(True)
+                show_figure(key, fig, use_container_width=True)
             st.dataframe(forecast)
+            show_payload_metrics(chart_stats)
+            show_figure_cache_stats()
         else:
             st.warning("⚠️ Für diese Kombination liegt keine Prognose vor.")
     else:
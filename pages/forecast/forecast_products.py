@@ -10,7 +10,8 @@ from logic.forcasting.forecast_helper import (
     prepare_product_data,
     calculate_kpis
 )
-from logic.forcasting.forecaster import run_products_forecast
+from logic.forcasting.forecaster import available_models, run_products_forecast
+from pages.chart_resolution import chart_points, full_resolution_toggle, show_payload_metrics
 
 
 def _translate_identifiers(identifiers):
@@ -33,14 +34,18 @@ def _run_and_store_forecast(df, model_choice, periods, identifiers, status_ctx_k
             ui_status.update(label=f"❌ Fehler: {e}", state="error")
 
 
-def _show_metrics_and_chart(df_hist, df_forecast):
-    """Berechnet KPIs, zeigt Metrics und Matplotlib-Chart."""
+def _show_metrics_and_chart(df_hist, df_forecast, chart_stats):
+    """Berechnet KPIs, zeigt Metrics und Matplotlib-Chart (lange Reihen reduziert, siehe chart_points)."""
     total, avg, std, growth = calculate_kpis(df_hist)
     st.metric("📦 Gesamt", f"{int(total):,}")
     st.metric("📊 Durchschnitt/Woche", f"{avg:.1f}")
     st.metric("📈 Volatilität", f"{std:.1f}")
     st.metric("🌱 Wachstum", f"{growth:.1f}%")
 
+    # Tageswerte über Jahre → vor dem Zeichnen formerhaltend reduzieren (KPIs oben aus allen Werten)
+    df_hist = chart_points(df_hist, "ds", "y", chart_stats, "Historisch")
+    df_forecast = chart_points(df_forecast, "ds", "yhat", chart_stats, "Prognose")
+
     fig, ax = plt.subplots(figsize=(8, 3))
     ax.plot(df_hist["ds"], df_hist["y"], label="Historisch")
     ax.plot(df_forecast["ds"], df_forecast["yhat"], label="Prognose")
@@ -50,6 +55,7 @@ def _show_metrics_and_chart(df_hist, df_forecast):
     ax.legend()
     ax.set_xmargin(0)
     st.pyplot(fig)
+    plt.close(fig)
 
 
 @with_layout("📦 Nachfrageanalyse- & Prognose-Tool")
@@ -67,7 +73,9 @@ def page():
      available_categories,
      available_cat_lager) = get_available_combinations(df_hist, df_prod, df_cat)
 
-    model_choice = st.radio("🔍 Modell wählen", ["Prophet", "ARIMA", "Holt-Winters"], horizontal=True)
+    model_choice = st.radio("🔍 Modell wählen", available_models(batch=False), horizontal=True)
+    full_resolution_toggle()
+    chart_stats = []
 
     if not st.session_state.do_prod_prediction:
         st.button("Prognose starten", key="do_prod_prediction_trigger",
@@ -136,11 +144,13 @@ def page():
 
                 # Laden & Anzeigen
                 df_frc = load_products_forecast_data(model_choice, **_translate_identifiers(identifiers))
-                _show_metrics_and_chart(df_pre, df_frc)
+                _show_metrics_and_chart(df_pre, df_frc, chart_stats)
 
             except Exception as e:
                 st.error(f"Fehler: {e}")
 
+    show_payload_metrics(chart_stats)
+
     # Reset-Flag
     if st.session_state.do_prod_prediction:
         st.session_state.do_prod_prediction = False
@@ -7,7 +7,9 @@ import streamlit as st
 from database.data_loader import load_data, load_multi_sales_forecast_data
 from layout import with_layout
 from logic.forcasting.forecast_helper import calculate_kpis
-from logic.forcasting.forecaster import generate_sales_forecasts
+from logic.forcasting.forecaster import available_models, generate_sales_forecasts, get_model
+from logic.forcasting.hierarchy import RECONCILIATION_METHODS, run_hierarchical_sales_forecast
+from pages.chart_resolution import chart_points, full_resolution_toggle, show_payload_metrics
 
 
 @with_layout("📈 Verkaufsprognose-Tool (Weekly Sales)")
@@ -23,11 +25,16 @@ def page():
         st.header("🧭 Einstellungen")
         store_ids = sorted(df_raw['StoreID'].unique())
         selected_store = st.selectbox("🏬 Store auswählen", store_ids)
-        model_choices = st.multiselect("📊 Modell(e) auswählen", ["Prophet", "ARIMA", "Holt-Winters"],
-                                       default=["Prophet"])
+        model_choices = st.multiselect("📊 Modell(e) auswählen", available_models(), default=["Prophet"])
         forecast_period = st.slider("📅 Prognosezeitraum (Wochen)", 1, 52, 12)
+        hierarchical = st.checkbox("🧩 Hierarchisch aus Department-Prognosen ableiten", value=True)
+        reconciliation = None
+        if hierarchical:
+            reconciliation = RECONCILIATION_METHODS[
+                st.selectbox("⚖️ Abgleich der Ebenen", list(RECONCILIATION_METHODS.keys()))]
         show_table = st.checkbox("📋 Rohdaten anzeigen", value=False)
         show_forecast_table = st.checkbox("📈 Forecast-Tabelle anzeigen", value=False)
+        full_resolution_toggle()
         # Durchführen-Button
         if not st.session_state["do_prediction"]:
             st.button("Prognose starten", key="do_prediction_trigger",
@@ -51,7 +58,19 @@ def page():
         with st.status("Führe Vorhersage durch... Bitte warten", state="running") as ui_status:
             try:
                 # Führe die Vorhersage durch
-                generate_sales_forecasts(store_df, forecast_period, model_choices, selected_store)
+                # Batch-Modelle (das globale Modell) prognostizieren nur Departments → Store-Summe immer hierarchisch
+                hierarchical_models = [m for m in model_choices if hierarchical or get_model(m).batch]
+                local_models = [m for m in model_choices if m not in hierarchical_models]
+
+                # Store-Summe ergibt sich aus den Departments → keine separate Anpassung der Store-Reihe nötig
+                for model_option in hierarchical_models:
+                    run_hierarchical_sales_forecast(
+                        df_raw, model_option, selected_store, forecast_period, reconciliation,
+                        progress_callback=lambda dept_id, done, total, m=model_option: ui_status.update(
+                            label=f"{m}: {done}/{total} Department-Prognosen berechnet..."),
+                        df_features=df_features)
+                if local_models:
+                    generate_sales_forecasts(store_df, forecast_period, local_models, selected_store)
                 ui_status.update(label="Vorhersage erfolgreich durchgeführt und abgespeichert!", state="complete")
             except Exception as e:
                 traceback.print_exc()
@@ -64,12 +83,17 @@ def page():
 
     # Lade Prognose, falls vorhanden
     if forecasts:
-        # Interaktives Diagramm
-        base = px.line(store_df, x="ds", y="y", title=f"🔍 Verkaufsprognose für Store {selected_store}",
+        # Interaktives Diagramm (lange Reihen reduziert → kleinere Daten an den Browser)
+        chart_stats = []
+        base = px.line(chart_points(store_df, "ds", "y", chart_stats, "Historisch"), x="ds", y="y",
+                       title=f"🔍 Verkaufsprognose für Store {selected_store}",
                        labels={"ds": "Datum", "y": "Verkäufe"})
         for method, forecast_df in forecasts.items():
-            base.add_scatter(x=forecast_df['ds'], y=forecast_df['yhat'], mode='lines', name=f"{method}-Forecast")
+            forecast_points = chart_points(forecast_df, "ds", "yhat", chart_stats, f"{method}-Forecast")
+            base.add_scatter(x=forecast_points['ds'], y=forecast_points['yhat'], mode='lines',
+                             name=f"{method}-Forecast")
         st.plotly_chart(base, use_container_width=True)
+        show_payload_metrics(chart_stats)
 
         # Tabellen anzeigen
         if show_table:
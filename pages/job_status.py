@@ -0,0 +1,55 @@
+import streamlit as st
+
+from database.job_queue import enqueue_job, get_job
+from logic.jobs import ensure_workers
+
+STATUS_LABELS = {
+    "queued": "⏳ Wartet auf einen freien Worker...",
+    "running": "⚙️ Wird im Hintergrund ausgeführt...",
+    "done": "✅ Abgeschlossen",
+    "error": "❌ Fehlgeschlagen",
+}
+
+
+def submit_job(kind, params, query_key):
+    """
+    Reiht einen Auftrag ein (gleiche Parameter → derselbe Auftrag), stellt sicher, dass ein Worker läuft,
+    und merkt sich die JobID in der URL, damit der Auftrag ein Neuladen der Seite übersteht.
+    """
+    job_id = enqueue_job(kind, params)
+    ensure_workers()
+    st.query_params[query_key] = job_id
+    return job_id
+
+
+def get_tracked_job_id(query_key):
+    return st.query_params.get(query_key)
+
+
+def forget_job(query_key):
+    st.query_params.pop(query_key, None)
+
+
+def show_job_progress(job_id, query_key, on_finished):
+    """
+    Zeigt den Fortschritt eines Auftrags und fragt ihn alle zwei Sekunden neu ab, ohne die ganze Seite neu
+    auszuführen. Ist der Auftrag beendet, wird on_finished(job) aufgerufen und die Seite neu geladen.
+    """
+
+    @st.fragment(run_every=2)
+    def monitor():
+        job = get_job(job_id)
+        if job is None:
+            st.warning(f"Auftrag {job_id} wurde nicht gefunden.")
+            forget_job(query_key)
+            return
+
+        st.caption(f"Auftrag `{job_id}` ({job['Kind']}) – {STATUS_LABELS.get(job['Status'], job['Status'])}")
+        st.progress(min(max(float(job["Progress"]), 0.0), 1.0), text=job["Message"] or "")
+
+        if job["Status"] in ("done", "error"):
+            on_finished(job)
+            forget_job(query_key)
+            st.rerun(scope="app")
+
+    monitor()
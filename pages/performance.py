@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from database.metrics import clear_spans, read_spans
+from layout import with_layout
+from logic.analysis.timing import METRICS_DB_PATH, flush_spans, slowest_series, stage_statistics
+
+# Auswahl in der Oberfläche → Zeitspanne der ausgewerteten Messungen (None = alle gespeicherten)
+TIME_RANGES = {
+    "Letzte Stunde": timedelta(hours=1),
+    "Letzte 24 Stunden": timedelta(days=1),
+    "Letzte 7 Tage": timedelta(days=7),
+    "Alle": None,
+}
+
+MS_COLUMN = st.column_config.NumberColumn(format="%.1f ms")
+
+
+@with_layout("⏱️ Performance")
+def page():
+    st.write("Laufzeiten der gemessenen Stufen (Laden, Datenaufbereitung, Modellanpassung und -prognose, "
+             "Aufbau/Lösung/Auswertung der Optimierungsmodelle, Speichern der Prognosen) aus allen Seiten, "
+             "Hintergrund-Aufträgen und Batch-Läufen.")
+
+    c1, c2 = st.columns([1, 3])
+    range_label = c1.selectbox("Zeitraum", list(TIME_RANGES), index=1)
+    max_age = TIME_RANGES[range_label]
+    # Noch gesammelte Messungen dieses Prozesses (App-Server) zuerst schreiben
+    flush_spans()
+    df_spans = read_spans(datetime.now() - max_age if max_age else None, METRICS_DB_PATH)
+
+    if df_spans.empty:
+        st.info("Im gewählten Zeitraum wurden noch keine Laufzeiten gemessen.")
+        return
+
+    stages = c2.multiselect("Stufen (leer = alle)", sorted(df_spans["Name"].unique()))
+    if stages:
+        df_spans = df_spans[df_spans["Name"].isin(stages)]
+
+    st.write("### Laufzeit je Stufe")
+    df_stats = stage_statistics(df_spans)
+    st.dataframe(df_stats, use_container_width=True, hide_index=True,
+                 column_config={col: MS_COLUMN for col in ["p50", "p95", "Maximum", "Summe"]})
+    st.bar_chart(df_stats.set_index("Name")[["p50", "p95"]], horizontal=True, stack=False,
+                 y_label="Millisekunden")
+
+    st.write("### Langsamste Zeitreihen")
+    top = st.slider("Anzahl", min_value=5, max_value=100, value=20, step=5)
+    st.dataframe(slowest_series(df_spans, top), use_container_width=True, hide_index=True,
+                 column_config={"DurationMs": MS_COLUMN})
+
+    st.divider()
+    if st.button("Messungen löschen"):
+        clear_spans(METRICS_DB_PATH)
+        st.rerun()
+
+
+page()
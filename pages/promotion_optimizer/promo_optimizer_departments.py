@@ -2,7 +2,8 @@ import streamlit as st
 
 from database.data_loader import load_data
 from layout import with_layout
-from pages.promotion_optimizer.shared import create_shared_parameters, create_results, init_session, handle_optimization
+from pages.promotion_optimizer.shared import create_shared_parameters, create_parameter_sweep, create_results, \
+    init_session, handle_optimization
 
 
 @with_layout("Promotion Optimierung für einzelne Departments eines Stores")
@@ -46,6 +47,8 @@ def page():
         st.warning("Bitte wähle mindestens ein Department aus, um die Optimierung zu starten.")
 
     create_results()
+    if selected_store and selected_depts:
+        create_parameter_sweep(df_sales, df_features, params, selected_store, selected_depts)
 
 
 page()
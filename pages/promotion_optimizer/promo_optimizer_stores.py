@@ -2,7 +2,8 @@ import streamlit as st
 
 from database.data_loader import load_data
 from layout import with_layout
-from pages.promotion_optimizer.shared import create_shared_parameters, create_results, handle_optimization, init_session
+from pages.promotion_optimizer.shared import create_shared_parameters, create_parameter_sweep, create_results, \
+    handle_optimization, init_session
 
 
 @with_layout("Promotion Optimierung für Stores")
@@ -36,6 +37,8 @@ def page():
         st.warning("Bitte wähle mindestens einen Store aus, um die Optimierung zu starten.")
 
     create_results()
+    if selected_stores:
+        create_parameter_sweep(df_sales, df_features, params, selected_stores=selected_stores)
 
 
 page()
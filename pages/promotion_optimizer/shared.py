@@ -2,9 +2,17 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 
-from database.data_loader import load_full_sales_forecast_data
+from database.data_loader import load_full_sales_forecast_data, load_optimization_capacity, \
+    load_optimization_run_info, load_optimization_store
+from database.data_writer import save_optimization_run
+from logic.forcasting.forecaster import available_models
+from logic.optimization.coupled import run_coupled_promotion_optimization
 from logic.optimization.optimizations import run_promotion_sales_optimization_all
-from logic.optimization.visualizations import prepare_solution_data, plot_sales_boost
+from logic.optimization.preparation import prepare_optimization_sales
+from logic.optimization.sweep import SWEEP_PARAMETERS, parameter_grid, run_parameter_sweep
+from logic.optimization.visualizations import prepare_solution_data, plot_parameter_sweep, plot_sales_boost
+from pages.figure_cache import figure_key, show_cached_figure, show_figure, show_figure_cache_stats
+from pages.job_status import get_tracked_job_id, show_job_progress, submit_job
 
 # Manuelles Mapping von Parameternamen zu leserlichen Beschriftungen
 PARAMETER_LABELS = {
@@ -14,24 +22,28 @@ PARAMETER_LABELS = {
     "promo_decay": "Wirkungsnachlass (%)",
     "solver_timeout": "Solver-Timeout (Sekunden)",
     "use_prediction": "Verwende Vorhersagen, falls vorhanden",
-    "selected_model": "Ausgewähltes Vorhersagenmodell"
+    "selected_model": "Ausgewähltes Vorhersagenmodell",
+    "background": "Als Hintergrund-Auftrag ausgeführt",
+    "rolling_window": "Rolling-Horizon-Fenster (Wochen, 0 = Gesamtmodell)",
+    "budget": "Gesamtbudget für Promo-Kosten (0 = unbegrenzt)",
+    "weekly_capacity": "Max. Promotionen je Woche über alle Stores (0 = unbegrenzt)"
 }
 
+# URL-Parameter mit der JobID einer laufenden Optimierung
+JOB_QUERY_KEY = "promo_job"
+
 
 def init_session():
     if "promo_state" not in st.session_state:
         st.session_state["promo_state"] = create_promo_state()
 
 
-def create_promo_state(df_solution=None, status=None, run_opts=False, selected_stores=None, selected_depts=None,
-                       params=None):
+def create_promo_state(run_id=None, run_opts=False, job_error=None):
+    # Ergebnisse liegen in der Datenbank (OptimizationRun/-Result/-Status); je Sitzung wird nur die RunID gehalten
     return {
-        "df_solution": df_solution,
-        "status": status,
+        "run_id": run_id,
         "run_optimization": run_opts,
-        "selected_stores": selected_stores,
-        "selected_depts": selected_depts,
-        "params": params,
+        "job_error": job_error,
     }
 
 
@@ -59,9 +71,24 @@ def create_shared_parameters():
     if use_prediction:
         st.sidebar.info(
             "Es werden die gespeicherten Vorhersagen aus dem ausgewählten Modell verwendet. Sie können auf der Vorhersage-Seite generiert werden.")
-        selected_model = st.sidebar.selectbox("Vorhersagenmodell", ["Prophet", "ARIMA", "Holt-Winters"])
+        selected_model = st.sidebar.selectbox("Vorhersagenmodell", available_models())
     solver_timeout = st.sidebar.number_input("Solver-Timeout in Sekunden (kann Güte reduzieren)", value=150, step=1,
                                              min_value=0)
+    rolling_window = st.sidebar.number_input(
+        "Rolling-Horizon-Fenster in Wochen (0 = Gesamtmodell, schneller bei langen Zeitreihen)", value=0, step=4,
+        min_value=0)
+
+    # Gekoppelte Optimierung über alle ausgewählten Stores/Departments
+    st.sidebar.divider()
+    st.sidebar.header("Budget und Kapazität")
+    budget = st.sidebar.number_input("Gesamtbudget für Promo-Kosten über alle Stores (0 = unbegrenzt)", value=0.0,
+                                     step=1000.0, min_value=0.0)
+    weekly_capacity = st.sidebar.number_input("Max. Promotionen je Woche über alle Stores (0 = unbegrenzt)", value=0,
+                                              step=1, min_value=0)
+    if budget or weekly_capacity:
+        st.sidebar.info("Mit Budget oder Kapazität werden alle Paare gemeinsam per Lagrange-Zerlegung optimiert.")
+
+    background = st.sidebar.checkbox("Im Hintergrund ausführen (übersteht Neuladen der Seite)", value=True)
 
     # Optimierungs-Button
     if not st.session_state["promo_state"]["run_optimization"]:
@@ -77,11 +104,12 @@ def create_shared_parameters():
     st.write(f"Jede Woche ohne Promotion lässt die Wirkung um {promo_scaling}% wieder ansteigen.")
 
     return create_params_state(promo_cost, promo_boost, promo_scaling, promo_decay, solver_timeout, use_prediction,
-                               selected_model)
+                               selected_model, background, rolling_window, budget, weekly_capacity)
 
 
 def create_params_state(promo_cost=None, promo_boost=None, promo_scaling=None, promo_decay=None, solver_timeout=None,
-                        use_prediction=None, selected_model=None):
+                        use_prediction=None, selected_model=None, background=None, rolling_window=None, budget=None,
+                        weekly_capacity=None):
     return {
         "promo_cost": promo_cost,
         "promo_boost": promo_boost,
@@ -90,6 +118,10 @@ def create_params_state(promo_cost=None, promo_boost=None, promo_scaling=None, p
         "solver_timeout": solver_timeout,
         "use_prediction": use_prediction,
         "selected_model": selected_model,
+        "background": background,
+        "rolling_window": rolling_window,
+        "budget": budget,
+        "weekly_capacity": weekly_capacity,
     }
 
 
@@ -102,14 +134,16 @@ def handle_optimization(df_sales, df_features, params, ui_status, parallel, sele
             ui_status.update(label="Gespeicherte Daten werden angezeigt...")
         return
 
-    # Filter Stores und Depts
-    df_sales = filter_sales(df_sales, selected_stores, selected_depts)
+    if params.get("background"):
+        submit_optimization_job(params, selected_stores, selected_depts)
+        state["run_optimization"] = False
+        if ui_status:
+            ui_status.update(label="Optimierung als Hintergrund-Auftrag eingereiht.", state="complete")
+        return
 
     # Verwende Vorhersagedaten, falls vorhanden
-    if params["use_prediction"]:
-        df_pred = load_full_sales_forecast_data(params["selected_model"])
-        df_pred = filter_sales(df_pred, selected_stores, selected_depts)
-        df_sales = merge_forecast_with_sales(df_sales, df_pred)
+    df_pred = load_full_sales_forecast_data(params["selected_model"]) if params["use_prediction"] else None
+    df_sales = prepare_optimization_sales(df_sales, df_pred, selected_stores, selected_depts)
 
     df_solution, status = run_optimization(
         df_sales,
@@ -119,16 +153,50 @@ def handle_optimization(df_sales, df_features, params, ui_status, parallel, sele
         parallel
     )
 
-    # Ergebnisse speichern
-    state["df_solution"] = df_solution
-    state["status"] = status
+    # Ergebnisse als Lauf speichern; die Seite lädt sie von dort je angezeigtem Store nach
+    state["run_id"] = save_optimization_run(df_solution, status, {**params,
+                                                                  "selected_stores": to_id_list(selected_stores),
+                                                                  "selected_depts": to_id_list(selected_depts)},
+                                            source="app")
     state["run_optimization"] = False
-    state["selected_stores"] = selected_stores
-    state["selected_depts"] = selected_depts
-    state["params"] = params
+
+
+def submit_optimization_job(params, selected_stores=None, selected_depts=None):
+    # JSON-taugliche Auswahl (numpy-Werte → int), damit gleiche Aufträge denselben Hash erhalten
+    job_params = {
+        "params": params,
+        "stores": to_id_list(selected_stores),
+        "depts": to_id_list(selected_depts),
+    }
+    return submit_job("optimize", job_params, JOB_QUERY_KEY)
+
+
+def on_optimization_job_finished(job):
+    state = st.session_state["promo_state"]
+    if job["Status"] != "done":
+        state["job_error"] = job["Error"]
+        return
+
+    state["run_id"] = job["Result"]["run_id"]
+    state["job_error"] = None
 
 
 def run_optimization(df_sales, df_features, params, ui_status, parallel):
+    if params.get("budget") or params.get("weekly_capacity"):
+        df_solution, results, _ = run_coupled_promotion_optimization(
+            df_sales,
+            df_features,
+            budget=params.get("budget") or None,
+            weekly_capacity=params.get("weekly_capacity") or None,
+            cost_rate=params["promo_cost"] * 0.01,
+            boost_max=params["promo_boost"] * 0.01,
+            recovery_rate=params["promo_scaling"] * 0.01,
+            decay_factor=1 - params["promo_decay"] * 0.01,
+            ui_status=ui_status,
+            solver_timeout=params["solver_timeout"]
+        )
+        return df_solution, results
+
     return run_promotion_sales_optimization_all(
         df_sales,
         df_features,
@@ -138,101 +206,163 @@ def run_optimization(df_sales, df_features, params, ui_status, parallel):
         decay_factor=1 - params["promo_decay"] * 0.01,
         ui_status=ui_status,
         parallel=parallel,
-        solver_timeout=params["solver_timeout"]
+        solver_timeout=params["solver_timeout"],
+        rolling_window=params.get("rolling_window") or None
     )
 
 
-def create_results(df_solution=None, status=None, selected_stores=None, selected_depts=None, params=None):
+def create_results(run_id=None):
     st.divider()
 
-    # Lade die Daten aus dem state, falls vorhanden
-    state = st.session_state["promo_state"]
-    if state is not None:
-        if df_solution is None:
-            df_solution = state["df_solution"]
-        if status is None:
-            status = state["status"]
-        if selected_stores is None:
-            selected_stores = state["selected_stores"]
-        if selected_depts is None:
-            selected_depts = state["selected_depts"]
-        if params is None:
-            params = state["params"]
+    # Laufender Hintergrund-Auftrag (auch nach Neuladen der Seite über die JobID in der URL)
+    job_id = get_tracked_job_id(JOB_QUERY_KEY)
+    if job_id:
+        st.write("### Hintergrund-Auftrag")
+        show_job_progress(job_id, JOB_QUERY_KEY, on_optimization_job_finished)
+        return
+    if st.session_state["promo_state"].get("job_error"):
+        st.error(f"Der Hintergrund-Auftrag ist fehlgeschlagen: {st.session_state['promo_state']['job_error']}")
+
+    # Lade den Lauf aus dem state, falls vorhanden
+    if run_id is None:
+        run_id = st.session_state["promo_state"]["run_id"]
 
     # Lösung ist nicht definiert → Abbruch
-    if df_solution is None or status is None:
+    run_info = load_optimization_run_info(run_id) if run_id is not None else None
+    if run_info is None:
+        if run_id is not None:
+            st.info(f"Der Optimierungslauf {run_id} ist nicht mehr gespeichert (Aufbewahrungsfrist abgelaufen).")
         st.write("Keine gespeicherten Optimierungsdaten. Stelle die Parameter ein und führe eine Optimierung durch.")
         return
 
+    params, status_df = run_info
+    params = dict(params)
+    selected_stores = params.pop("selected_stores", None)
+    selected_depts = params.pop("selected_depts", None)
+
     # Ergebnis anzeigen
     st.write("### Ergebnisübersicht")
 
     with st.expander("Angewandte Optimierungsparameter anzeigen"):
+        st.write(f"Gespeichert als Lauf {run_id}.")
         if selected_stores is not None:
             st.write(f"Die folgenden Ergebnisse gelten für Store(s): {format_selection(selected_stores)}")
         if selected_depts is not None:
             st.write(
                 f"Von den Stores wurden die folgenden Department(s) betrachtet: {format_selection(selected_depts)}")
-        if params is not None:
-            # Parameterdaten aufbereiten
-            param_rows = []
-            for key, value in params.items():
-                readable_name = PARAMETER_LABELS.get(key, key.replace("_", " ").capitalize())
-                param_rows.append({"Parameter": readable_name, "Wert": value})
-
-            df_params = pd.DataFrame(param_rows)
-            df_params["Wert"] = df_params["Wert"].astype(str)
-            st.write(f"Die Ausführung wurde durch die folgenden Parameter definiert: ")
-            st.dataframe(df_params)
-
-    # Status-Tabelle für Übersicht generieren
-    status_df = pd.DataFrame([
-        {
-            "StoreID": df['StoreID'].iloc[0],
-            "DeptID": df['DeptID'].iloc[0],
-            "Status": stat
-        }
-        for df, stat in status
-    ])
+        # Parameterdaten aufbereiten
+        param_rows = []
+        for key, value in params.items():
+            readable_name = PARAMETER_LABELS.get(key, key.replace("_", " ").capitalize())
+            param_rows.append({"Parameter": readable_name, "Wert": value})
+
+        df_params = pd.DataFrame(param_rows)
+        df_params["Wert"] = df_params["Wert"].astype(str)
+        st.write(f"Die Ausführung wurde durch die folgenden Parameter definiert: ")
+        st.dataframe(df_params)
 
     # Status-Tabelle anzeigen
     st.dataframe(status_df, use_container_width=True)
 
-    # Gesamtlösungsdaten vorbereiten
-    df_prepared = prepare_solution_data(df_solution)
-    if df_prepared.empty:
+    if params.get("budget") or params.get("weekly_capacity"):
+        show_capacity_usage(run_id, params)
+
+    if status_df.empty:
         st.warning("Keine Promotions in der Lösung.")
         return
 
-    # Alle Stores mit Lösungen
-    stores_all = sorted(df_prepared['StoreID'].unique())
-    if not stores_all:
-        st.warning("Keine gültigen Store-Daten vorhanden.")
+    # Nur der gewählte Store wird geladen und gezeichnet (statt aller Stores des Laufs)
+    st.write("### Visualisierung nach Store")
+    stores_all = sorted(status_df["StoreID"].unique())
+    store = st.selectbox("Store anzeigen", stores_all, format_func=lambda s: f"Store {s}", key="result_store")
+
+    # Lösung des Stores je Dept vorbereiten
+    solution_groups = prepare_solution_data(load_optimization_store(run_id, store))
+    if not solution_groups:
+        st.warning(f"Keine Promotions in der Lösung für Store {store}.")
         return
+    departments_all = sorted(dept for _, dept in solution_groups)
 
-    st.write("### Visualisierung nach Store")
-    store_tabs = st.tabs([f"Store {store}" for store in stores_all])
+    selected_departments = st.multiselect(
+        f"Departments für Store {store} auswählen:",
+        departments_all,
+        default=departments_all[:3],
+        key=f"dept_select_store_{store}"
+    )
 
-    for i, store in enumerate(stores_all):
-        with store_tabs[i]:
-            df_store = df_prepared[df_prepared['StoreID'] == store]
-            departments_all = sorted(df_store['DeptID'].unique())
+    for dept in sorted(selected_departments):
+        df_dept = solution_groups[(store, dept)]
+        st.subheader(f"Department {dept}")
+        # Diagramm nur bei neuer Lösung bzw. erstmals gewähltem Department zeichnen
+        key = figure_key("promo_sales_boost", df_dept, store=store, dept=dept)
+        if not show_cached_figure(key, use_container_width=True):
+            show_figure(key, plot_sales_boost(df_dept, store, dept), use_container_width=True)
+        st.dataframe(df_dept, use_container_width=True)
 
-            selected_departments = st.multiselect(
-                f"Departments für Store {store} auswählen:",
-                departments_all,
-                default=departments_all[:3],
-                key=f"dept_select_store_{store}"
-            )
+    show_figure_cache_stats()
 
-            df_filtered = df_store[df_store['DeptID'].isin(selected_departments)]
 
-            for dept in sorted(df_filtered['DeptID'].unique()):
-                df_dept = df_filtered[df_filtered['DeptID'] == dept]
-                st.subheader(f"Department {dept}")
-                fig = plot_sales_boost(df_dept, store, dept)
-                st.pyplot(fig)
-                st.dataframe(df_dept, use_container_width=True)
+def show_capacity_usage(run_id, params):
+    # Auslastung der gekoppelten Nebenbedingungen (Budget, Promotionen je Woche), in SQL über alle Stores berechnet
+    spend, max_per_week = load_optimization_capacity(run_id)
+
+    col1, col2 = st.columns(2)
+    col1.metric("Promo-Kosten gesamt", f"{spend:,.0f}",
+                f"Budget {params['budget']:,.0f}" if params.get("budget") else "ohne Budget", delta_color="off")
+    col2.metric("Max. Promotionen je Woche", int(max_per_week),
+                f"Kapazität {params['weekly_capacity']}" if params.get("weekly_capacity") else "ohne Kapazität",
+                delta_color="off")
+
+
+def create_parameter_sweep(df_sales, df_features, params, selected_stores=None, selected_depts=None):
+    # Sensitivitätsanalyse: Netto-Gewinn für ein Raster aus bis zu zwei variierten Parametern
+    st.divider()
+    with st.expander("Sensitivitätsanalyse (Parameterstudie)"):
+        varied = st.multiselect("Zu variierende Parameter (max. 2)", list(SWEEP_PARAMETERS),
+                                default=["promo_cost"], format_func=SWEEP_PARAMETERS.get, max_selections=2)
+        ranges = {}
+        for name in varied:
+            col1, col2, col3 = st.columns(3)
+            low = col1.number_input(f"{SWEEP_PARAMETERS[name]}: von", value=max(0.0, params[name] / 2), step=1.0,
+                                    min_value=0.0, max_value=100.0, key=f"sweep_{name}_low")
+            high = col2.number_input("bis", value=min(100.0, params[name] * 2), step=1.0, min_value=0.0,
+                                     max_value=100.0, key=f"sweep_{name}_high")
+            steps = col3.number_input("Schritte", value=5, step=1, min_value=2, max_value=20, key=f"sweep_{name}_steps")
+            ranges[name] = [float(value) for value in np.linspace(low, high, int(steps)).round(2)]
+
+        sweep_timeout = st.number_input("Solver-Timeout je Kombination in Sekunden", value=30, step=5, min_value=1)
+        grid = parameter_grid(ranges, params)
+        st.caption(f"{len(grid)} Kombinationen je Store/Department.")
+
+        if varied and st.button("Parameterstudie starten"):
+            df_pred = load_full_sales_forecast_data(params["selected_model"]) if params["use_prediction"] else None
+            df_selected = prepare_optimization_sales(df_sales, df_pred, selected_stores, selected_depts)
+            progress = st.progress(0.0, text="Parameterstudie läuft...")
+            _, df_summary = run_parameter_sweep(
+                df_selected, df_features, grid, solver_timeout=sweep_timeout,
+                progress_callback=lambda done, total: progress.progress(done / total,
+                                                                        text=f"{done}/{total} Blöcke gelöst"))
+            progress.empty()
+            st.session_state["promo_sweep"] = {"summary": df_summary, "varied": varied}
+
+        sweep = st.session_state.get("promo_sweep")
+        if sweep is not None and not sweep["summary"].empty:
+            x_param, hue_param = (sweep["varied"] + [None])[:2]
+            key = figure_key("promo_sweep", sweep["summary"], x_param=x_param, hue_param=hue_param)
+            if not show_cached_figure(key, use_container_width=True):
+                show_figure(key, plot_parameter_sweep(sweep["summary"], x_param, hue_param, SWEEP_PARAMETERS),
+                            use_container_width=True)
+            st.dataframe(sweep["summary"].rename(columns=SWEEP_PARAMETERS), use_container_width=True)
+            if sweep["summary"]["NotOptimal"].any():
+                st.info("Einige Kombinationen wurden nicht optimal gelöst (Timeout); ihre Werte sind Untergrenzen.")
+
+
+def to_id_list(selection):
+    if selection is None:
+        return None
+    if not isinstance(selection, (list, tuple, set, np.ndarray)):
+        selection = [selection]
+    return [int(value) for value in selection]
 
 
 def format_selection(selection):
@@ -243,37 +373,3 @@ def format_selection(selection):
     if isinstance(selection, list):
         return ", ".join(map(str, selection))
     return str(selection)
-
-
-def merge_forecast_with_sales(df_sales, df_pred):
-    # Erstelle einen zusammengesetzten Schlüssel aus Date, StoreID und DeptID
-    sales_keys = set(zip(df_sales["Date"], df_sales["StoreID"], df_sales["DeptID"]))
-    pred_keys = list(zip(df_pred["ds"], df_pred["StoreID"], df_pred["DeptID"]))
-
-    # Nur zukünftige Vorhersagen behalten (nicht in df_sales enthalten)
-    future_preds = df_pred.loc[[key not in sales_keys for key in pred_keys]].copy()
-    future_preds.rename(columns={"ds": "Date", "yhat": "WeeklySales"}, inplace=True)
-
-    future_preds["IsHoliday"] = False
-
-    # DataFrames kombinieren
-    df_combined = pd.concat([df_sales, future_preds[df_sales.columns]], ignore_index=True)
-    df_combined.sort_values(["StoreID", "DeptID", "Date"], inplace=True)
-
-    return df_combined
-
-
-def filter_sales(df_sales, selected_stores=None, selected_depts=None):
-    # Filter für StoreID
-    if selected_stores is not None:
-        if not isinstance(selected_stores, (list, tuple, set)):
-            selected_stores = [selected_stores]
-        df_sales = df_sales[df_sales["StoreID"].isin(selected_stores)]
-
-    # Filter für DeptID
-    if selected_depts is not None:
-        if not isinstance(selected_depts, (list, tuple, set)):
-            selected_depts = [selected_depts]
-        df_sales = df_sales[df_sales["DeptID"].isin(selected_depts)]
-
-    return df_sales
@@ -3,11 +3,18 @@ import traceback
 import streamlit as st
 
 import database.data_loader as data_loader
+from database.connection import close_connections, connection_stats
+from database.data_profile import ensure_data_profile
 import database.import_product_db as import_product_db
 from layout import with_layout
-from logic.forcasting.forecaster import run_sales_forecast
+from logic.forcasting.forecaster import available_models as registered_models, clear_forecast_cache, get_model
+from logic.forcasting.hierarchy import run_hierarchical_sales_forecast, run_global_sales_forecast
+from pages.job_status import get_tracked_job_id, show_job_progress, submit_job
 
-available_models = ["Prophet", "ARIMA", "Holt-Winters"]
+available_models = registered_models()
+
+# URL-Parameter mit der JobID einer laufenden Hintergrund-Prognose
+FORECAST_JOB_QUERY_KEY = "forecast_job"
 
 if "tool_import_db" not in st.session_state:
     st.session_state["tool_import_db"] = False
@@ -18,8 +25,8 @@ if "tool_predict" not in st.session_state:
 def do_prediction(models):
     df_sales, df_features, df_stores = data_loader.load_data()
 
-    # Alle eindeutigen Kombinationen aus StoreID und DeptID
-    combinations = df_sales[["StoreID", "DeptID"]].drop_duplicates()
+    # Alle Stores; je Store werden die Departments angepasst und die Store-Summe (DeptID -1) daraus abgeleitet
+    store_ids = sorted(df_sales["StoreID"].dropna().unique())
 
     static_str = "\n Dies wird extrem lange dauern... Bitte warten!"
     for i, model_option in enumerate(models):
@@ -27,27 +34,22 @@ def do_prediction(models):
         with st.status(f"Führe **alle** Vorhersagen für Sales aus {model_str}: Startup... {static_str}",
                        state="running") as ui_status:
             try:
-                for _, row in combinations.iterrows():
-                    store_id = row["StoreID"]
-                    dept_id = row["DeptID"]
-
-                    pred_str = f"Store {store_id} / Dept {dept_id}"
-
-                    # Historische Zeitreihe für diesen Store und dieses Department
-                    history = df_sales[
-                        (df_sales["StoreID"] == store_id) &
-                        (df_sales["DeptID"] == dept_id)
-                        ][["Date", "WeeklySales"]].sort_values("Date").rename(
-                        columns={"Date": "ds", "WeeklySales": "y"}).copy()
-
-                    # Überspringe leere oder zu kurze Zeitreihen
-                    if len(history) < 10:
-                        continue
-
-                    ui_status.update(
-                        label=f"Führe **alle** Vorhersagen für Sales aus {model_str}: {pred_str}... {static_str}")
-
-                    run_sales_forecast(history, model_option, store_id, dept_id, 104)
+                if get_model(model_option).batch:
+                    # Ein einziges Modell für alle Stores; danach wird nur noch je Store gespeichert
+                    run_global_sales_forecast(
+                        df_sales, df_features, 104, store_ids, future_only=True,
+                        progress_callback=lambda store_id, done, total: ui_status.update(
+                            label=f"Speichere Vorhersagen {model_str}: Store {store_id} ({done}/{total})..."))
+                else:
+                    for store_id in store_ids:
+                        def report(dept_id, done, total, store_id=store_id):
+                            ui_status.update(
+                                label=f"Führe **alle** Vorhersagen für Sales aus {model_str}: Store {store_id} "
+                                      f"({done}/{total} Departments)... {static_str}")
+
+                        # Für den Optimierer zählen nur Zukunftswerte → Historie nicht mitspeichern
+                        run_hierarchical_sales_forecast(df_sales, model_option, store_id, 104, future_only=True,
+                                                        progress_callback=report)
 
                 ui_status.update(label=f"Alle Vorhersagen für Sales {model_str} abgeschlossen und gespeichert.",
                                  state="complete")
@@ -59,6 +61,16 @@ def do_prediction(models):
     st.session_state["tool_predict"] = False
 
 
+def on_forecast_job_finished(job):
+    # Der Worker schreibt in einem anderen Prozess → Prognose-Caches dieses Prozesses verwerfen
+    clear_forecast_cache()
+    if job["Status"] == "done":
+        st.session_state["tool_predict_result"] = (f"Hintergrund-Prognose für {', '.join(job['Params']['models'])} "
+                                                   f"abgeschlossen ({job['FinishedAt']}).")
+    else:
+        st.session_state["tool_predict_result"] = f"Hintergrund-Prognose fehlgeschlagen: {job['Error']}"
+
+
 # ---------- Seite ----------
 @with_layout("Verwaltungstools")
 def page():
@@ -69,11 +81,17 @@ def page():
     if st.session_state["tool_import_db"]:
         with st.status("Lösche alte Datenbank... Bitte warten!", state="running") as ui_status:
             try:
+                # Offene Verbindungen zur alten Datei schließen, bevor sie gelöscht wird
+                close_connections("database/walmart.db")
                 import_product_db.drop()
                 ui_status.update(label="Importiere die Datensätze... Bitte warten!")
                 import_product_db.do_import()
                 data_loader.load_data.clear()
+                data_loader.load_sales_enriched.clear()
                 data_loader.load_product_data.clear()
+                # Übersichtsstatistiken für den neuen Datenstand direkt mit berechnen
+                ui_status.update(label="Berechne Übersichtsstatistiken... Bitte warten!")
+                ensure_data_profile()
                 ui_status.update(label="Import abgeschlossen.", state="complete")
 
             except Exception as e:
@@ -92,12 +110,20 @@ def page():
     st.button("Cache leeren", key="do_clear_cache_trigger",
               on_click=lambda: st.cache_data.clear())
 
+    with st.expander("Datenbank-Verbindungen (dieser Prozess)"):
+        stats = connection_stats()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Lesend geöffnet / wiederverwendet", f"{stats['read_opened']} / {stats['read_reused']}")
+        c2.metric("Schreibend geöffnet / wiederverwendet", f"{stats['write_opened']} / {stats['write_reused']}")
+        c3.metric("Wiederverwendungsquote", f"{stats['reuse_ratio'] * 100:.1f} %")
+
     st.divider()
     st.write("### Sales-Prognosen neu erstellen")
     st.write("**Wird je nach Modell extrem lange dauern**")
 
     # Modelle auswählen (mehrere möglich)
     selected_models = st.multiselect("Wähle Modelle aus", options=available_models, default=available_models[:3])
+    background = st.checkbox("Im Hintergrund ausführen (übersteht Neuladen der Seite)", value=True)
 
     # Prognose-Button
     if not st.session_state["tool_predict"]:
@@ -106,7 +132,18 @@ def page():
 
     # Führe alle Vorhersagen aus
     if st.session_state["tool_predict"]:
-        do_prediction(selected_models)
+        if background:
+            submit_job("forecast", {"models": selected_models, "periods": 104}, FORECAST_JOB_QUERY_KEY)
+            st.session_state["tool_predict"] = False
+        else:
+            do_prediction(selected_models)
+
+    # Laufender Hintergrund-Auftrag
+    job_id = get_tracked_job_id(FORECAST_JOB_QUERY_KEY)
+    if job_id:
+        show_job_progress(job_id, FORECAST_JOB_QUERY_KEY, on_forecast_job_finished)
+    if st.session_state.get("tool_predict_result"):
+        st.info(st.session_state["tool_predict_result"])
 
 
 page()
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database import connection
+from database.connection import close_connections, get_read_connection, write_connection
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "walmart.db")
+    with write_connection(path) as conn:
+        conn.execute("CREATE TABLE Store (StoreID INTEGER PRIMARY KEY)")
+    yield path
+    close_connections(path)
+
+
+def is_closed(conn):
+    try:
+        conn.execute("SELECT 1")
+    except sqlite3.ProgrammingError:
+        return True
+    return False
+
+
+def open_in_thread(db_path, keep_alive=None):
+    """Öffnet eine Lese-Verbindung in einem eigenen Thread; mit `keep_alive` läuft der Thread bis zum Event weiter."""
+    opened = []
+    ready = threading.Event()
+
+    def run():
+        opened.append(get_read_connection(db_path))
+        ready.set()
+        if keep_alive is not None:
+            keep_alive.wait()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    ready.wait()
+    if keep_alive is None:
+        thread.join()
+    return opened[0], thread
+
+
+def test_read_connection_is_reused_per_thread(db_path):
+    conn = get_read_connection(db_path)
+    assert get_read_connection(db_path) is conn
+    other, _ = open_in_thread(db_path)
+    assert other is not conn
+
+
+def test_connections_of_finished_threads_are_closed(db_path):
+    finished = [open_in_thread(db_path)[0] for _ in range(3)]
+    get_read_connection(db_path)
+
+    assert all(is_closed(conn) for conn in finished)
+    assert len(connection._readers[connection._key(db_path)]) == 1
+
+
+def test_close_connections_closes_handles_of_all_threads(db_path):
+    keep_alive = threading.Event()
+    other, thread = open_in_thread(db_path, keep_alive)
+    own = get_read_connection(db_path)
+    try:
+        close_connections(db_path)
+        assert is_closed(own)
+        assert is_closed(other)
+    finally:
+        keep_alive.set()
+        thread.join()
+
+    # Danach wird transparent neu geöffnet
+    reopened = get_read_connection(db_path)
+    assert reopened is not own
+    assert reopened.execute("SELECT COUNT(*) FROM Store").fetchone() == (0,)
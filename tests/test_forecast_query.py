@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from database.connection import close_connections
+from database.data_reader import read_forecast_query
+from database.data_writer import write_forecast
+from database.forecast_schema import build_forecast_query, make_series_key
+from logic.analysis import timing
+
+COLUMNS = ["Model", "ds", "yhat", "yhat_lower", "yhat_upper", "is_future"]
+SERIES = {"StoreID": 1, "DeptID": 2}
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # Messungen der Schreibvorgänge nicht in database/metrics.db des Arbeitsverzeichnisses speichern
+    monkeypatch.setattr(timing, "PROFILING_ENABLED", False)
+    path = str(tmp_path / "predictions.db")
+    yield path
+    timing.flush_spans()
+    close_connections(path)
+
+
+def forecast(start, periods, offset=0.0):
+    ds = pd.date_range(start, periods=periods, freq="W-FRI")
+    return pd.DataFrame({"ds": ds, "yhat": [offset + i for i in range(periods)], "yhat_lower": None,
+                         "yhat_upper": None})
+
+
+def query(db_path, models, identifiers=SERIES, last_date=None, periods=None):
+    sql, params = build_forecast_query(models, make_series_key("_Sales", identifiers), last_date, periods)
+    return read_forecast_query(sql, params, COLUMNS, db_path)
+
+
+def test_reads_all_rows_of_the_requested_models(db_path):
+    write_forecast(forecast("2012-01-06", 6), SERIES, "Prophet", "_Sales", db_path, history_end="2012-01-20")
+    write_forecast(forecast("2012-01-06", 6, 100), SERIES, "ARIMA", "_Sales", db_path, history_end="2012-01-20")
+    write_forecast(forecast("2012-01-06", 6, 200), SERIES, "Holt-Winters", "_Sales", db_path)
+    write_forecast(forecast("2012-01-06", 6, 300), {"StoreID": 1, "DeptID": 3}, "Prophet", "_Sales", db_path)
+
+    df = query(db_path, ["Prophet", "ARIMA"])
+    assert list(df.columns) == COLUMNS
+    assert df.groupby("Model").size().to_dict() == {"ARIMA": 6, "Prophet": 6}
+    # sortiert nach Modell und Datum, is_future aus history_end
+    assert df["Model"].tolist() == ["ARIMA"] * 6 + ["Prophet"] * 6
+    assert df.groupby("Model")["ds"].apply(lambda ds: ds.is_monotonic_increasing).all()
+    assert df[df["Model"] == "Prophet"]["is_future"].tolist() == [0, 0, 0, 1, 1, 1]
+    assert df[df["Model"] == "ARIMA"]["yhat"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0, 105.0]
+
+
+def test_upsert_keeps_one_row_per_date(db_path):
+    write_forecast(forecast("2012-01-06", 4), SERIES, "Prophet", "_Sales", db_path)
+    write_forecast(forecast("2012-01-20", 4, 50), SERIES, "Prophet", "_Sales", db_path)
+
+    df = query(db_path, ["Prophet"])
+    assert len(df) == 6
+    assert not df["ds"].duplicated().any()
+    assert df["yhat"].tolist() == [0.0, 1.0, 50.0, 51.0, 52.0, 53.0]
+
+
+def test_periods_limits_only_future_rows(db_path):
+    write_forecast(forecast("2012-01-06", 10), SERIES, "Prophet", "_Sales", db_path, history_end="2012-02-03")
+    write_forecast(forecast("2012-02-10", 8, 100), SERIES, "ARIMA", "_Sales", db_path, history_end="2012-02-03")
+
+    df = query(db_path, ["Prophet", "ARIMA"], periods=2)
+    prophet = df[df["Model"] == "Prophet"]
+    # 5 historische Zeilen (bis 2012-02-03) und die ersten 2 Zukunftswerte
+    assert prophet["ds"].dt.strftime("%Y-%m-%d").tolist() == ["2012-01-06", "2012-01-13", "2012-01-20", "2012-01-27",
+                                                              "2012-02-03", "2012-02-10", "2012-02-17"]
+    assert df[df["Model"] == "ARIMA"]["yhat"].tolist() == [100.0, 101.0]
+
+
+def test_last_date_overrides_stored_future_flag(db_path):
+    write_forecast(forecast("2012-01-06", 10), SERIES, "Prophet", "_Sales", db_path, history_end="2012-02-03")
+
+    df = query(db_path, ["Prophet"], last_date=pd.Timestamp("2012-01-13"), periods=3)
+    assert df["ds"].max() == pd.Timestamp("2012-02-03")
+    assert len(df) == 5
+
+
+def test_unknown_series_or_model_is_empty(db_path):
+    write_forecast(forecast("2012-01-06", 4), SERIES, "Prophet", "_Sales", db_path)
+
+    assert query(db_path, ["ARIMA"]).empty
+    assert query(db_path, ["Prophet"], {"StoreID": 9, "DeptID": 9}).empty
+
+
+def test_missing_database_is_empty_frame(tmp_path):
+    df = query(str(tmp_path / "missing" / "predictions.db"), ["Prophet"], periods=4)
+    assert df.empty
+    assert list(df.columns) == COLUMNS
+    assert pd.api.types.is_datetime64_any_dtype(df["ds"])
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from database.connection import close_connections
+from logic.analysis import timing
+from logic.forcasting.hierarchy import reconcile, save_store_hierarchy
+
+
+def test_coherent_base_forecasts_stay_unchanged():
+    bottom = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    for method, variances in [("ols", None), ("mint", [3.0, 1.0, 2.0])]:
+        np.testing.assert_allclose(reconcile(bottom.sum(axis=0), bottom, method, variances), bottom)
+
+
+def test_ols_splits_the_gap_evenly():
+    bottom = np.array([[10.0], [20.0]])
+    # Lücke 30 zwischen Summe (60) und Departments (30): OLS verteilt 2/3 davon gleichmäßig auf zwei Departments
+    np.testing.assert_allclose(reconcile(np.array([60.0]), bottom, "ols"), [[20.0], [30.0]])
+
+
+def test_mint_adjusts_noisy_series_more():
+    bottom = np.array([[10.0], [20.0]])
+    reconciled = reconcile(np.array([60.0]), bottom, "mint", [1e-9, 1.0, 100.0])
+    # Nahezu sichere Store-Summe wird exakt getroffen, die Korrektur landet beim Department mit hoher Varianz
+    assert reconciled.sum() == pytest.approx(60.0)
+    assert reconciled[1, 0] - 20.0 > reconciled[0, 0] - 10.0
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        reconcile(np.zeros(1), np.zeros((2, 1)), "wls")
+
+
+def test_saved_departments_sum_to_store_forecast(tmp_path, monkeypatch):
+    monkeypatch.setattr(timing, "PROFILING_ENABLED", False)
+    db_path = str(tmp_path / "predictions.db")
+    history_ds = pd.date_range("2012-01-06", periods=8, freq="W-FRI")
+    future_ds = pd.date_range(history_ds[-1] + pd.Timedelta(weeks=1), periods=4, freq="W-FRI")
+    histories = {dept_id: pd.DataFrame({"ds": history_ds, "y": np.full(8, 100.0 * dept_id)}) for dept_id in [1, 2]}
+    frames = {dept_id: pd.DataFrame({"ds": future_ds, "yhat": np.full(4, 100.0 * dept_id), "yhat_lower": None,
+                                     "yhat_upper": None}) for dept_id in [1, 2]}
+    base_top = pd.DataFrame({"ds": future_ds, "yhat": np.full(4, 450.0)})
+
+    try:
+        store_frame, dept_frames = save_store_hierarchy(1, histories, frames, "Prophet", "ols", base_top,
+                                                        future_only=True, db_path=db_path)
+    finally:
+        timing.flush_spans()
+        close_connections(db_path)
+
+    dept_sum = sum(frame.set_index("ds")["yhat"] for frame in dept_frames.values())
+    np.testing.assert_allclose(store_frame.set_index("ds")["yhat"], dept_sum)
+    # Abgleich zwischen Bottom-Up-Summe 300 und Basisprognose 450
+    assert (store_frame["yhat"] > 300.0).all() and (store_frame["yhat"] < 450.0).all()
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from database.connection import close_connections
+from database.job_queue import MAX_JOB_ATTEMPTS, claim_job, enqueue_job, ensure_job_schema, finish_job, get_job, \
+    heartbeat, requeue_stale_jobs
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "predictions.db")
+    yield path
+    close_connections(path)
+
+
+def test_enqueue_deduplicates_active_jobs(db_path):
+    job_id = enqueue_job("forecast", {"models": ["Prophet"], "stores": [1]}, db_path)
+    assert enqueue_job("forecast", {"stores": [1], "models": ["Prophet"]}, db_path) == job_id
+    assert enqueue_job("forecast", {"models": ["Prophet"], "stores": [2]}, db_path) != job_id
+
+    claim_job(db_path)
+    finish_job(job_id, result={"ok": True}, db_path=db_path)
+    assert enqueue_job("forecast", {"models": ["Prophet"], "stores": [1]}, db_path) != job_id
+
+
+def test_claim_takes_oldest_queued_job_once(db_path):
+    first = enqueue_job("forecast", {"stores": [1]}, db_path)
+    second = enqueue_job("forecast", {"stores": [2]}, db_path)
+
+    job = claim_job(db_path)
+    assert job == {"JobID": first, "Kind": "forecast", "Params": {"stores": [1]}}
+    assert claim_job(db_path)["JobID"] == second
+    assert claim_job(db_path) is None
+
+    stored = get_job(first, db_path)
+    assert stored["Status"] == "running"
+    assert stored["Attempts"] == 1
+
+
+def test_requeue_only_jobs_without_live_worker(db_path):
+    job_id = enqueue_job("optimize", {"params": {}}, db_path)
+    claim_job(db_path)
+
+    heartbeat(db_path)
+    assert requeue_stale_jobs(db_path) == 0
+    assert get_job(job_id, db_path)["Status"] == "running"
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM JobWorker")
+    assert requeue_stale_jobs(db_path) == 1
+    job = get_job(job_id, db_path)
+    assert job["Status"] == "queued"
+    assert job["WorkerPID"] is None
+    assert claim_job(db_path)["JobID"] == job_id
+
+
+def test_job_fails_after_max_attempts(db_path):
+    job_id = enqueue_job("optimize", {"params": {}}, db_path)
+    for attempt in range(1, MAX_JOB_ATTEMPTS + 1):
+        assert claim_job(db_path)["JobID"] == job_id
+        requeued = requeue_stale_jobs(db_path)
+        assert requeued == (1 if attempt < MAX_JOB_ATTEMPTS else 0)
+
+    job = get_job(job_id, db_path)
+    assert job["Status"] == "error"
+    assert job["Attempts"] == MAX_JOB_ATTEMPTS
+    assert job["Error"]
+    assert claim_job(db_path) is None
+
+
+def test_schema_adds_attempts_to_existing_table(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE Job (JobID TEXT PRIMARY KEY, Kind TEXT NOT NULL, ParamsHash TEXT NOT NULL, "
+                     "Params TEXT NOT NULL, Status TEXT NOT NULL DEFAULT 'queued', Progress REAL NOT NULL DEFAULT 0, "
+                     "Message TEXT, Result TEXT, Error TEXT, WorkerPID INTEGER, CreatedAt TEXT NOT NULL, "
+                     "StartedAt TEXT, FinishedAt TEXT)")
+    ensure_job_schema(db_path)
+
+    job_id = enqueue_job("forecast", {}, db_path)
+    claim_job(db_path)
+    assert get_job(job_id, db_path)["Attempts"] == 1
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.optimization.optimizations import holiday_dates, prepare_weekly_sales, remove_outliers
+
+
+def reference_prepare_weekly_sales(df_sales, df_features):
+    """Ursprüngliche Implementierung (exakter Merge mit StoreFeature je Verkaufszeile) als Vergleichsmaßstab."""
+    df_sales["Week"] = df_sales["Date"].dt.isocalendar().week.astype(int)
+    df_sales["Year"] = df_sales["Date"].dt.isocalendar().year.astype(int)
+
+    weekly_sales_raw = df_sales.groupby(["StoreID", "DeptID", "Year", "Week"])["WeeklySales"].mean().reset_index()
+    weekly_sales = (weekly_sales_raw.groupby(["StoreID", "DeptID"], group_keys=False)[weekly_sales_raw.columns]
+                    .apply(remove_outliers).reset_index(drop=True))
+
+    df_merged = pd.merge(df_sales.drop(columns=["IsHoliday"], errors="ignore"), df_features, on=["StoreID", "Date"],
+                         how="left")
+    df_merged["Week"] = df_merged["Date"].dt.isocalendar().week.astype(int)
+    df_merged["Year"] = df_merged["Date"].dt.isocalendar().year.astype(int)
+    holiday_weeks = df_merged[df_merged["IsHoliday"] == 1][["StoreID", "Year", "Week"]].drop_duplicates()
+
+    weekly_sales = pd.merge(weekly_sales, holiday_weeks, on=["StoreID", "Year", "Week"], how="left", indicator=True)
+    weekly_sales = weekly_sales[weekly_sales["_merge"] == "left_only"].drop(columns="_merge")
+    return weekly_sales.dropna(subset=["StoreID", "DeptID", "Year", "Week", "WeeklySales"])
+
+
+def make_walmart_like():
+    """
+    Zwei Stores mit je zwei Departments: Historie freitags, angehängte Prognose sonntags (wie Prophet). StoreFeature
+    reicht wie im Walmart-Datensatz über die Historie hinaus, inklusive Feiertagen im Prognosezeitraum.
+    """
+    rng = np.random.default_rng(0)
+    history = pd.date_range("2010-02-05", periods=110, freq="W-FRI")
+    forecast = pd.date_range(history[-1] + pd.Timedelta(days=2), periods=52, freq="W-SUN")
+    feature_dates = pd.date_range(history[0], periods=170, freq="W-FRI")
+
+    rows = []
+    for store_id in [1, 2]:
+        for dept_id in [1, 2]:
+            for dates in [history, forecast]:
+                sales = rng.normal(20000, 3000, len(dates))
+                sales[::37] *= 4  # Ausreißer
+                rows.append(pd.DataFrame({"StoreID": store_id, "DeptID": dept_id, "Date": dates,
+                                          "WeeklySales": sales}))
+    df_sales = pd.concat(rows, ignore_index=True)
+
+    # Feiertage: Super Bowl, Labor Day, Thanksgiving, Weihnachten (Freitag der jeweiligen Woche); Store 2 ohne 2011
+    holidays = pd.to_datetime(["2010-02-12", "2010-09-10", "2010-11-26", "2010-12-31", "2011-02-11", "2011-09-09",
+                               "2011-11-25", "2011-12-30", "2012-02-10", "2012-09-07", "2012-11-23", "2012-12-28",
+                               "2013-02-08"])
+    df_features = pd.DataFrame([(store_id, date) for store_id in [1, 2] for date in feature_dates],
+                               columns=["StoreID", "Date"])
+    df_features["IsHoliday"] = df_features["Date"].isin(holidays).astype(int)
+    df_features.loc[(df_features["StoreID"] == 2) & (df_features["Date"].dt.year == 2011), "IsHoliday"] = 0
+    df_features["Temperature"] = rng.normal(60, 10, len(df_features))
+    return df_sales, df_features
+
+
+@pytest.fixture
+def walmart_like():
+    return make_walmart_like()
+
+
+def assert_same_weeks(actual, expected):
+    key = ["StoreID", "DeptID", "Year", "Week"]
+    pd.testing.assert_frame_equal(actual.sort_values(key).reset_index(drop=True),
+                                  expected.sort_values(key).reset_index(drop=True), check_dtype=False)
+
+
+def test_matches_reference_per_pair(walmart_like):
+    df_sales, df_features = walmart_like
+    for _, df_pair in df_sales.groupby(["StoreID", "DeptID"]):
+        assert_same_weeks(prepare_weekly_sales(df_pair.copy(), df_features),
+                          reference_prepare_weekly_sales(df_pair.copy(), df_features))
+
+
+def test_shared_holidays_match_reference(walmart_like):
+    df_sales, df_features = walmart_like
+    holidays = holiday_dates(df_features)
+    for _, df_pair in df_sales.groupby(["StoreID", "DeptID"]):
+        assert_same_weeks(prepare_weekly_sales(df_pair.copy(), None, holidays),
+                          reference_prepare_weekly_sales(df_pair.copy(), df_features))
+
+
+def test_keeps_forecast_weeks_with_holidays(walmart_like):
+    df_sales, df_features = walmart_like
+    df_pair = df_sales[(df_sales["StoreID"] == 1) & (df_sales["DeptID"] == 1)].copy()
+    df_pair["WeeklySales"] = 20000.0  # ohne Ausreißer, damit nur die Feiertage Wochen entfernen
+    weekly = prepare_weekly_sales(df_pair, df_features)
+
+    # Thanksgiving 2012 liegt im Prognosezeitraum; die Sonntagszeile dieser Woche bleibt erhalten
+    assert ((weekly["Year"] == 2012) & (weekly["Week"] == 47)).any()
+    # Thanksgiving 2010 liegt in der Historie und wird entfernt
+    assert not ((weekly["Year"] == 2010) & (weekly["Week"] == 47)).any()
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from database.connection import close_connections
+from database.metrics import read_spans
+from logic.analysis import timing
+from logic.analysis.timing import flush_spans, span
+
+
+@pytest.fixture
+def metrics_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "metrics.db")
+    flush_spans()
+    monkeypatch.setattr(timing, "METRICS_DB_PATH", path)
+    monkeypatch.setattr(timing, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(timing, "FLUSH_INTERVAL", 3600)
+    yield path
+    flush_spans()
+    close_connections(path)
+
+
+def test_span_tree_is_buffered_until_flush(metrics_db):
+    with span("outer", "Store 1"):
+        with span("inner"):
+            pass
+        with span("inner"):
+            pass
+
+    assert read_spans(db_path=metrics_db).empty
+    flush_spans()
+
+    df = read_spans(db_path=metrics_db)
+    assert sorted(df["Name"]) == ["inner", "inner", "outer"]
+    root = df[df["Name"] == "outer"].iloc[0]
+    assert pd.isna(root["ParentID"]) and root["Detail"] == "Store 1"
+    assert (df["RootID"] == root["SpanID"]).all()
+    assert (df.loc[df["Name"] == "inner", "ParentID"] == root["SpanID"]).all()
+
+
+def test_flushes_when_buffer_is_full(metrics_db, monkeypatch):
+    monkeypatch.setattr(timing, "FLUSH_SIZE", 3)
+    for _ in range(2):
+        with span("step"):
+            pass
+    assert read_spans(db_path=metrics_db).empty
+
+    with span("step"):
+        pass
+    assert len(read_spans(db_path=metrics_db)) == 3
+
+
+def test_failed_span_is_recorded_as_error(metrics_db):
+    with pytest.raises(RuntimeError):
+        with span("failing"):
+            raise RuntimeError("boom")
+    flush_spans()
+
+    assert read_spans(db_path=metrics_db)["Status"].tolist() == ["error"]
+
+
+def test_nothing_is_written_without_profiling(metrics_db, monkeypatch):
+    monkeypatch.setattr(timing, "PROFILING_ENABLED", False)
+    with span("step"):
+        pass
+    flush_spans()
+
+    assert read_spans(db_path=metrics_db).empty